@@ -29,7 +29,7 @@ def create_app(config_object="config.Config"):
             r"/*": {
                 "origins": "*",
                 "supports_credentials": True,
-                "methods": ["GET", "POST", "OPTIONS"],
+                "methods": ["GET", "POST", "DELETE", "OPTIONS"],
                 "allow_headers": ["Content-Type", "Authorization"],
             }
         },
@@ -1,212 +1,282 @@
-from flask import Blueprint, request, jsonify
-from app.utils.simul import (
-    simulate_voters,
-    simulate_score_voters,
-    simulate_ranked_voters,
+import numpy as np
+from flask import Blueprint, current_app, request, jsonify
+from app.services.simulation_job_service import (
+    CANCELLED,
+    FINISHED,
+    JobQueueFull,
+    get_job_service,
 )
-from app.utils.simulation_ranked_utils import (
-    get_condorcet_winner,
-    get_two_round_winner,
-    get_borda_winner,
-    get_plurality_winner,
-    get_approval_winner,
-    get_irv_winner,
-    get_coombs_winner,
-    get_score_winner,
-    get_kemeny_young_winner,
-    get_bucklin_winner,
-    get_minimax_winner,
-    get_schulze_winner,
+from app.services.simulation_cache_service import BYPASS, get_cache_service
+from app.services.simulation_service import SimulationService
+from app.simulation.agent_based_model import (
+    distribution_changes,
+    simulate_opinion_dynamics,
 )
-from app.simulation.population_simulation import assign_voters_to_candidates
+from app.simulation.network_topology import cached_graph
+from app.simulation.population_simulation import nearest_candidates
+from app.utils.decorators import admin_required
+from app.utils.rng import as_generator, parse_seed
 from app.utils.simulation_voting_utils import (
     calculate_utility,
-    create_voter,
+    calculate_utility_matrix,
     create_candidate,
-)
-from app.utils.simulation_score_utils import (
-    get_mean_median_hybrid_winner,
-    get_median_voting_winner,
-    get_score_distribution_analysis,
-    get_simple_score_winner,
-    get_star_voting_winner,
-    get_variance_based_winner,
+    generate_voters,
 )
 
 
 simulation_bp = Blueprint("simulations", __name__, url_prefix="/simulations")
 
 
-@simulation_bp.route("/", methods=["POST"])
-def simulate_votes_route():
-    data = request.get_json()
-    form_data = data.get("formData")
-    population_size = form_data.get("populationSize")
-    candidates = form_data.get("candidates")
-    demographics = form_data.get("demographics")
-    turnout_rate = form_data.get("turnoutRate")
-    influence_weights = form_data.get("influenceWeights")
-    simulation_type = form_data.get("simulationType")
-
-    if form_data is None:
-        return jsonify({"error": "Missing required parameters"}), 400
+NDJSON_MIMETYPE = "application/x-ndjson"
 
-    if "votes" in simulation_type:
-        voters, votes, tally = simulate_voters(
-            population_size, candidates, demographics, influence_weights, turnout_rate
-        )
-    if "ranked" in simulation_type:
-        voters_r, rankings, first_choice_tally = simulate_ranked_voters(
-            population_size, candidates, demographics, influence_weights, turnout_rate
-        )
-        condorcet_winner = get_condorcet_winner(rankings)
-        two_round_winner = get_two_round_winner(rankings)
-        borda_winner = get_borda_winner(rankings)
-        plurality_winner = get_plurality_winner(rankings)
-        approval_winner = get_approval_winner(rankings)
-        irv_winner = get_irv_winner(rankings)
-        coombs_winner = get_coombs_winner(rankings)
-        score_winner = get_score_winner(rankings)
-        kemeny_young_winner = get_kemeny_young_winner(rankings)
-        bucklin_winner = get_bucklin_winner(rankings)
-        minimax_winner = get_minimax_winner(rankings)
-        schulze_winner = get_schulze_winner(rankings)
-
-    if "scores" in simulation_type:
-        voters_n, all_scores, avg_scores = simulate_score_voters(
-            population_size, candidates, demographics, influence_weights, turnout_rate
-        )
-        mean_median_hybrid_winner = get_mean_median_hybrid_winner(all_scores)
-        median_voting_winner = get_median_voting_winner(all_scores)
-        score_distribution_analysis = get_score_distribution_analysis(all_scores)
-        simple_score_winner = get_simple_score_winner(all_scores)
-        star_voting_winner = get_star_voting_winner(all_scores)
-        variance_based_winner = get_variance_based_winner(all_scores)
-
-    response = {
-        "simulation_type": simulation_type,
-        "metadata": {
-            "population_size": population_size,
-            "candidates": candidates,
-            "turnout_rate": turnout_rate,
-            "demographics": demographics,
-            "influence_weights": influence_weights,
-        },
-    }
 
-    # Add simulation-specific data
-    if "votes" in simulation_type:
-        response.update(
-            {
-                "votes": [
-                    {"voter_id": voter["id"], "preference": voter["preference"]}
-                    for voter in voters
-                    if voter["turnout"]
-                ],
-                "tally": tally,
-                "voters_sample": [
-                    {k: v for k, v in voter.items() if k != "scores" and k != "ranking"}
-                    for voter in voters
-                ],
-            }
-        )
-
-    if "ranked" in simulation_type:
-        response.update(
-            {
-                "rankings": [
-                    {"voter_id": voter["id"], "ranking": voter["ranking"]}
-                    for voter in voters_r
-                    if voter["turnout"]
-                ],
-                "first_choice_tally": first_choice_tally,
-                "voters_sample": [
-                    {
-                        k: v
-                        for k, v in voter.items()
-                        if k != "scores" and k != "preference"
-                    }
-                    for voter in voters_r
-                ],
-            }
-        )
+def _wants_ndjson():
+    """Streaming is asked for with ?stream=ndjson or an NDJSON Accept header."""
+    if request.args.get("stream") == "ndjson":
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
 
-    if "scores" in simulation_type:
-        response.update(
-            {
-                "all_scores": [
-                    {"voter_id": voter["id"], "scores": voter["scores"]}
-                    for voter in voters_n
-                    if voter["turnout"]
-                ],
-                "avg_scores": avg_scores,
-                "voters_sample": [
-                    {
-                        k: v
-                        for k, v in voter.items()
-                        if k != "preference" and k != "ranking"
-                    }
-                    for voter in voters_n
-                ],
-            }
-        )
 
-    # Add common analysis results if available
-    if "condorcet_winner" in locals():
-        response["condorcet_winner"] = condorcet_winner
-
-    if "two_round_winner" in locals():
-        response["two_round_winner"] = two_round_winner
-
-    if "borda_winner" in locals():
-        response["borda_winner"] = borda_winner
-
-    if "plurality_winner" in locals():
-        response["plurality_winner"] = plurality_winner
+def _stream_simulation(form_data):
+    records, status = SimulationService.stream_simulation(
+        form_data, dict(current_app.config)
+    )
+    if status != 200:
+        return jsonify(records), status
+    response = current_app.response_class(records, mimetype=NDJSON_MIMETYPE)
+    response.headers["X-Simulation-Cache"] = BYPASS
+    return response
 
-    if "approval_winner" in locals():
-        response["approval_winner"] = approval_winner
 
-    if "irv_winner" in locals():
-        response["irv_winner"] = irv_winner
+@simulation_bp.route("/", methods=["POST"])
+def simulate_votes_route():
+    data = request.get_json()
+    if _wants_ndjson():
+        return _stream_simulation(data.get("formData"))
 
-    if "coombs_winner" in locals():
-        response["coombs_winner"] = coombs_winner
+    result, status, cache_status = get_cache_service(current_app).run_simulation(
+        data.get("formData"), current_app.config
+    )
+    response = jsonify(result)
+    response.headers["X-Simulation-Cache"] = cache_status
+    return response, status
 
-    if "score_winner" in locals():
-        response["score_winner"] = score_winner
 
-    if "kemeny_young_winner" in locals():
-        response["kemeny_young_winner"] = kemeny_young_winner
+@simulation_bp.route("/cache", methods=["DELETE"])
+@admin_required
+def flush_simulation_cache():
+    """Drop every cached simulation result."""
+    flushed = get_cache_service(current_app).flush()
+    return jsonify({"flushed": flushed}), 200
 
-    if "bucklin_winner" in locals():
-        response["bucklin_winner"] = bucklin_winner
 
-    if "minimax_winner" in locals():
-        response["minimax_winner"] = minimax_winner
+@simulation_bp.route("/jobs", methods=["POST"])
+def submit_simulation_job():
+    """
+    Queue a simulation to run in the background.
+    Takes the same body as POST /simulations/ and answers 202 with the job
+    record; poll GET /simulations/jobs/<job_id> for its status and progress.
+    """
+    data = request.get_json()
+    form_data = data.get("formData") if data else None
+    # Invalid requests are refused here rather than failing once queued
+    error = SimulationService.validate(form_data)
+    if error is not None:
+        return jsonify(error), 400
 
-    if "schulze_winner" in locals():
-        response["schulze_winner"] = schulze_winner
+    try:
+        job = get_job_service(current_app).submit(form_data)
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 429
+
+    response = jsonify(job)
+    response.headers["Location"] = f"{simulation_bp.url_prefix}/jobs/{job['id']}"
+    return response, 202
+
+
+@simulation_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_simulation_job(job_id):
+    """Status ('queued', 'running', 'finished', 'failed' or 'cancelled') and
+    progress percentage of a simulation job."""
+    job = get_job_service(current_app).get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+
+@simulation_bp.route("/jobs/<job_id>/result", methods=["GET"])
+def get_simulation_job_result(job_id):
+    """Result of a finished simulation job, as POST /simulations/ returns it."""
+    jobs = get_job_service(current_app)
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] != FINISHED:
+        return (
+            jsonify(
+                {
+                    "error": job["error"] or f"Job is {job['status']}",
+                    "status": job["status"],
+                }
+            ),
+            409,
+        )
 
-    if "mean_median_hybrid_winner" in locals():
-        response["mean_median_hybrid_winner"] = mean_median_hybrid_winner
+    result = jobs.result(job_id)
+    if result is None:
+        return jsonify({"error": "Job result has expired"}), 404
+    return current_app.response_class(result, mimetype="application/json"), 200
 
-    if "median_voting_winner" in locals():
-        response["median_voting_winner"] = median_voting_winner
 
-    if "score_distribution_analysis" in locals():
-        response["score_distribution_analysis"] = score_distribution_analysis
+@simulation_bp.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_simulation_job(job_id):
+    """Cancel a queued or running simulation job."""
+    job = get_job_service(current_app).cancel(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] != CANCELLED:
+        return jsonify({"error": f"Job already {job['status']}"}), 409
+    return jsonify(job), 200
 
-    if "simple_score_winner" in locals():
-        response["simple_score_winner"] = simple_score_winner
 
-    if "star_voting_winner" in locals():
-        response["star_voting_winner"] = star_voting_winner
+@simulation_bp.route("/agent_based", methods=["POST"])
+def simulate_agent_based():
+    """
+    Agent-based opinion dynamics: at every step each elector meets a random
+    elector and adopts their preference with the probability given by the
+    influence matrix
+    Expected JSON payload:
+    {
+        "num_electors": int,              # Number of electors
+        "num_choices": int,               # Number of choices
+        "influence_matrix": [[float]],    # num_choices x num_choices
+                                          # probabilities, row = own choice,
+                                          # column = other's choice
+        "num_steps": int,                 # Number of steps
+        "update": str,                    # Optional: "synchronous" (default)
+                                          # or "asynchronous"
+        "initial_distribution": [float],  # Optional: initial weights
+        "seed": int,                      # Optional: seed for reproducibility
+        "tolerance": float,               # Optional: stop once the change of
+                                          # the preference shares stays within
+                                          # tolerance for "patience" steps
+        "patience": int,                  # Optional: default 1
+        "network": {                      # Optional: who meets whom
+            "type": str,                  # "erdos_renyi" ("mean_degree"),
+                                          # "watts_strogatz" ("k", "beta"),
+                                          # "barabasi_albert" ("m") or
+                                          # "knn" ("k", "avg_age")
+            "seed": int,                  # Optional: defaults to "seed"
+        },
+    }
+    Without a network every elector can meet any other. Network degrees are
+    capped by SIMULATION_AGENT_MAX_DEGREE, and num_electors times the degree
+    by SIMULATION_AGENT_MAX_EDGES. Seeded networks are cached on disk and
+    memory-mapped when SIMULATION_GRAPH_CACHE_DIR is set.
+    Returns:
+    {
+        "trajectory": [[int]],  # Preference counts after each step, the
+                                # first row being the initial counts
+        "final_counts": [int],
+        "final_shares": [float],
+        "changes": [float],     # Change of the preference shares per step
+        "metadata": {...}       # With "steps" executed and "converged"
+    }
+    """
+    data = request.get_json() or {}
+    num_electors = data.get("num_electors", 1000)
+    num_choices = data.get("num_choices")
+    num_steps = data.get("num_steps", 10)
+    update = data.get("update", "synchronous")
+    if num_choices is None or data.get("influence_matrix") is None:
+        return jsonify({"error": "Missing required parameters"}), 400
+    if not all(
+        isinstance(value, int) and not isinstance(value, bool)
+        for value in (num_electors, num_choices, num_steps)
+    ):
+        return (
+            jsonify(
+                {"error": "num_electors, num_choices and num_steps must be integers"}
+            ),
+            400,
+        )
+    max_electors = current_app.config.get("SIMULATION_AGENT_MAX_ELECTORS", 5000000)
+    max_steps = current_app.config.get("SIMULATION_AGENT_MAX_STEPS", 10000)
+    if not 1 <= num_electors <= max_electors:
+        return (
+            jsonify({"error": f"num_electors must be between 1 and {max_electors}"}),
+            400,
+        )
+    if not 1 <= num_steps <= max_steps:
+        return (
+            jsonify({"error": f"num_steps must be between 1 and {max_steps}"}),
+            400,
+        )
 
-    if "variance_based_winner" in locals():
-        response["variance_based_winner"] = variance_based_winner
+    network = data.get("network")
+    if network is not None and not isinstance(network, dict):
+        return jsonify({"error": "network must be an object"}), 400
+    tolerance = data.get("tolerance")
+    patience = data.get("patience", 1)
+    if tolerance is not None and (
+        isinstance(tolerance, bool)
+        or not isinstance(tolerance, (int, float))
+        or tolerance < 0
+    ):
+        return jsonify({"error": "tolerance must be a non-negative number"}), 400
+    if isinstance(patience, bool) or not isinstance(patience, int):
+        return jsonify({"error": "patience must be an integer"}), 400
+
+    metadata = {
+        "num_electors": num_electors,
+        "num_choices": num_choices,
+        "num_steps": num_steps,
+        "update": update,
+    }
+    try:
+        seed = parse_seed(data.get("seed"))
+        graph = None
+        if network is not None:
+            graph = cached_graph(
+                {key: value for key, value in network.items() if key != "seed"},
+                num_electors,
+                parse_seed(network.get("seed", seed)),
+                current_app.config.get("SIMULATION_GRAPH_CACHE_DIR"),
+                current_app.config.get("SIMULATION_GRAPH_CACHE_MAX_BYTES", 0),
+                current_app.config.get("SIMULATION_AGENT_MAX_DEGREE", 1000),
+                current_app.config.get("SIMULATION_AGENT_MAX_EDGES", 50000000),
+            )
+            metadata["network"] = {
+                "type": network.get("type"),
+                "num_edges": graph.num_edges,
+                "mean_degree": 2 * graph.num_edges / num_electors,
+            }
+        trajectory = simulate_opinion_dynamics(
+            num_electors,
+            num_choices,
+            data["influence_matrix"],
+            num_steps,
+            seed,
+            update=update,
+            initial_distribution=data.get("initial_distribution"),
+            graph=graph,
+            tolerance=tolerance,
+            patience=patience,
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
 
-    return jsonify(response), 200
+    metadata.update(steps=trajectory.steps, converged=trajectory.converged)
+    final_counts = trajectory.counts[-1]
+    return jsonify(
+        {
+            "trajectory": trajectory.counts.tolist(),
+            "final_counts": final_counts.tolist(),
+            "final_shares": (final_counts / num_electors).tolist(),
+            "changes": distribution_changes(trajectory.counts).tolist(),
+            "metadata": metadata,
+        }
+    )
 
 
 @simulation_bp.route("/simulate_voters", methods=["POST"])
@@ -216,6 +286,7 @@ def simulate_voters_repartitions():
     Expected JSON payload:
     {
         "num_voters": int,  # Number of voters to generate
+        "seed": int,        # Optional: seed for a reproducible population
     }
     Returns:
     {
@@ -257,30 +328,12 @@ def simulate_voters_repartitions():
     """
     data = request.json
     num_voters = data.get("num_voters", 1000)
-    issues = [
-        "economy",
-        "environment",
-        "healthcare",
-        "education",
-        "taxes",
-        "social_welfare",
-        "agriculture",
-        "public_transport",
-        "defense",
-        "gender_equality",
-        "pensions",
-        "climate_change",
-        "housing",
-        "immigration",
-        "crime_safety",
-        "technology_innovation",
-        "minimum_wage",
-        "business_regulation",
-        "jobs",
-        "infrastructure",
-    ]
-
-    voters = [create_voter(issues, i) for i in range(num_voters)]
+    try:
+        seed = parse_seed(data.get("seed"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    voters = generate_voters(num_voters, seed).to_dicts()
     return jsonify({"voters": voters})
 
 
@@ -292,7 +345,8 @@ def simulate_candidates_repartitions():
     {
         "num_candidates": int,  # Number of candidates to generate (default: 4)
         "issues": list,         # List of policy issues
-        "parties": list         # Optional: specific parties to include
+        "parties": list,        # Optional: specific parties to include
+        "seed": int             # Optional: seed for reproducible candidates
     }
     Returns:
     {
@@ -341,6 +395,11 @@ def simulate_candidates_repartitions():
         ],
     )
 
+    try:
+        rng = as_generator(parse_seed(data.get("seed")))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     # Default parties if not specified
     default_parties = ["Green", "Conservative", "Liberal", "Independent"]
     parties = data.get("parties", default_parties)
@@ -354,7 +413,7 @@ def simulate_candidates_repartitions():
     for i in range(num_candidates):
         party = parties[i]
         name = f"Candidate {i+1} ({party})"
-        candidates.append(create_candidate(issues, i, name, party))
+        candidates.append(create_candidate(issues, i, name, party, rng))
 
     return jsonify(
         {
@@ -367,16 +426,41 @@ def simulate_candidates_repartitions():
 
 @simulation_bp.route("/get_closest_candidate", methods=["POST"])
 def get_closest_candidates():
+    """
+    Closest candidate of each voter in the political space
+    Expected JSON payload:
+    {
+        "voters": [[float]],      # Voter coordinates
+        "candidates": [[float]],  # Candidate coordinates
+        "k": int,                 # Optional: also return the k closest
+                                  # candidates of each voter
+    }
+    Returns:
+    {
+        "result": [int],          # Index of each voter's closest candidate
+        "rankings": [[int]],      # With k: closest candidates, nearest first
+        "distances": [[float]],   # With k: their distances
+    }
+    """
     data = request.get_json()
     candidates = data.get("candidates")
     voters = data.get("voters")
+    k = data.get("k")
 
     if voters is None or candidates is None:
         return jsonify({"error": "Missing required parameters"}), 400
+    if k is not None and (isinstance(k, bool) or not isinstance(k, int) or k < 1):
+        return jsonify({"error": "k must be a positive integer"}), 400
 
-    result = assign_voters_to_candidates(voters, candidates)
+    try:
+        indices, distances = nearest_candidates(voters, candidates, k or 1)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    response = {"result": result}
+    response = {"result": indices[:, 0].tolist()}
+    if k is not None:
+        response["rankings"] = indices.tolist()
+        response["distances"] = distances.tolist()
 
     return jsonify(response), 200
 
@@ -390,7 +474,8 @@ def simulate_utility():
         "num_voters": int,      # Number of voters to generate (default: 100)
         "num_candidates": int,  # Number of candidates to generate (default: 4)
         "issues": list,         # List of policy issues
-        "parties": list         # Optional: specific parties to include
+        "parties": list,        # Optional: specific parties to include
+        "seed": int             # Optional: seed for the will_vote draws
     }
     Returns:
     {
@@ -430,10 +515,10 @@ def simulate_utility():
         )
 
         # Calculate utility for all voter-candidate pairs
-        utility_results = []
-        for voter in voters:
-            for candidate in candidates:
-                utility_results.append(calculate_utility(voter, candidate, issues))
+        utilities = calculate_utility_matrix(
+            voters, candidates, issues, parse_seed(data.get("seed"))
+        )
+        utility_results = utilities.results()
 
         return jsonify({"success": True, "utility_results": utility_results})
 
@@ -458,7 +543,8 @@ def calculate_single_utility():
     {
         "voter": {...},
         "candidate": {...},
-        "issues": list
+        "issues": list,
+        "seed": int  # Optional: seed for the will_vote draw
     }
     Returns:
     {
@@ -509,7 +595,9 @@ def calculate_single_utility():
                 400,
             )
 
-        result = calculate_utility(voter, candidate, issues)
+        result = calculate_utility(
+            voter, candidate, issues, parse_seed(data.get("seed"))
+        )
 
         return jsonify(
             {
@@ -540,7 +628,8 @@ def get_utility_matrix():
     {
         "voters": [...],
         "candidates": [...],
-        "issues": list
+        "issues": list,
+        "seed": int  # Optional: seed for the will_vote draws
     }
     Returns:
     {
@@ -598,27 +687,17 @@ def get_utility_matrix():
             )
 
         # Calculate utility matrix
-        matrix = []
-        vote_counts = {candidate["id"]: 0 for candidate in candidates}
-        total_utility = 0
-        total_pairs = 0
-
-        for voter in voters:
-            row = []
-            for candidate in candidates:
-                result = calculate_utility(voter, candidate, issues)
-                row.append(result["utility"])
-                total_utility += result["utility"]
-                total_pairs += 1
-                if result["will_vote"]:
-                    vote_counts[candidate["id"]] += 1
-            matrix.append(row)
+        utilities = calculate_utility_matrix(
+            voters, candidates, issues, parse_seed(data.get("seed"))
+        )
+        matrix = np.round(utilities.utility, 4)
+        vote_counts = utilities.will_vote.sum(axis=0).tolist()
 
         # Calculate stats
-        average_utility = total_utility / total_pairs if total_pairs > 0 else 0
+        average_utility = float(matrix.mean()) if matrix.size else 0
         vote_shares = {
             candidate["id"]: count / len(voters)
-            for candidate, count in zip(candidates, vote_counts.values())
+            for candidate, count in zip(candidates, vote_counts)
         }
 
         return jsonify(
@@ -627,7 +706,7 @@ def get_utility_matrix():
                 "matrix": {
                     "voter_ids": [voter["id"] for voter in voters],
                     "candidate_ids": [candidate["id"] for candidate in candidates],
-                    "values": matrix,
+                    "values": matrix.tolist(),
                 },
                 "stats": {
                     "average_utility": round(average_utility, 4),
@@ -727,26 +806,34 @@ def get_voter_segments():
                 400,
             )
 
+        # Voter attributes used by the segment tests, gathered on first use
+        columns = {}
+
+        def column(name):
+            if name not in columns:
+                columns[name] = np.array([voter[name] for voter in voters])
+            return columns[name]
+
         # Define segment tests
         segment_definitions = {
             "young_female": {
-                "test": lambda v: v["age"] <= 30 and v["gender"] == "female",
+                "test": lambda: (column("age") <= 30) & (column("gender") == "female"),
                 "label": "Jeunes femmes (18-30)",
             },
             "old_male": {
-                "test": lambda v: v["age"] > 60 and v["gender"] == "male",
+                "test": lambda: (column("age") > 60) & (column("gender") == "male"),
                 "label": "Hommes âgés (60+)",
             },
             "high_edu": {
-                "test": lambda v: v["education"] in ["master", "phd"],
+                "test": lambda: np.isin(column("education"), ["master", "phd"]),
                 "label": "Éducation élevée",
             },
             "low_income": {
-                "test": lambda v: v["income"] == "low",
+                "test": lambda: column("income") == "low",
                 "label": "Faible revenu",
             },
-            "urban": {"test": lambda v: v["region"] == "urban", "label": "Urbains"},
-            "rural": {"test": lambda v: v["region"] == "rural", "label": "Ruraux"},
+            "urban": {"test": lambda: column("region") == "urban", "label": "Urbains"},
+            "rural": {"test": lambda: column("region") == "rural", "label": "Ruraux"},
         }
 
         # Filter segments
@@ -754,77 +841,46 @@ def get_voter_segments():
             k: v for k, v in segment_definitions.items() if k in segment_types
         }
 
-        # Calculate utilities for all pairs
-        utility_results = []
-        for voter in voters:
-            for candidate in candidates:
-                utility_results.append(calculate_utility(voter, candidate, issues))
+        # Calculate utilities for all pairs; each voter's max utility candidate
+        utility = np.round(
+            calculate_utility_matrix(voters, candidates, issues).utility, 4
+        )
+        best = utility.argmax(axis=1)
+        best_utility = utility[np.arange(len(voters)), best]
 
         # Prepare segment analysis
         segments = {}
         for seg_key, seg_def in segment_definitions.items():
-            segment_voters = [v for v in voters if seg_def["test"](v)]
-            if not segment_voters:
+            members = np.flatnonzero(seg_def["test"]())
+            if not len(members):
                 continue
 
-            segment_utilities = []
-            for voter in segment_voters:
-                voter_utilities = [
-                    r for r in utility_results if r["voter_id"] == voter["id"]
-                ]
-                if voter_utilities:
-                    # Find max utility for this voter
-                    max_utility = max(voter_utilities, key=lambda x: x["utility"])
-                    segment_utilities.append(max_utility)
-
-            if not segment_utilities:
-                continue
+            segment_best = best[members]
+            segment_utilities = best_utility[members]
 
             # Calculate segment stats
-            avg_utility = sum(u["utility"] for u in segment_utilities) / len(
-                segment_utilities
-            )
+            avg_utility = float(segment_utilities.mean())
 
-            # Find top candidate for this segment
-            candidate_votes = {}
-            for u in segment_utilities:
-                candidate_id = u["candidate_id"]
-                candidate_votes[candidate_id] = candidate_votes.get(candidate_id, 0) + 1
-
-            if candidate_votes:
-                top_candidate_id = max(candidate_votes.items(), key=lambda x: x[1])[0]
-                top_candidate = next(
-                    (c for c in candidates if c["id"] == top_candidate_id), None
-                )
-                top_utility = next(
-                    (
-                        u["utility"]
-                        for u in segment_utilities
-                        if u["candidate_id"] == top_candidate_id
-                    ),
-                    0,
-                )
-            else:
-                top_candidate = None
-                top_utility = 0
+            # Find top candidate for this segment; ties go to the one whose
+            # first supporter comes first
+            candidate_votes = np.bincount(segment_best, minlength=len(candidates))
+            tied = np.flatnonzero(candidate_votes == candidate_votes.max())
+            first_supporter = {c: int(np.argmax(segment_best == c)) for c in tied}
+            top_index = min(tied, key=first_supporter.get)
+            top_candidate = candidates[top_index]
+            top_utility = float(segment_utilities[first_supporter[top_index]])
 
             segments[seg_key] = {
                 "label": seg_def["label"],
-                "count": len(segment_voters),
+                "count": len(members),
                 "average_utility": round(avg_utility, 4),
-                "top_candidate": (
-                    {
-                        "id": top_candidate["id"] if top_candidate else None,
-                        "name": top_candidate["name"] if top_candidate else "None",
-                        "party": top_candidate["party"] if (top_candidate) else "None",
-                        "utility": round(top_utility, 4) if top_candidate else 0,
-                    }
-                    if top_candidate
-                    else None
-                ),
-                "utility_distribution": [
-                    round(u["utility"], 4) for u in segment_utilities
-                ],
+                "top_candidate": {
+                    "id": top_candidate["id"],
+                    "name": top_candidate["name"],
+                    "party": top_candidate["party"],
+                    "utility": round(top_utility, 4),
+                },
+                "utility_distribution": segment_utilities.tolist(),
             }
 
         return jsonify(
@@ -0,0 +1,219 @@
+# app/services/simulation_cache_service.py
+import hashlib
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import redis
+
+from app import redis_client
+from app.services.simulation_service import SimulationService
+from app.utils.simulation_ranked_utils import KEMENY_MAX_EXACT_CANDIDATES
+
+# Bump whenever a change to the simulation code changes what a seeded
+# request returns, so results computed by older code are never served
+CACHE_VERSION = "4"
+
+# Response fields that describe one particular run rather than the result,
+# such as wall-clock timings; they are not stored, so hits leave them out
+UNCACHED_KEYS = ("ranked_method_timings",)
+
+_KEY_PREFIX = "simulation_cache"
+
+HIT = "HIT"
+MISS = "MISS"
+BYPASS = "BYPASS"
+
+
+def canonical_payload(form_data) -> str:
+    """
+    Normalised JSON form of a simulation request.
+    Key order and the order of simulationType entries do not change a
+    result, so they do not change the payload either.
+    """
+    normalized = dict(form_data)
+    if isinstance(normalized.get("simulationType"), list):
+        normalized["simulationType"] = sorted(set(normalized["simulationType"]))
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+
+
+def depends_on_time(result) -> bool:
+    """
+    Whether a result depends on how long the request took to run: the
+    Kemeny-Young ranking is then approximate although its candidates were
+    few enough to solve exactly, so the exact solver ran out of time. Such
+    results are not cached, since a later run could return the exact one.
+    """
+    kemeny = result.get("kemeny_young_ranking")
+    return (
+        isinstance(kemeny, dict)
+        and kemeny.get("approximate", False)
+        and len(kemeny.get("ranking", [])) <= KEMENY_MAX_EXACT_CANDIDATES
+    )
+
+
+def payload_hash(form_data, salt: str = CACHE_VERSION) -> str:
+    """SHA-256 of the canonical payload salted with the code version."""
+    digest = hashlib.sha256(salt.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(canonical_payload(form_data).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class LocalCacheStore:
+    """In-process LRU stand-in for Redis when it is not reachable."""
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def touch(self, key, ttl):
+        with self._lock:
+            if key in self._items:
+                self._items[key] = (self._items[key][0], time.monotonic() + ttl)
+
+    def flush(self, prefix):
+        with self._lock:
+            keys = [key for key in self._items if key.startswith(prefix)]
+            for key in keys:
+                del self._items[key]
+        return len(keys)
+
+
+class RedisCacheStore:
+    """
+    Cache entries in Redis. Entries expire after their TTL, which every hit
+    renews; under memory pressure Redis' allkeys-lru policy evicts the
+    least recently used ones.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=ttl)
+
+    def touch(self, key, ttl):
+        self.client.expire(key, ttl)
+
+    def flush(self, prefix):
+        count = 0
+        for key in self.client.scan_iter(match=f"{prefix}*", count=500):
+            count += self.client.delete(key)
+        return count
+
+
+class SimulationCacheService:
+    """
+    Content-addressed cache of /simulations results.
+
+    Only seeded requests are cached, since only they are deterministic, and
+    of their results only those that do not depend on time (see
+    depends_on_time). Entries are keyed by payload_hash and stored as
+    zlib-compressed JSON.
+    """
+
+    def __init__(self, config, store=None):
+        self.enabled = bool(config.get("SIMULATION_CACHE_ENABLED", True))
+        self.ttl = int(config.get("SIMULATION_CACHE_TTL", 86400))
+        self.version = str(config.get("SIMULATION_CACHE_VERSION") or CACHE_VERSION)
+        # Seeded results also depend on how the population is chunked
+        self.salt = f"{self.version}:{config.get('SIMULATION_CHUNK_SIZE')}"
+        if store is None:
+            store = self._create_store(config)
+        self.store = store
+
+    @staticmethod
+    def _create_store(config):
+        if config.get("SIMULATION_CACHE_STORE", "redis") == "redis":
+            try:
+                redis_client.ping()
+                return RedisCacheStore(redis_client)
+            except redis.exceptions.RedisError:
+                pass
+        return LocalCacheStore(int(config.get("SIMULATION_CACHE_MAX_ENTRIES", 128)))
+
+    def key(self, form_data) -> str:
+        return f"{_KEY_PREFIX}:{payload_hash(form_data, self.salt)}"
+
+    def cacheable(self, form_data) -> bool:
+        return self.enabled and bool(form_data) and form_data.get("seed") is not None
+
+    def get(self, form_data):
+        """Cached result of a request, or None."""
+        key = self.key(form_data)
+        value = self.store.get(key)
+        if value is None:
+            return None
+        self.store.touch(key, self.ttl)
+        return json.loads(zlib.decompress(value))
+
+    def set(self, form_data, result):
+        result = {k: v for k, v in result.items() if k not in UNCACHED_KEYS}
+        data = json.dumps(result, separators=(",", ":")).encode("utf-8")
+        self.store.set(self.key(form_data), zlib.compress(data), self.ttl)
+
+    def flush(self) -> int:
+        """Drop every cached result; returns the number of entries removed."""
+        return self.store.flush(f"{_KEY_PREFIX}:")
+
+    def run_simulation(self, form_data, config, progress=None):
+        """
+        SimulationService.run_simulation behind the cache.
+        :return: The response body, HTTP status and cache status (HIT, MISS
+                 or BYPASS for requests that are not cached)
+        """
+        if not self.cacheable(form_data):
+            result, status = SimulationService.run_simulation(
+                form_data, config, progress=progress
+            )
+            return result, status, BYPASS
+
+        result = self.get(form_data)
+        if result is not None:
+            if progress is not None:
+                progress(1.0)
+            return result, 200, HIT
+
+        result, status = SimulationService.run_simulation(
+            form_data, config, progress=progress
+        )
+        if status == 200 and not depends_on_time(result):
+            self.set(form_data, result)
+        return result, status, MISS
+
+
+_services_lock = threading.Lock()
+
+
+def get_cache_service(app):
+    """The app's SimulationCacheService, created on first use."""
+    with _services_lock:
+        if "simulation_cache" not in app.extensions:
+            app.extensions["simulation_cache"] = SimulationCacheService(app.config)
+        return app.extensions["simulation_cache"]
@@ -0,0 +1,235 @@
+# app/services/simulation_job_service.py
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import redis
+
+from app import redis_client
+from app.services.simulation_cache_service import get_cache_service
+from app.services.simulation_service import SimulationService
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+DONE_STATUSES = (FINISHED, FAILED, CANCELLED)
+
+_KEY_PREFIX = "simulation_job"
+
+
+class JobQueueFull(Exception):
+    """Raised when no more simulation jobs can be accepted."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once it has been cancelled."""
+
+
+class LocalJobStore:
+    """In-process stand-in for Redis when it is not reachable."""
+
+    def __init__(self):
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+
+class RedisJobStore:
+    """Job records in Redis, shared by every app process."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        value = self.client.get(key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+
+def create_job_store(config):
+    """
+    Redis store when SIMULATION_JOB_STORE is 'redis' and Redis answers,
+    otherwise a local in-process store.
+    """
+    if config.get("SIMULATION_JOB_STORE", "redis") == "redis":
+        try:
+            redis_client.ping()
+            return RedisJobStore(redis_client)
+        except redis.exceptions.RedisError:
+            pass
+    return LocalJobStore()
+
+
+class SimulationJobService:
+    """
+    Runs /simulations requests in the background on a bounded thread pool.
+
+    At most SIMULATION_MAX_JOBS jobs run at once and at most
+    SIMULATION_MAX_QUEUED_JOBS more wait for a slot; further submissions are
+    refused. Job records and results expire SIMULATION_JOB_TTL seconds after
+    their last update.
+    """
+
+    def __init__(self, config, store=None, cache=None):
+        self.config = dict(config)
+        self.store = store if store is not None else create_job_store(config)
+        self.cache = cache
+        self.ttl = int(self.config.get("SIMULATION_JOB_TTL", 3600))
+        self.max_jobs = max(int(self.config.get("SIMULATION_MAX_JOBS", 2)), 1)
+        self.max_queued = max(int(self.config.get("SIMULATION_MAX_QUEUED_JOBS", 8)), 0)
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_jobs, thread_name_prefix="simulation-job"
+        )
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def _key(self, job_id, suffix=None):
+        key = f"{_KEY_PREFIX}:{job_id}"
+        return f"{key}:{suffix}" if suffix else key
+
+    def _save(self, job):
+        self.store.set(self._key(job["id"]), json.dumps(job), self.ttl)
+
+    def _load(self, job_id):
+        value = self.store.get(self._key(job_id))
+        return json.loads(value) if value is not None else None
+
+    def _cancel_requested(self, job_id):
+        return self.store.get(self._key(job_id, "cancel")) is not None
+
+    def submit(self, form_data):
+        """
+        Queue a simulation.
+        :param form_data: The formData of a POST /simulations request
+        :return: The new job record
+        :raises JobQueueFull: When max_jobs + max_queued jobs are pending
+        """
+        with self._lock:
+            if len(self._futures) >= self.max_jobs + self.max_queued:
+                raise JobQueueFull("Too many simulation jobs, try again later")
+            job = {
+                "id": uuid.uuid4().hex,
+                "status": QUEUED,
+                "progress": 0.0,
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+            }
+            self._save(job)
+            future = self._pool.submit(self._run, job, form_data)
+            self._futures[job["id"]] = future
+        future.add_done_callback(lambda _: self._forget(job["id"]))
+        return job
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def _run(self, job, form_data):
+        if self._cancel_requested(job["id"]):
+            return self._finish(job, CANCELLED)
+        job.update(status=RUNNING, started_at=time.time())
+        self._save(job)
+
+        def progress(fraction):
+            # The cancel flag lives in its own key so a progress update can
+            # never overwrite a cancellation made from another process
+            if self._cancel_requested(job["id"]):
+                raise JobCancelled()
+            job["progress"] = round(100 * fraction, 1)
+            self._save(job)
+
+        try:
+            if self.cache is not None:
+                result, status, _ = self.cache.run_simulation(
+                    form_data, self.config, progress=progress
+                )
+            else:
+                result, status = SimulationService.run_simulation(
+                    form_data, self.config, progress=progress
+                )
+        except JobCancelled:
+            return self._finish(job, CANCELLED)
+        except Exception as e:
+            return self._finish(job, FAILED, error=str(e))
+
+        if status != 200:
+            return self._finish(job, FAILED, error=result.get("error"))
+        self.store.set(self._key(job["id"], "result"), json.dumps(result), self.ttl)
+        return self._finish(job, FINISHED)
+
+    def _finish(self, job, status, error=None):
+        job.update(status=status, error=error, finished_at=time.time())
+        if status == FINISHED:
+            job["progress"] = 100.0
+        self._save(job)
+
+    def get(self, job_id):
+        """Job record with its status and progress, or None if unknown."""
+        job = self._load(job_id)
+        if job is not None and job["status"] not in DONE_STATUSES:
+            if self._cancel_requested(job_id):
+                job["status"] = CANCELLED
+        return job
+
+    def result(self, job_id):
+        """Serialised result of a finished job, or None."""
+        return self.store.get(self._key(job_id, "result"))
+
+    def cancel(self, job_id):
+        """
+        Cancel a queued or running job.
+        A queued job never starts; a running one stops at its next chunk.
+        :return: The updated job record, or None if unknown
+        """
+        job = self._load(job_id)
+        if job is None or job["status"] in DONE_STATUSES:
+            return job
+        self.store.set(self._key(job_id, "cancel"), "1", self.ttl)
+        with self._lock:
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            self._finish(job, CANCELLED)
+        job["status"] = CANCELLED
+        return job
+
+
+_services_lock = threading.Lock()
+
+
+def get_job_service(app):
+    """The app's SimulationJobService, created on first use."""
+    with _services_lock:
+        if "simulation_jobs" not in app.extensions:
+            app.extensions["simulation_jobs"] = SimulationJobService(
+                app.config, cache=get_cache_service(app)
+            )
+        return app.extensions["simulation_jobs"]
@@ -0,0 +1,297 @@
+# app/services/simulation_service.py
+import json
+from collections import Counter
+
+import numpy as np
+
+from app.utils.simulation_executor import BRANCHES, executor_from_config
+from app.utils.rng import parse_seed
+from app.utils.simulation_ranked_utils import (
+    RANKED_METHODS,
+    RankedBallots,
+    run_all_ranked_methods,
+)
+from app.utils.simulation_score_utils import ScoreAccumulator
+
+# Share of a job's progress spent generating and casting ballots; the rest
+# goes to counting them
+SIMULATION_PROGRESS_SHARE = 0.9
+
+# Response key of each score method's result
+SCORE_RESPONSE_KEYS = {
+    "simple_score": "simple_score_winner",
+    "star_voting": "star_voting_winner",
+    "median_voting": "median_voting_winner",
+    "mean_median_hybrid": "mean_median_hybrid_winner",
+    "variance_based": "variance_based_winner",
+    "score_distribution": "score_distribution_analysis",
+}
+
+# Voter fields left out of each branch's voters_sample
+_HIDDEN_VOTER_FIELDS = {
+    "votes": ("scores", "ranking"),
+    "ranked": ("scores", "preference"),
+    "scores": ("preference", "ranking"),
+}
+
+
+def _parse_request(form_data):
+    """
+    Simulation parameters of a request.
+    :return: The executor params, the requested branches and the seed
+    :raises ValueError: For an invalid seed, sampleSize, includeBallots or
+                        rankedMethods, before anything is simulated
+    """
+    seed = parse_seed(form_data.get("seed"))
+    sample_size = form_data.get("sampleSize")
+    if sample_size is not None and (
+        isinstance(sample_size, bool)
+        or not isinstance(sample_size, int)
+        or sample_size < 0
+    ):
+        raise ValueError("sampleSize must be a non-negative integer")
+    include_ballots = form_data.get("includeBallots", True)
+    if not isinstance(include_ballots, bool):
+        raise ValueError("includeBallots must be a boolean")
+    ranked_methods = form_data.get("rankedMethods")
+    if ranked_methods is not None:
+        if not isinstance(ranked_methods, list):
+            raise ValueError("rankedMethods must be a list of method names")
+        unknown = [
+            str(method) for method in ranked_methods if method not in RANKED_METHODS
+        ]
+        if unknown:
+            raise ValueError(f"Unknown ranked methods: {', '.join(unknown)}")
+
+    simulation_type = form_data.get("simulationType")
+    params = {
+        "population_size": form_data.get("populationSize"),
+        "candidates": form_data.get("candidates"),
+        "demographics": form_data.get("demographics"),
+        "influence_weights": form_data.get("influenceWeights"),
+        "turnout_rate": form_data.get("turnoutRate"),
+        "sample_size": sample_size,
+        "ballots": include_ballots,
+    }
+    branches = [branch for branch in BRANCHES if branch in simulation_type]
+    return params, branches, seed
+
+
+def _metadata(form_data):
+    return {
+        "simulation_type": form_data.get("simulationType"),
+        "metadata": {
+            "population_size": form_data.get("populationSize"),
+            "candidates": form_data.get("candidates"),
+            "turnout_rate": form_data.get("turnoutRate"),
+            "demographics": form_data.get("demographics"),
+            "influence_weights": form_data.get("influenceWeights"),
+        },
+    }
+
+
+def _voter_sample(branch, voter):
+    hidden = _HIDDEN_VOTER_FIELDS[branch]
+    return {k: v for k, v in voter.items() if k not in hidden}
+
+
+def _analysis(ranked_results=None, score_results=None):
+    """Winner fields of the response from the ranked and score method results."""
+    response = {}
+    if ranked_results is not None:
+        for method, winner in ranked_results["winners"].items():
+            response[f"{method}_winner"] = winner
+
+        details = ranked_results["results"]
+        if "irv" in details:
+            response["irv_rounds"] = details["irv"]["rounds"]
+        if "coombs" in details:
+            response["coombs_rounds"] = details["coombs"]["rounds"]
+        if "kemeny_young" in details:
+            response["kemeny_young_ranking"] = details["kemeny_young"]
+        if "schulze" in details:
+            response["schulze_ranking"] = details["schulze"]
+        response["ranked_method_timings"] = ranked_results["timings"]
+
+    if score_results is not None:
+        for method, key in SCORE_RESPONSE_KEYS.items():
+            response[key] = score_results[method]
+    return response
+
+
+class SimulationService:
+    @staticmethod
+    def validate(form_data):
+        """
+        Check a /simulations request without running it.
+        :return: An error body, or None for a valid request
+        """
+        if form_data is None:
+            return {"error": "Missing required parameters"}
+        try:
+            _parse_request(form_data)
+        except ValueError as e:
+            return {"error": str(e)}
+        return None
+
+    @staticmethod
+    def run_simulation(form_data, config, progress=None):
+        """
+        Run the vote, ranked and score simulations of a /simulations request.
+        Score methods read a ScoreAccumulator merged from the chunks, which
+        counts distinct scores so that medians stay exact.
+        :param form_data: The request's formData; besides the simulation
+                          parameters, 'sampleSize' caps voters_sample (default:
+                          every voter, 0 leaves it out) and 'includeBallots':
+                          false leaves out the per-voter ballots
+        :param config: Flask config with the SIMULATION_* settings
+        :param progress: Optional callable taking the completed fraction (0-1);
+                         it may raise to abort the simulation
+        :return: The response body and HTTP status
+        """
+        if form_data is None:
+            return {"error": "Missing required parameters"}, 400
+        try:
+            params, branches, seed = _parse_request(form_data)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        def simulation_progress(done, total):
+            if progress is not None:
+                progress(SIMULATION_PROGRESS_SHARE * done / total)
+
+        # Population generation and ballot casting run chunked across the
+        # simulation process pool, every requested branch concurrently
+        simulation = executor_from_config(config).run(
+            params, branches, seed, progress=simulation_progress
+        )
+
+        response = _metadata(form_data)
+        ranked_results = score_results = None
+        # The sample of the last branch is the one returned, as before
+        sample = None
+
+        if "votes" in simulation:
+            if params["ballots"]:
+                response["votes"] = simulation["votes"]["votes"]
+            response["tally"] = simulation["votes"]["tally"]
+            sample = ("votes", simulation["votes"]["voters"])
+
+        if "ranked" in simulation:
+            # Distinct rankings with their multiplicities, merged from every
+            # chunk; every ranked method reads from the same shared tallies and
+            # pairwise matrix
+            ranked_results = run_all_ranked_methods(
+                simulation["ranked"]["ballots"],
+                methods=form_data.get("rankedMethods"),
+            )
+            if params["ballots"]:
+                response["rankings"] = simulation["ranked"]["rankings"]
+            response["first_choice_tally"] = simulation["ranked"]["first_choice_tally"]
+            sample = ("ranked", simulation["ranked"]["voters"])
+
+        if "scores" in simulation:
+            # Every score method reads the accumulator merged from the chunks
+            score_results = simulation["scores"]["accumulator"].results()
+            if params["ballots"]:
+                response["all_scores"] = simulation["scores"]["all_scores"]
+            response["avg_scores"] = simulation["scores"]["avg_scores"]
+            sample = ("scores", simulation["scores"]["voters"])
+
+        if sample is not None and params["sample_size"] != 0:
+            branch, voters = sample
+            response["voters_sample"] = [
+                _voter_sample(branch, voter) for voter in voters
+            ]
+
+        response.update(_analysis(ranked_results, score_results))
+
+        if progress is not None:
+            progress(1.0)
+        return response, 200
+
+    @staticmethod
+    def stream_simulation(form_data, config):
+        """
+        Run a /simulations request as a stream of NDJSON records.
+
+        A 'metadata' record comes first, then one 'voter' record per simulated
+        voter and branch, chunk by chunk, and finally a 'summary' record with
+        the tallies and every winner, as in run_simulation's response. Only
+        one chunk of voters is held at a time, with tallies, compressed ranked
+        ballots and a ScoreAccumulator built on the way, so memory does not
+        grow with the population. sampleSize and includeBallots do not apply:
+        every voter is streamed with its ballot.
+        :return: An iterator of NDJSON text and HTTP status 200, or an error
+                 body and status 400
+        """
+        if form_data is None:
+            return {"error": "Missing required parameters"}, 400
+        try:
+            params, branches, seed = _parse_request(form_data)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        executor = executor_from_config(config)
+        # Every voter is streamed; per-voter ballots are part of its record
+        params.update(sample_size=None, ballots=False)
+
+        def records():
+            yield json.dumps(dict(_metadata(form_data), type="metadata")) + "\n"
+
+            candidates = params["candidates"]
+            tallies = {branch: Counter() for branch in branches}
+            ballots = None
+            scores = ScoreAccumulator(list(candidates), exact_medians=True)
+            score_sums = np.zeros(len(candidates))
+
+            for branch, _, output in executor.iter_chunks(params, branches, seed):
+                voters = output["voters"]
+                if branch == "scores":
+                    scores.merge(output["scores"])
+                    score_sums += output["sums"]
+                else:
+                    tallies[branch].update(output["tally"])
+                if branch == "ranked":
+                    parts = [output["ranked"]]
+                    ballots = RankedBallots.merge(
+                        parts if ballots is None else [ballots, *parts]
+                    )
+
+                yield "".join(
+                    json.dumps(
+                        {
+                            "type": "voter",
+                            "branch": branch,
+                            "voter": _voter_sample(branch, voter),
+                        }
+                    )
+                    + "\n"
+                    for voter in voters
+                )
+
+            summary = {"type": "summary"}
+            ranked_results = score_results = None
+            if "votes" in branches:
+                summary["tally"] = dict(tallies["votes"])
+            if "ranked" in branches:
+                if ballots is None:
+                    ballots = RankedBallots(
+                        candidates, np.empty((0, len(candidates)), dtype=np.int64)
+                    )
+                # rankedMethods was checked by _parse_request before streaming
+                ranked_results = run_all_ranked_methods(
+                    ballots, methods=form_data.get("rankedMethods")
+                )
+                summary["first_choice_tally"] = dict(tallies["ranked"])
+            if "scores" in branches:
+                score_results = scores.results()
+                summary["avg_scores"] = (
+                    dict(zip(candidates, (score_sums / scores.num_ballots).tolist()))
+                    if scores.num_ballots
+                    else {}
+                )
+            summary.update(_analysis(ranked_results, score_results))
+            yield json.dumps(summary) + "\n"
+
+        return records(), 200
@@ -1,55 +1,305 @@
-import random
+import json
+from typing import NamedTuple, Optional
+
 import numpy as np
 
+from app.simulation.network_topology import Graph, atomic_npz
+from app.utils.rng import RNGLike, as_generator
+
 
 class Elector:
-    def __init__(self, preference, num_choices, age):
+    def __init__(self, preference, num_choices, age=None):
         self.preference = preference  # Initial preference
         self.num_choices = num_choices  # Total number of choices
         self.age = age  # Age of the elector
 
-    def influence(self, other, influence_matrix):
+    def influence(self, other, influence_matrix, rng: RNGLike = None):
         # Determine the probability of changing preference based on the
         # influence matrix
         current_pref = self.preference
         other_pref = other.preference
-        if random.random() < influence_matrix[current_pref, other_pref]:
+        if as_generator(rng).random() < influence_matrix[current_pref, other_pref]:
             self.preference = other_pref
 
 
-def simulate_election(num_electors, num_choices, influence_matrix, num_steps):
-    # Initialize electors with random preferences
-    electors = [
-        Elector(random.randint(0, num_choices - 1), num_choices)
-        for _ in range(num_electors)
-    ]
-
-    for step in range(num_steps):
-        # Each elector interacts with another random elector
-        for elector in electors:
-            other = random.choice(electors)
-            elector.influence(other, influence_matrix)
-
-    # Count the final preferences
-    preferences = [elector.preference for elector in electors]
-    preference_counts = [preferences.count(i) for i in range(num_choices)]
-    return preference_counts
-
-
-# Example usage
-num_electors = 1000
-num_choices = 3  # Number of choices (e.g., candidates)
-influence_matrix = np.array(
-    [
-        [0.1, 0.2, 0.3],  # Probability of changing from choice 0 to others
-        [0.2, 0.1, 0.4],  # Probability of changing from choice 1 to others
-        [0.3, 0.4, 0.1],  # Probability of changing from choice 2 to others
-    ]
-)
-num_steps = 10
-
-preference_counts = simulate_election(
-    num_electors, num_choices, influence_matrix, num_steps
-)
-
-print("Final preference counts:", preference_counts)
+# Update schemes of simulate_opinion_dynamics
+UPDATE_MODES = ("synchronous", "asynchronous")
+
+
+# Format of the checkpoints written by save_checkpoint
+CHECKPOINT_VERSION = 1
+
+
+class OpinionTrajectory(NamedTuple):
+    """
+    Result of simulate_opinion_dynamics.
+    counts[t, c] is the number of electors preferring choice c after step t,
+    row 0 being the initial preferences; runs stopped early have fewer than
+    num_steps + 1 rows.
+    """
+
+    counts: np.ndarray
+    preferences: np.ndarray
+    converged: bool = False
+
+    @property
+    def steps(self) -> int:
+        """Steps actually executed."""
+        return len(self.counts) - 1
+
+
+def distribution_changes(counts: np.ndarray) -> np.ndarray:
+    """
+    Per-step change of the preference distribution: the total variation
+    distance between the shares of consecutive rows of counts, i.e. half the
+    sum of the absolute share differences.
+    """
+    counts = np.asarray(counts)
+    if len(counts) < 2:
+        return np.zeros(0)
+    return 0.5 * np.abs(np.diff(counts, axis=0)).sum(axis=1) / counts[0].sum()
+
+
+def _has_converged(counts: np.ndarray, tolerance, patience: int) -> bool:
+    # Only the history is used, so a resumed run decides like an unbroken one
+    if tolerance is None or len(counts) <= patience:
+        return False
+    return bool((distribution_changes(counts[-patience - 1:]) <= tolerance).all())
+
+
+def save_checkpoint(path: str, trajectory: OpinionTrajectory, rng):
+    """
+    Save the state of a run, atomically, as an .npz file: the preferences,
+    the counts so far and the state of the Generator, so that
+    simulate_opinion_dynamics(..., resume_from=path) continues it exactly.
+    """
+    with atomic_npz(path) as file:
+        np.savez(
+            file,
+            version=CHECKPOINT_VERSION,
+            preferences=trajectory.preferences,
+            counts=trajectory.counts,
+            rng_state=json.dumps(rng.bit_generator.state),
+        )
+
+
+def load_checkpoint(path: str):
+    """
+    Read a checkpoint written by save_checkpoint.
+    :return: The OpinionTrajectory so far and the restored Generator
+    :raises ValueError: For a file of an unknown format
+    """
+    with np.load(path) as checkpoint:
+        if int(checkpoint["version"]) != CHECKPOINT_VERSION:
+            raise ValueError(f"{path} is not a supported checkpoint")
+        state = json.loads(str(checkpoint["rng_state"]))
+        trajectory = OpinionTrajectory(
+            checkpoint["counts"], checkpoint["preferences"]
+        )
+    bit_generator = getattr(np.random, state["bit_generator"])()
+    bit_generator.state = state
+    return trajectory, np.random.Generator(bit_generator)
+
+
+def _check_influence_matrix(influence_matrix, num_choices) -> np.ndarray:
+    matrix = np.asarray(influence_matrix, dtype=np.float64)
+    if matrix.shape != (num_choices, num_choices):
+        raise ValueError(
+            f"influence_matrix must be {num_choices} x {num_choices}, "
+            f"got {' x '.join(map(str, matrix.shape))}"
+        )
+    if not np.all((matrix >= 0) & (matrix <= 1)):
+        raise ValueError("influence_matrix entries must be probabilities in [0, 1]")
+    return matrix
+
+
+def simulate_opinion_dynamics(
+    num_electors: int,
+    num_choices: int,
+    influence_matrix,
+    num_steps: int,
+    rng: RNGLike = None,
+    update: str = "synchronous",
+    initial_distribution=None,
+    num_batches: int = 10,
+    graph: Optional[Graph] = None,
+    tolerance: Optional[float] = None,
+    patience: int = 1,
+    checkpoint_path: Optional[str] = None,
+    checkpoint_every: int = 0,
+    resume_from: Optional[str] = None,
+) -> OpinionTrajectory:
+    """
+    Vectorised opinion dynamics: at every step each elector meets a random
+    elector (a random neighbour when a graph is given) and adopts their
+    preference with probability
+    influence_matrix[own preference, other's preference].
+    :param num_electors: Number of electors
+    :param num_choices: Number of choices (e.g. candidates)
+    :param influence_matrix: (num_choices x num_choices) probabilities
+    :param num_steps: Maximum number of steps, counting those of a resumed
+                      run
+    :param rng: Seed or numpy Generator used for every draw
+    :param update: 'synchronous': every elector reads the preferences of the
+                   start of the step; 'asynchronous': random sequential
+                   updating in num_batches batches of electors drawn at
+                   random (with replacement), each batch seeing the updates
+                   of the previous ones
+    :param initial_distribution: Optional weights of the initial preferences
+                                 (default: uniform)
+    :param num_batches: Batches per step for asynchronous updates
+    :param graph: Optional interaction graph over the electors, see
+                  network_topology; electors without neighbours keep their
+                  preference
+    :param tolerance: Stop early once the distribution_changes of patience
+                      consecutive steps are all at most tolerance (default:
+                      always run num_steps)
+    :param patience: Consecutive steps within tolerance needed to stop
+    :param checkpoint_path: Optional .npz file the run is saved to every
+                            checkpoint_every steps (if positive) and at its
+                            end
+    :param checkpoint_every: Steps between checkpoints
+    :param resume_from: Optional checkpoint to continue instead of starting
+                        afresh; its Generator replaces rng, and the other
+                        arguments should be those of the saved run
+    :return: OpinionTrajectory with the counts after every step executed
+    :raises ValueError: For an invalid influence matrix, update mode or size
+    """
+    if update not in UPDATE_MODES:
+        raise ValueError(f"update must be one of: {', '.join(UPDATE_MODES)}")
+    if num_electors < 1 or num_choices < 1 or num_steps < 0 or patience < 1:
+        raise ValueError(
+            "num_electors, num_choices and patience must be positive and "
+            "num_steps non-negative"
+        )
+    matrix = _check_influence_matrix(influence_matrix, num_choices)
+    if graph is not None and graph.num_nodes != num_electors:
+        raise ValueError("graph must have one node per elector")
+    # Smallest integer type holding every choice keeps the gathers cheap
+    dtype = np.min_scalar_type(num_choices - 1)
+    if resume_from is not None:
+        resumed, rng = load_checkpoint(resume_from)
+        preferences = np.array(resumed.preferences, dtype=dtype)
+        size = (len(preferences), resumed.counts.shape[1])
+        if size != (num_electors, num_choices):
+            raise ValueError("checkpoint does not match the simulation size")
+        start = min(resumed.steps, num_steps)
+        # Counts rows, one per step; grown as the run goes since a converging
+        # run usually stops well before num_steps
+        history = list(resumed.counts[: start + 1])
+    elif initial_distribution is None:
+        rng = as_generator(rng)
+        start = 0
+        preferences = rng.integers(0, num_choices, num_electors, dtype=dtype)
+    else:
+        rng = as_generator(rng)
+        start = 0
+        weights = np.asarray(initial_distribution, dtype=np.float64)
+        if weights.shape != (num_choices,) or weights.min() < 0 or not weights.sum():
+            raise ValueError(
+                "initial_distribution must be num_choices non-negative weights"
+            )
+        preferences = rng.choice(
+            num_choices, size=num_electors, p=weights / weights.sum()
+        ).astype(dtype)
+    if resume_from is None:
+        history = [np.bincount(preferences, minlength=num_choices)]
+    index_dtype = np.int32 if num_electors < 2**31 else np.int64
+    # Flat lookup: probability of (current, other) at current * C + other
+    probabilities = matrix.ravel()
+    num_batches = max(min(num_batches, num_electors), 1)
+    size, extra = divmod(num_electors, num_batches)
+    batch_sizes = [size + 1] * extra + [size] * (num_batches - extra)
+
+    everyone = None if graph is None else np.arange(num_electors, dtype=index_dtype)
+
+    def meet(current, electors=everyone):
+        if graph is None:
+            partners = rng.integers(
+                0, num_electors, len(current), dtype=index_dtype
+            )
+        else:
+            partners = graph.sample_neighbours(electors, rng)
+        other = preferences[partners]
+        pairs = current.astype(np.intp) * num_choices + other
+        return other, rng.random(len(current)) < probabilities[pairs]
+
+    step = start
+    converged = _has_converged(
+        np.array(history[-patience - 1 :]), tolerance, patience
+    )
+    while step < num_steps and not converged:
+        step += 1
+        if update == "synchronous":
+            other, adopt = meet(preferences)
+            # preferences = where(adopt, other, preferences), in place; the
+            # unsigned wraparound cancels out
+            preferences += (other - preferences) * adopt
+        else:
+            for batch_size in batch_sizes:
+                electors = rng.integers(
+                    0, num_electors, batch_size, dtype=index_dtype
+                )
+                other, adopt = meet(preferences[electors], electors)
+                preferences[electors[adopt]] = other[adopt]
+
+        history.append(np.bincount(preferences, minlength=num_choices))
+        converged = _has_converged(
+            np.array(history[-patience - 1 :]), tolerance, patience
+        )
+        if checkpoint_path and checkpoint_every > 0 and step % checkpoint_every == 0:
+            save_checkpoint(
+                checkpoint_path, OpinionTrajectory(np.array(history), preferences), rng
+            )
+
+    counts = np.array(history, dtype=np.int64).reshape(len(history), num_choices)
+    trajectory = OpinionTrajectory(counts, preferences, converged)
+    if checkpoint_path:
+        save_checkpoint(checkpoint_path, trajectory, rng)
+    return trajectory
+
+
+def simulate_election(
+    num_electors,
+    num_choices,
+    influence_matrix,
+    num_steps,
+    rng: RNGLike = None,
+    tolerance=None,
+    patience=1,
+):
+    """
+    Final preference counts of simulate_opinion_dynamics with asynchronous
+    updates, as a list; with a tolerance the run stops once converged.
+    """
+    trajectory = simulate_opinion_dynamics(
+        num_electors,
+        num_choices,
+        influence_matrix,
+        num_steps,
+        rng,
+        update="asynchronous",
+        tolerance=tolerance,
+        patience=patience,
+    )
+    return trajectory.counts[-1].tolist()
+
+
+if __name__ == "__main__":
+    # Example usage
+    num_electors = 1000
+    num_choices = 3  # Number of choices (e.g., candidates)
+    influence_matrix = np.array(
+        [
+            [0.1, 0.2, 0.3],  # Probability of changing from choice 0 to others
+            [0.2, 0.1, 0.4],  # Probability of changing from choice 1 to others
+            [0.3, 0.4, 0.1],  # Probability of changing from choice 2 to others
+        ]
+    )
+    num_steps = 10
+
+    preference_counts = simulate_election(
+        num_electors, num_choices, influence_matrix, num_steps
+    )
+
+    print("Final preference counts:", preference_counts)
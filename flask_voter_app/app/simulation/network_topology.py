@@ -0,0 +1,379 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from app.simulation.population_simulation import population_coordinates
+from app.utils.rng import RNGLike, as_generator
+
+# Bump whenever a change to the generators changes the graph built from a
+# given spec and seed, so graphs cached by older code are never loaded
+GRAPH_VERSION = "1"
+
+TOPOLOGIES = ("erdos_renyi", "watts_strogatz", "barabasi_albert", "knn")
+
+# Parameter setting the degree of each topology, and its default
+_DEGREES = {
+    "erdos_renyi": ("mean_degree", 10),
+    "watts_strogatz": ("k", 10),
+    "barabasi_albert": ("m", 5),
+    "knn": ("k", 10),
+}
+
+
+class Graph(NamedTuple):
+    """
+    Undirected interaction graph in CSR form: the neighbours of node i are
+    indices[indptr[i]:indptr[i + 1]], sorted. Both arrays may be memory-maps
+    of a cached graph.
+    """
+
+    indptr: np.ndarray
+    indices: np.ndarray
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.indices) // 2
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def sample_neighbours(self, nodes, rng: RNGLike = None) -> np.ndarray:
+        """
+        One uniformly drawn neighbour per node; isolated nodes get themselves.
+        :param nodes: Array of node indices, repeats allowed
+        :param rng: Seed or numpy Generator
+        :return: Array of neighbours, aligned with nodes
+        """
+        rng = as_generator(rng)
+        nodes = np.asarray(nodes)
+        starts = self.indptr[nodes]
+        degrees = self.indptr[nodes + 1] - starts
+        if not len(self.indices):
+            return nodes.copy()
+        offsets = (rng.random(len(nodes)) * degrees).astype(np.int64)
+        # An isolated node's start may be past the last entry
+        positions = np.minimum(starts + offsets, len(self.indices) - 1)
+        return np.where(
+            degrees > 0, self.indices[positions].astype(nodes.dtype), nodes
+        )
+
+
+def from_edges(num_nodes: int, sources, targets) -> Graph:
+    """
+    CSR graph of an edge list, made undirected, without self-loops or
+    duplicate edges.
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    keep = sources != targets
+    sources, targets = sources[keep], targets[keep]
+    # Both directions of every edge, deduplicated by sorting u * n + v
+    keys = np.concatenate(
+        [sources * num_nodes + targets, targets * num_nodes + sources]
+    )
+    # Sort and mask rather than np.unique, which is much slower at this size
+    keys.sort()
+    keys = keys[np.diff(keys, prepend=-1) != 0]
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // num_nodes, minlength=num_nodes), out=indptr[1:])
+    index_dtype = np.int32 if num_nodes < 2**31 else np.int64
+    return Graph(indptr, (keys % num_nodes).astype(index_dtype))
+
+
+def erdos_renyi(num_nodes: int, mean_degree: float, rng: RNGLike = None) -> Graph:
+    """
+    Sparse Erdős–Rényi graph G(n, p) with p = mean_degree / (n - 1).
+    The number of edges is drawn from its binomial distribution and the
+    edges are sampled as random pairs, which for sparse graphs only rarely
+    collide (collisions are dropped).
+    """
+    rng = as_generator(rng)
+    if num_nodes < 2:
+        return from_edges(num_nodes, [], [])
+    p = min(mean_degree / (num_nodes - 1), 1.0)
+    num_edges = rng.binomial(num_nodes * (num_nodes - 1) // 2, p)
+    sources = rng.integers(0, num_nodes, num_edges)
+    targets = rng.integers(0, num_nodes, num_edges)
+    return from_edges(num_nodes, sources, targets)
+
+
+def watts_strogatz(
+    num_nodes: int, k: int, beta: float, rng: RNGLike = None
+) -> Graph:
+    """
+    Watts–Strogatz small world: a ring where each node is linked to its k
+    nearest nodes (k // 2 on each side), each link being rewired to a random
+    node with probability beta.
+    """
+    rng = as_generator(rng)
+    half = max(k // 2, 1)
+    sources = np.repeat(np.arange(num_nodes, dtype=np.int64), half)
+    targets = (sources + np.tile(np.arange(1, half + 1), num_nodes)) % num_nodes
+    rewire = rng.random(len(targets)) < beta
+    targets[rewire] = rng.integers(0, num_nodes, int(rewire.sum()))
+    return from_edges(num_nodes, sources, targets)
+
+
+def barabasi_albert(num_nodes: int, m: int, rng: RNGLike = None) -> Graph:
+    """
+    Barabási–Albert preferential attachment with m links per new node, using
+    Batagelj and Brandes' edge-list algorithm: the target of edge e copies the
+    endpoint at a random earlier position of the edge list. All positions are
+    drawn at once and resolved by following the copies back to a source,
+    which takes O(log n) vectorised passes.
+    """
+    rng = as_generator(rng)
+    m = max(int(m), 1)
+    edges = np.arange(num_nodes * m, dtype=np.int64)
+    # Edge e writes its source at position 2e and its target at 2e + 1,
+    # copied from a position drawn in [0, 2e]
+    draws = (rng.random(len(edges)) * (2 * edges + 1)).astype(np.int64)
+    positions = draws.copy()
+    pending = np.flatnonzero(positions & 1)
+    while len(pending):
+        positions[pending] = draws[positions[pending] >> 1]
+        pending = pending[(positions[pending] & 1) == 1]
+    return from_edges(num_nodes, edges // m, (positions >> 1) // m)
+
+
+def knn_graph(coordinates, k: int) -> Graph:
+    """
+    Spatial k-nearest-neighbour graph, made undirected.
+    :param coordinates: (n x d) array, or a list of {'x': ..., 'y': ...} as
+                        given by simulate_population
+    :param k: Neighbours per node
+    """
+    if len(coordinates) and isinstance(coordinates[0], dict):
+        coordinates = [(point["x"], point["y"]) for point in coordinates]
+    points = np.asarray(coordinates, dtype=np.float64)
+    num_nodes = len(points)
+    k = min(int(k), num_nodes - 1)
+    if k < 1:
+        return from_edges(num_nodes, [], [])
+    # The closest point is normally the node itself, dropped as a self-loop
+    _, neighbours = cKDTree(points).query(points, k=k + 1, workers=-1)
+    sources = np.repeat(np.arange(num_nodes, dtype=np.int64), k + 1)
+    return from_edges(num_nodes, sources, neighbours.ravel())
+
+
+def build_graph(
+    spec: dict,
+    num_nodes: int,
+    rng: RNGLike = None,
+    max_degree: Optional[float] = None,
+    max_edges: Optional[int] = None,
+) -> Graph:
+    """
+    Graph described by a request payload.
+    :param spec: {'type': one of TOPOLOGIES, and its parameters:
+                 'mean_degree' (erdos_renyi), 'k' and 'beta'
+                 (watts_strogatz), 'm' (barabasi_albert), 'k' and
+                 'avg_age' (knn, over population_coordinates)}
+    :param num_nodes: Number of nodes
+    :param rng: Seed or numpy Generator
+    :param max_degree: Largest mean_degree, k or m accepted, if any
+    :param max_edges: Largest num_nodes * degree accepted, if any, bounding
+                      the memory taken to generate the graph
+    :raises ValueError: For an unknown type or invalid parameters
+    """
+    rng = as_generator(rng)
+    kind = spec.get("type")
+    degree = _degree(spec, num_nodes, max_degree, max_edges)
+    if kind == "erdos_renyi":
+        return erdos_renyi(num_nodes, degree, rng)
+    if kind == "watts_strogatz":
+        beta = _number(spec, "beta", 0.1)
+        if beta > 1:
+            raise ValueError("beta must be a probability in [0, 1]")
+        return watts_strogatz(num_nodes, int(degree), beta, rng)
+    if kind == "barabasi_albert":
+        return barabasi_albert(num_nodes, int(degree), rng)
+    avg_age = _number(spec, "avg_age", 45)
+    return knn_graph(population_coordinates(num_nodes, avg_age, rng), int(degree))
+
+
+def _degree(
+    spec: dict,
+    num_nodes: int,
+    max_degree: Optional[float],
+    max_edges: Optional[int],
+) -> float:
+    """Degree parameter of spec, checked against the limits of build_graph."""
+    kind = spec.get("type")
+    if kind not in _DEGREES:
+        raise ValueError(f"network type must be one of: {', '.join(TOPOLOGIES)}")
+    name, default = _DEGREES[kind]
+    degree = _number(spec, name, default)
+    if max_degree is not None and degree > max_degree:
+        raise ValueError(f"network {name} must be at most {max_degree}")
+    if max_edges is not None and num_nodes * degree > max_edges:
+        raise ValueError(
+            f"network too large: the number of nodes times {name} "
+            f"must be at most {max_edges}"
+        )
+    return degree
+
+
+def _number(spec: dict, name: str, default) -> float:
+    value = spec.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ValueError(f"network {name} must be a non-negative number")
+    return value
+
+
+def save_graph(graph: Graph, path: str):
+    """
+    Write a graph to an uncompressed .npz, atomically, so that load_graph
+    can memory-map it.
+    """
+    with atomic_npz(path) as file:
+        np.savez(file, indptr=graph.indptr, indices=graph.indices)
+
+
+@contextmanager
+def atomic_npz(path: str):
+    """
+    Binary file to write an .npz to, moved to path once written. Its
+    temporary name is unique, so concurrent writers of the same path, in any
+    thread or process, never write to the same file; on error it is removed.
+    """
+    directory = os.path.dirname(path) or "."
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp.npz")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            yield file
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.remove(temporary)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def load_graph(path: str, mmap: bool = True) -> Graph:
+    """
+    Read a graph written by save_graph.
+    :param mmap: Memory-map the arrays instead of reading them, so that only
+                 the pages a simulation touches are loaded
+    """
+    if not mmap:
+        with np.load(path) as arrays:
+            return Graph(arrays["indptr"], arrays["indices"])
+    return Graph(**_mmap_npz(path))
+
+
+def _mmap_npz(path: str) -> dict:
+    # np.load ignores mmap_mode for .npz files, but the members of an
+    # uncompressed archive are plain .npy files at known offsets
+    arrays = {}
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as file:
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path} is compressed and cannot be mapped")
+            file.seek(info.header_offset)
+            name_length, extra_length = struct.unpack("<26xHH", file.read(30))
+            file.seek(name_length + extra_length, os.SEEK_CUR)
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                header = np.lib.format.read_array_header_1_0(file)
+            else:
+                header = np.lib.format.read_array_header_2_0(file)
+            shape, fortran_order, dtype = header
+            arrays[info.filename[: -len(".npy")]] = np.memmap(
+                path,
+                dtype=dtype,
+                mode="r",
+                shape=shape,
+                offset=file.tell(),
+                order="F" if fortran_order else "C",
+            )
+    return arrays
+
+
+def graph_key(spec: dict, num_nodes: int, seed: int) -> str:
+    """File name of a generated graph in the cache."""
+    payload = json.dumps(
+        {"spec": spec, "num_nodes": num_nodes, "seed": seed},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    digest = hashlib.sha256(f"{GRAPH_VERSION}\0{payload}".encode("utf-8"))
+    return f"{spec.get('type')}-{digest.hexdigest()[:32]}.npz"
+
+
+def _graph_bytes(graph: Graph) -> int:
+    return graph.indptr.nbytes + graph.indices.nbytes
+
+
+def _evict(cache_dir: str, max_bytes: int):
+    """Delete the least recently used graphs until cache_dir fits max_bytes."""
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(".npz") and ".tmp." not in entry.name:
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            # Processes that mapped the file keep their mapping
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def cached_graph(
+    spec: dict,
+    num_nodes: int,
+    seed: Optional[int],
+    cache_dir: Optional[str],
+    max_bytes: int = 0,
+    max_degree: Optional[float] = None,
+    max_edges: Optional[int] = None,
+) -> Graph:
+    """
+    build_graph, with seeded graphs cached as .npz files in cache_dir and
+    memory-mapped, so repeated runs on a large network skip generating it.
+    The cache holds at most max_bytes of graphs, evicting the least recently
+    used ones; a graph larger than that on its own is not cached. Unseeded
+    graphs, or any graph when cache_dir is None or max_bytes is 0, are not
+    cached. max_degree and max_edges are checked as by build_graph, before
+    the cache is looked up.
+    """
+    # A child of the seed, so a graph and a simulation given the same seed
+    # still draw from independent streams
+    rng = None if seed is None else np.random.SeedSequence(seed).spawn(1)[0]
+    limits = {"max_degree": max_degree, "max_edges": max_edges}
+    if seed is None or not cache_dir or max_bytes <= 0:
+        return build_graph(spec, num_nodes, rng, **limits)
+    # Cached graphs were checked when built, but the limits may have changed
+    _degree(spec, num_nodes, max_degree, max_edges)
+    path = os.path.join(cache_dir, graph_key(spec, num_nodes, seed))
+    try:
+        # Hits refresh the modification time eviction goes by
+        os.utime(path)
+    except FileNotFoundError:
+        graph = build_graph(spec, num_nodes, rng, **limits)
+        if _graph_bytes(graph) > max_bytes:
+            return graph
+        os.makedirs(cache_dir, exist_ok=True)
+        save_graph(graph, path)
+        _evict(cache_dir, max_bytes)
+        if not os.path.exists(path):
+            return graph
+    return load_graph(path)
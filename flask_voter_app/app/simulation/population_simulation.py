@@ -1,6 +1,9 @@
 import numpy as np
+from scipy.spatial import cKDTree
 from scipy.stats import truncnorm
 
+from app.utils.rng import RNGLike, as_generator
+
 ######################################################################
 #
 # Simulation d'une population sur une grille de repartition politique
@@ -8,7 +11,7 @@ from scipy.stats import truncnorm
 ######################################################################
 
 
-def repartition_votants(age_moyen, nb_voters):
+def repartition_votants(age_moyen, nb_voters, rng: RNGLike = None):
     # Paramètres pour la distribution tronquée
     age_min = 18
     age_max = 85
@@ -19,15 +22,24 @@ def repartition_votants(age_moyen, nb_voters):
     b = (age_max - age_moyen) / std_dev
 
     # Générer des âges aléatoires selon une distribution normale tronquée
-    ages = truncnorm.rvs(a, b, loc=age_moyen, scale=std_dev, size=nb_voters)
+    ages = truncnorm.rvs(
+        a,
+        b,
+        loc=age_moyen,
+        scale=std_dev,
+        size=nb_voters,
+        random_state=as_generator(rng),
+    )
 
     return ages
 
 
-def generate_coordinates(age):
+def generate_coordinates(age, rng: RNGLike = None):
     if age < 18 or age > 85:
         raise ValueError("L'âge doit être compris entre 18 et 85 ans.")
 
+    rng = as_generator(rng)
+
     # Normaliser l'âge pour qu'il soit compris entre 0 et 1
     normalized_age = (age - 18) / (85 - 18)
 
@@ -35,12 +47,12 @@ def generate_coordinates(age):
 
     # Générer des coordonnées x et y en fonction de l'âge normalisé
     # Plus l'âge est grand, plus les coordonnées sont positives
-    x = np.random.normal(mean, 1)
-    y = np.random.normal(mean, 1)
+    x = rng.normal(mean, 1)
+    y = rng.normal(mean, 1)
 
     # Ajouter un léger bruit aléatoire pour varier les coordonnées
-    x += np.random.uniform(-0.5, 0.5)
-    y += np.random.uniform(-0.5, 0.5)
+    x += rng.uniform(-0.5, 0.5)
+    y += rng.uniform(-0.5, 0.5)
 
     # S'assurer que les coordonnées restent dans la plage [-5, 5]
     x = max(-5, min(5, x))
@@ -49,31 +61,85 @@ def generate_coordinates(age):
     return {"x": x, "y": y}
 
 
-def simulate_population(nb_voters, avg_age):
+def simulate_population(nb_voters, avg_age, rng: RNGLike = None):
+    rng = as_generator(rng)
     coord = []
-    for age in repartition_votants(avg_age, nb_voters):
-        coord += [generate_coordinates(age)]
+    for age in repartition_votants(avg_age, nb_voters, rng):
+        coord += [generate_coordinates(age, rng)]
 
     return coord
 
 
-def generate_coord_candidates(nb_candidates):
-    x_coords = np.random.uniform(-5, 5, nb_candidates)
-    y_coords = np.random.uniform(-5, 5, nb_candidates)
+def population_coordinates(nb_voters, avg_age, rng: RNGLike = None):
+    """
+    Version vectorisée de simulate_population : mêmes distributions, tirées
+    en bloc, sous forme d'un tableau (nb_voters x 2) de coordonnées x, y.
+    """
+    rng = as_generator(rng)
+    ages = repartition_votants(avg_age, nb_voters, rng)
+    mean = -4 + 8 * (ages - 18) / (85 - 18)
+    coords = rng.normal(mean[:, None], 1, (nb_voters, 2))
+    coords += rng.uniform(-0.5, 0.5, (nb_voters, 2))
+    return np.clip(coords, -5, 5)
 
-    return list(zip(x_coords, y_coords))
 
+def generate_coord_candidates(nb_candidates, rng: RNGLike = None):
+    rng = as_generator(rng)
+    x_coords = rng.uniform(-5, 5, nb_candidates)
+    y_coords = rng.uniform(-5, 5, nb_candidates)
+
+    return list(zip(x_coords, y_coords))
 
-def assign_voters_to_candidates(voters, candidates):
-    assignements = []
-    for voter in voters:
-        distances = [
-            np.linalg.norm(np.array(voter) - np.array(candidate))
-            for candidate in candidates
-        ]
 
-        closest_candidate_index = np.argmin(distances)
+# Below this many candidates, distances to every candidate by broadcasting
+# beat building and querying a KD-tree
+KDTREE_MIN_CANDIDATES = 32
+
+# Voters per block of the broadcast distances, bounding their memory
+_BLOCK_SIZE = 65536
+
+
+def nearest_candidates(voters, candidates, k=1):
+    """
+    Les k candidats les plus proches de chaque votant et leurs distances.
+    :param voters: Coordonnées des votants (n x d)
+    :param candidates: Coordonnées des candidats (c x d)
+    :param k: Nombre de candidats par votant (au plus c)
+    :return: Indices (n x k) des candidats, du plus proche au plus lointain,
+             et distances (n x k) correspondantes ; ordre de tri d'un
+             classement spatial
+    """
+    voters = np.asarray(voters, dtype=np.float64)
+    candidates = np.asarray(candidates, dtype=np.float64)
+    if not len(candidates):
+        raise ValueError("Il faut au moins un candidat.")
+    k = min(int(k), len(candidates))
+    if k < 1:
+        raise ValueError("k doit être un entier positif.")
+    candidates = candidates.reshape(len(candidates), -1)
+    voters = voters.reshape(len(voters), candidates.shape[1])
+
+    if len(candidates) >= KDTREE_MIN_CANDIDATES:
+        distances, indices = cKDTree(candidates).query(voters, k=k, workers=-1)
+        return indices.reshape(len(voters), k), distances.reshape(len(voters), k)
+
+    indices = np.empty((len(voters), k), dtype=np.intp)
+    distances = np.empty((len(voters), k))
+    for start in range(0, len(voters), _BLOCK_SIZE):
+        block = voters[start : start + _BLOCK_SIZE]
+        pairwise = np.sqrt(
+            ((block[:, None, :] - candidates[None, :, :]) ** 2).sum(axis=2)
+        )
+        # Tri stable : à égalité, le candidat de plus petit indice d'abord
+        order = np.argsort(pairwise, axis=1, kind="stable")[:, :k]
+        indices[start : start + len(block)] = order
+        distances[start : start + len(block)] = np.take_along_axis(
+            pairwise, order, axis=1
+        )
+    return indices, distances
 
-        assignements.append(closest_candidate_index)
 
-    return assignements
+def assign_voters_to_candidates(voters, candidates):
+    """Indice du candidat le plus proche de chaque votant."""
+    indices, _ = nearest_candidates(voters, candidates)
+    return indices[:, 0].tolist()
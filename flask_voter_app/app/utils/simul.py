@@ -1,80 +1,270 @@
-import random
+import json
 from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.utils.rng import as_generator
+
+# Demographic attributes drawn for every voter, in voter dict order
+DEMOGRAPHIC_ATTRIBUTES = (
+    "age",
+    "gender",
+    "location",
+    "education",
+    "income",
+    "ideology",
+)
+
+
+class VoterColumns(NamedTuple):
+    """
+    A simulated population as integer-coded columns.
+    codes[attribute][i] indexes categories[attribute] for voter i.
+    """
+
+    categories: Dict[str, List[str]]
+    codes: Dict[str, np.ndarray]
+    turnout: np.ndarray
+
+    @property
+    def size(self) -> int:
+        return len(self.turnout)
+
+    def turned_out(self) -> "VoterColumns":
+        """Columns of the voters who turn out."""
+        return VoterColumns(
+            self.categories,
+            {attribute: codes[self.turnout] for attribute, codes in self.codes.items()},
+            self.turnout[self.turnout],
+        )
 
+    def labels(self, attribute: str) -> list:
+        """Category names of one attribute, one per voter."""
+        categories = np.array(self.categories[attribute], dtype=object)
+        return categories[self.codes[attribute]].tolist()
 
-def init(population_size, demographics, turnout_rate):
-    voters = []
-    for voter_id in range(population_size):
-        # Assign demographics
-        age = random.choices(
-            list(demographics["age"].keys()), weights=demographics["age"].values()
-        )[0]
-        gender = random.choices(
-            list(demographics["gender"].keys()), weights=demographics["gender"].values()
-        )[0]
-        location = random.choices(
-            list(demographics["location"].keys()),
-            weights=demographics["location"].values(),
-        )[0]
-        education = random.choices(
-            list(demographics["education"].keys()),
-            weights=demographics["education"].values(),
-        )[0]
-        income = random.choices(
-            list(demographics["income"].keys()), weights=demographics["income"].values()
-        )[0]
-        ideology = random.choices(
-            list(demographics["ideology"].keys()),
-            weights=demographics["ideology"].values(),
-        )[0]
-
-        # Determine if the voter turns out
-        turnout = random.random() < turnout_rate
-
-        voters.append(
-            {
-                "id": voter_id,
-                "age": age,
-                "gender": gender,
-                "location": location,
-                "education": education,
-                "income": income,
-                "ideology": ideology,
-                "turnout": turnout,
-            }
-        )
+    def to_dicts(self) -> list:
+        """Voter dictionaries with 'id', the demographics and 'turnout'."""
+        keys = ("id", *self.codes, "turnout")
+        columns = [self.labels(attribute) for attribute in self.codes]
+        rows = zip(range(self.size), *columns, self.turnout.tolist())
+        return [dict(zip(keys, row)) for row in rows]
 
-    return voters
 
+def _draw_codes(weights, size, rng):
+    """Draw size indices into weights, with the given (unnormalised) weights."""
+    weights = np.asarray(list(weights), dtype=np.float64)
+    return rng.choice(len(weights), size=size, p=weights / weights.sum())
 
-def simulate_voters(
-    population_size, candidates, demographics, influence_weights, turnout_rate
+
+def init_columns(
+    population_size,
+    demographics,
+    turnout_rate,
+    rng=None,
+    attributes=DEMOGRAPHIC_ATTRIBUTES,
 ):
+    """
+    Draw a population: one bulk categorical draw per demographic attribute,
+    then the turnout of every voter.
+    :param demographics: {attribute: {category: weight}} for every attribute
+    :param rng: Seed or numpy Generator used for every draw
+    :param attributes: Attributes to draw, in order
+    :return: VoterColumns
+    """
+    rng = as_generator(rng)
+    categories = {
+        attribute: list(demographics[attribute].keys()) for attribute in attributes
+    }
+    codes = {
+        attribute: _draw_codes(demographics[attribute].values(), population_size, rng)
+        for attribute in attributes
+    }
+    turnout = rng.random(population_size) < turnout_rate
+    return VoterColumns(categories, codes, turnout)
+
+
+def init(population_size, demographics, turnout_rate, rng=None):
+    return init_columns(population_size, demographics, turnout_rate, rng).to_dicts()
+
+
+class InfluenceModel(NamedTuple):
+    """
+    influence_weights compiled against the categories of a population and
+    the options voters choose from.
+
+    Only attributes with weights matter, and voters sharing the categories
+    of all of them share a score vector, so scores are computed once per
+    combination of categories: products[k] for the voters whose
+    combination_codes are k. With more than MAX_COMBINATIONS combinations,
+    products is None and scores are computed per voter from tables.
+    """
+
+    num_options: int
+    attributes: Tuple[str, ...]
+    tables: Tuple[np.ndarray, ...]
+    strides: Tuple[int, ...]
+    products: Optional[np.ndarray]
+
+    def combination_codes(self, columns: VoterColumns) -> np.ndarray:
+        """Index into products of every voter."""
+        combined = np.zeros(columns.size, dtype=np.int64)
+        for attribute, stride in zip(self.attributes, self.strides):
+            combined += columns.codes[attribute] * stride
+        return combined
+
+    def rows(self, columns: VoterColumns):
+        """
+        Score vectors of a population as a table and a row per voter, so that
+        table[index] is the (voters x options) score matrix.
+        """
+        if self.products is not None:
+            return self.products, self.combination_codes(columns)
+        products = _multiply(
+            np.ones((columns.size, self.num_options)),
+            self.tables,
+            [columns.codes[attribute] for attribute in self.attributes],
+        )
+        return products, np.arange(columns.size)
 
-    voters = init(population_size, demographics, turnout_rate)
 
-    # Assign preferences, including "No Vote"
-    for voter in voters:
-        if not voter["turnout"]:
-            voter["preference"] = "No Vote"
-            continue
+# Above this many category combinations scores are computed per voter
+MAX_COMBINATIONS = 1 << 16
 
-        scores = {candidate: 1.0 for candidate in candidates}
-        scores["No Vote"] = 1.0  # Base score for abstention
 
-        # Apply influence weights
-        for param, value in voter.items():
-            if param in influence_weights and value in influence_weights[param]:
-                for candidate, weight in influence_weights[param][value].items():
-                    if candidate in scores:
-                        scores[candidate] *= weight
+def _multiply(products, tables, codes):
+    # Same multiplication order, attribute by attribute, as the original
+    # per-voter loops, so scores are bit for bit the same
+    for table, attribute_codes in zip(tables, codes):
+        products *= table[attribute_codes]
+    return products
 
-        # Normalize scores to probabilities
-        total = sum(scores.values())
-        probabilities = [scores[candidate] / total for candidate in scores.keys()]
-        voter["preference"] = random.choices(
-            list(scores.keys()), weights=probabilities, k=1
-        )[0]
+
+@lru_cache(maxsize=128)
+def _compile_influence(key: str) -> InfluenceModel:
+    influence_weights, categories, options = json.loads(key)
+    attributes, tables = [], []
+    for attribute, attribute_categories in categories:
+        weights = influence_weights.get(attribute)
+        if not weights:
+            continue
+        # (categories x options) multiplier table for this attribute
+        tables.append(
+            np.array(
+                [
+                    [weights.get(category, {}).get(option, 1.0) for option in options]
+                    for category in attribute_categories
+                ],
+                dtype=np.float64,
+            ).reshape(len(attribute_categories), len(options))
+        )
+        attributes.append(attribute)
+
+    sizes = [len(table) for table in tables]
+    strides = [int(np.prod(sizes[i + 1:], dtype=np.int64)) for i in range(len(sizes))]
+    products = None
+    if np.prod(sizes, dtype=np.float64) <= MAX_COMBINATIONS:
+        count = int(np.prod(sizes, dtype=np.int64))
+        combinations = np.indices(sizes).reshape(len(sizes), count)
+        products = _multiply(np.ones((count, len(options))), tables, combinations)
+        products.flags.writeable = False
+    return InfluenceModel(
+        len(options), tuple(attributes), tuple(tables), tuple(strides), products
+    )
+
+
+def compile_influence(
+    influence_weights, columns: VoterColumns, options
+) -> InfluenceModel:
+    """
+    Compile influence_weights for a population's categories and options,
+    cached per distinct payload so every chunk and simulation of a request
+    reuses it.
+    """
+    key = json.dumps(
+        [
+            influence_weights or {},
+            [[attribute, columns.categories[attribute]] for attribute in columns.codes],
+            list(options),
+        ],
+        sort_keys=True,
+    )
+    return _compile_influence(key)
+
+
+def _preferences(columns, candidates, influence_weights, rng):
+    """
+    Preference of every turned-out voter, drawn with probability
+    proportional to its influence score, "No Vote" included.
+    :return: The options and one option index per turned-out voter
+    """
+    draws = rng.random(columns.size)
+    options = list(dict.fromkeys([*candidates, "No Vote"]))
+    voting = columns.turned_out()
+    table, index = compile_influence(influence_weights, voting, options).rows(voting)
+    cumulative = np.cumsum(table, axis=1)[index]
+    # Inverse CDF over all but the last option, which takes the remainder
+    targets = draws[columns.turnout, None] * cumulative[:, -1:]
+    return options, np.count_nonzero(cumulative[:, :-1] <= targets, axis=1)
+
+
+def _rankings(columns, candidates, influence_weights):
+    """
+    Candidates of every turned-out voter sorted by influence score, highest
+    first, ties in candidate order.
+    :return: The candidates and a (turned-out voters x candidates) index array
+    """
+    options = list(dict.fromkeys(candidates))
+    voting = columns.turned_out()
+    table, index = compile_influence(influence_weights, voting, options).rows(voting)
+    return options, np.argsort(-table, axis=1, kind="stable")[index]
+
+
+def _scores(columns, candidates, influence_weights):
+    """
+    Influence scores of every turned-out voter normalised to 0-5, the
+    midpoint when every score is equal.
+    :return: The candidates and a (turned-out voters x candidates) array
+    """
+    options = list(dict.fromkeys(candidates))
+    voting = columns.turned_out()
+    raw_scores, index = compile_influence(influence_weights, voting, options).rows(
+        voting
+    )
+    max_raw = raw_scores.max(axis=1, keepdims=True, initial=-np.inf)
+    min_raw = raw_scores.min(axis=1, keepdims=True, initial=np.inf)
+    spread = max_raw - min_raw
+    scores = np.divide(
+        5 * (raw_scores - min_raw),
+        spread,
+        out=np.full(raw_scores.shape, 2.5),
+        where=spread != 0,
+    )
+    return options, np.clip(scores, 0, 5)[index]
+
+
+def _per_voter(turnout, values, absent):
+    """values for turned-out voters, absent() for the others."""
+    values = iter(values)
+    return [next(values) if voted else absent() for voted in turnout.tolist()]
+
+
+def simulate_voters(
+    population_size, candidates, demographics, influence_weights, turnout_rate, rng=None
+):
+    rng = as_generator(rng)
+    columns = init_columns(population_size, demographics, turnout_rate, rng)
+    options, choices = _preferences(columns, candidates, influence_weights, rng)
+
+    # Assign preferences, "No Vote" for those who do not turn out
+    labels = np.array(options, dtype=object)[choices].tolist()
+    voters = columns.to_dicts()
+    for voter, preference in zip(
+        voters, _per_voter(columns.turnout, labels, lambda: "No Vote")
+    ):
+        voter["preference"] = preference
 
     # Collect votes (including "No Vote" for those who turned out but abstained)
     votes = [voter["preference"] for voter in voters]
@@ -88,130 +278,113 @@ def simulate_voters(
 
 
 def simulate_ranked_voters(
-    population_size, candidates, demographics, influence_weights, turnout_rate
+    population_size, candidates, demographics, influence_weights, turnout_rate, rng=None
 ):
-    voters = voters = init(population_size, demographics, turnout_rate)
-
-    # Assign ranked preferences
-    for voter in voters:
-        if not voter["turnout"]:
-            voter["ranking"] = []  # No ranking if they don't turn out
-            continue
+    columns = init_columns(population_size, demographics, turnout_rate, rng)
+    options, choices = _rankings(columns, candidates, influence_weights)
 
-        scores = {candidate: 1.0 for candidate in candidates}
-
-        # Apply influence weights
-        for param, value in voter.items():
-            if param in influence_weights and value in influence_weights[param]:
-                for candidate, weight in influence_weights[param][value].items():
-                    if candidate in scores:
-                        scores[candidate] *= weight
-
-        # Sort candidates by score to create ranking (highest score first)
-        voter["ranking"] = sorted(scores.keys(), key=lambda x: -scores[x])
-
-    # Collect rankings
-    rankings = [voter["ranking"] for voter in voters if voter["turnout"]]
+    # Assign ranked preferences, none for those who do not turn out
+    rankings = np.array(options, dtype=object)[choices].tolist()
+    voters = columns.to_dicts()
+    for voter, ranking in zip(voters, _per_voter(columns.turnout, rankings, list)):
+        voter["ranking"] = ranking
 
     # Tally first choices (for demonstration)
-    first_choices = [ranking[0] for ranking in rankings if ranking]
     tally = defaultdict(int)
-    for choice in first_choices:
-        tally[choice] += 1
+    for ranking in rankings:
+        if ranking:
+            tally[ranking[0]] += 1
 
     return voters, rankings, tally
 
 
 def simulate_score_voters(
-    population_size, candidates, demographics, influence_weights, turnout_rate
+    population_size, candidates, demographics, influence_weights, turnout_rate, rng=None
 ):
-    voters = []
-    for voter_id in range(population_size):
-        # Assign demographics
-        age = random.choices(
-            list(demographics["age"].keys()), weights=demographics["age"].values()
-        )[0]
-        gender = random.choices(
-            list(demographics["gender"].keys()), weights=demographics["gender"].values()
-        )[0]
-        location = random.choices(
-            list(demographics["location"].keys()),
-            weights=demographics["location"].values(),
-        )[0]
-        education = random.choices(
-            list(demographics["education"].keys()),
-            weights=demographics["education"].values(),
-        )[0]
-        income = random.choices(
-            list(demographics["income"].keys()), weights=demographics["income"].values()
-        )[0]
-        ideology = random.choices(
-            list(demographics["ideology"].keys()),
-            weights=demographics["ideology"].values(),
-        )[0]
-
-        # Determine if the voter turns out
-        turnout = random.random() < turnout_rate
-
-        voters.append(
-            {
-                "id": voter_id,
-                "age": age,
-                "gender": gender,
-                "location": location,
-                "education": education,
-                "income": income,
-                "ideology": ideology,
-                "turnout": turnout,
-            }
-        )
-
-    # Assign scores (0-5) to each candidate for each voter
-    for voter in voters:
-        if not voter["turnout"]:
-            voter["scores"] = {
-                candidate: 0 for candidate in candidates
-            }  # No scores if they don't turn out
-            continue
-
-        # Calculate raw similarity scores
-        raw_scores = {candidate: 1.0 for candidate in candidates}
-        for param, value in voter.items():
-            if param in influence_weights and value in influence_weights[param]:
-                for candidate, weight in influence_weights[param][value].items():
-                    if candidate in raw_scores:
-                        raw_scores[candidate] *= weight
-
-        # Normalize raw scores to 0-5 range
-        max_raw = max(raw_scores.values())
-        min_raw = min(raw_scores.values())
-        # Avoid division by zero and ensure range
-        if max_raw != min_raw:
-            for candidate in raw_scores:
-                # Scale to 0-5
-                raw_scores[candidate] = (
-                    5 * (raw_scores[candidate] - min_raw) / (max_raw - min_raw)
-                )
-        else:
-            for candidate in raw_scores:
-                raw_scores[candidate] = (
-                    2.5  # Default to midpoint if all scores are equal
-                )
-
-        # Clamp to 0-5
-        voter["scores"] = {
-            candidate: min(5, max(0, raw_scores[candidate])) for candidate in candidates
-        }
-
-    # Collect scores
-    all_scores = [voter["scores"] for voter in voters if voter["turnout"]]
+    columns = init_columns(population_size, demographics, turnout_rate, rng)
+    options, scores = _scores(columns, candidates, influence_weights)
+
+    # Scores (0-5) for each candidate; min/max keep exact 0 and 5 as ints
+    all_scores = [
+        {candidate: min(5, max(0, score)) for candidate, score in zip(options, row)}
+        for row in scores.tolist()
+    ]
+    voters = columns.to_dicts()
+    for voter, voter_scores in zip(
+        voters,
+        _per_voter(
+            columns.turnout, all_scores, lambda: {c: 0 for c in candidates}
+        ),
+    ):
+        voter["scores"] = voter_scores
 
     # Calculate average score per candidate
     avg_scores = defaultdict(float)
-    for scores in all_scores:
-        for candidate, score in scores.items():
+    for voter_scores in all_scores:
+        for candidate, score in voter_scores.items():
             avg_scores[candidate] += score
     for candidate in avg_scores:
         avg_scores[candidate] /= len(all_scores)
 
     return voters, all_scores, avg_scores
+
+
+def simulate_vote_tally(
+    population_size, candidates, demographics, influence_weights, turnout_rate, rng=None
+):
+    """
+    Tally of simulate_voters without building any voter: the same draws from
+    the same rng give the same tally.
+    :return: {preference: count}, "No Vote" included
+    """
+    rng = as_generator(rng)
+    columns = init_columns(population_size, demographics, turnout_rate, rng)
+    options, choices = _preferences(columns, candidates, influence_weights, rng)
+
+    counts = np.bincount(choices, minlength=len(options))
+    counts[options.index("No Vote")] += population_size - len(choices)
+    return {option: int(count) for option, count in zip(options, counts) if count}
+
+
+def simulate_ranked_choices(
+    population_size, candidates, demographics, influence_weights, turnout_rate, rng=None
+):
+    """
+    Ballots of simulate_ranked_voters without building any voter.
+    :return: (turned-out voters x candidates) array of candidate indices,
+             best first, and the first-choice tally
+    """
+    columns = init_columns(population_size, demographics, turnout_rate, rng)
+    options, choices = _rankings(columns, candidates, influence_weights)
+
+    tally = {}
+    if options:
+        counts = np.bincount(choices[:, 0], minlength=len(options))
+        tally = {option: int(count) for option, count in zip(options, counts) if count}
+    return choices, tally
+
+
+def simulate_score_values(
+    population_size, candidates, demographics, influence_weights, turnout_rate, rng=None
+):
+    """
+    Ballots of simulate_score_voters without building any voter.
+    :return: (turned-out voters x candidates) float64 array of 0-5 scores
+    """
+    columns = init_columns(population_size, demographics, turnout_rate, rng)
+    return _scores(columns, candidates, influence_weights)[1]
+
+
+def simulate_score_matrix(
+    population_size, candidates, demographics, influence_weights, turnout_rate, rng=None
+):
+    """
+    Array-backed counterpart of simulate_score_voters for batch experiments,
+    drawing whichever attributes demographics has, in its order.
+    :param rng: Seed or numpy Generator used for every draw
+    :return: (turned-out voters x candidates) float64 array of 0-5 scores
+    """
+    columns = init_columns(
+        population_size, demographics, turnout_rate, rng, attributes=tuple(demographics)
+    )
+    return _scores(columns, candidates, influence_weights)[1]
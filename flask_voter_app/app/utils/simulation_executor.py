@@ -0,0 +1,359 @@
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, List
+
+import numpy as np
+
+from app.utils.rng import (
+    DEFAULT_CHUNK_SIZE,
+    Chunk,
+    RNGLike,
+    as_seed_sequence,
+    chunk_streams,
+)
+from app.utils.simul import (
+    simulate_ranked_choices,
+    simulate_ranked_voters,
+    simulate_score_values,
+    simulate_score_voters,
+    simulate_vote_tally,
+    simulate_voters,
+)
+from app.utils.simulation_ranked_utils import RankedBallots
+from app.utils.simulation_score_utils import ScoreAccumulator, ScoreMatrix
+
+# Simulation branches, in the order their seed streams are spawned
+BRANCHES = ("votes", "ranked", "scores")
+
+# Worker pools shared across requests, one per pool size
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def get_process_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared process pool with the given number of workers."""
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+        return _pools[workers]
+
+
+def _simulation_args(params: dict, chunk: Chunk):
+    return (
+        chunk.stop - chunk.start,
+        params["candidates"],
+        params["demographics"],
+        params["influence_weights"],
+        params["turnout_rate"],
+        np.random.default_rng(chunk.seed),
+    )
+
+
+def _aggregate_only(params: dict) -> bool:
+    """Nothing per voter is returned, so no voter needs to be built."""
+    return params.get("sample_size") == 0 and not params.get("ballots", True)
+
+
+def _simulate_chunk(simulate, params: dict, chunk: Chunk):
+    voters, ballots, tally = simulate(*_simulation_args(params, chunk))
+    # Voter ids continue across chunks
+    for voter in voters:
+        voter["id"] += chunk.start
+    return voters, ballots, tally
+
+
+def _sample(voters: list, params: dict, chunk: Chunk) -> dict:
+    """
+    Voters of a chunk kept for voters_sample, with their sampling keys.
+    Sampling is bottom-k reservoir sampling: each voter gets a uniform key
+    from a stream of its own, and the sample_size smallest keys over all
+    chunks form the sample, so the chunk size does not bias it.
+    """
+    sample_size = params.get("sample_size")
+    if sample_size is None:
+        return {"voters": voters, "keys": None}
+
+    seed = np.random.SeedSequence(
+        chunk.seed.entropy, spawn_key=(*chunk.seed.spawn_key, 0)
+    )
+    keys = np.random.default_rng(seed).random(len(voters))
+    keep = np.sort(np.argsort(keys, kind="stable")[:sample_size])
+    return {"voters": [voters[i] for i in keep], "keys": keys[keep]}
+
+
+def _ballots(voters: list, params: dict, field: str):
+    """Per-voter ballots of the turned-out voters, unless left out."""
+    if not params.get("ballots", True):
+        return None
+    return [
+        {"voter_id": voter["id"], field: voter[field]}
+        for voter in voters
+        if voter["turnout"]
+    ]
+
+
+def _votes_chunk(params: dict, chunk: Chunk) -> dict:
+    if _aggregate_only(params):
+        tally = simulate_vote_tally(*_simulation_args(params, chunk))
+        return {"voters": [], "keys": None, "ballots": None, "tally": tally}
+
+    voters, _, tally = _simulate_chunk(simulate_voters, params, chunk)
+    return dict(
+        _sample(voters, params, chunk),
+        ballots=_ballots(voters, params, "preference"),
+        tally=dict(tally),
+    )
+
+
+def _ranked_chunk(params: dict, chunk: Chunk) -> dict:
+    candidates = params["candidates"]
+    if _aggregate_only(params):
+        choices, tally = simulate_ranked_choices(*_simulation_args(params, chunk))
+        output = {"voters": [], "keys": None, "ballots": None, "tally": tally}
+        ballots = RankedBallots(candidates, choices)
+    else:
+        voters, rankings, tally = _simulate_chunk(
+            simulate_ranked_voters, params, chunk
+        )
+        output = dict(
+            _sample(voters, params, chunk),
+            ballots=_ballots(voters, params, "ranking"),
+            tally=dict(tally),
+        )
+        ballots = RankedBallots.from_rankings(rankings, candidates=candidates)
+
+    ballots = ballots.compress()
+    # Computed here so the work is spread across workers; merged by summing
+    ballots.pairwise_matrix()
+    ballots.position_counts()
+    output["ranked"] = ballots
+    return output
+
+
+def _scores_chunk(params: dict, chunk: Chunk) -> dict:
+    candidates = params["candidates"]
+    if _aggregate_only(params):
+        values = simulate_score_values(*_simulation_args(params, chunk))
+        output = {"voters": [], "keys": None, "ballots": None}
+    else:
+        voters, all_scores, _ = _simulate_chunk(simulate_score_voters, params, chunk)
+        values = np.array(
+            [[scores[c] for c in candidates] for scores in all_scores],
+            dtype=np.float64,
+        ).reshape(len(all_scores), len(candidates))
+        output = dict(
+            _sample(voters, params, chunk),
+            ballots=_ballots(voters, params, "scores"),
+        )
+
+    # Averages are summed at full precision; the methods only need float32,
+    # and only the chunk's mergeable accumulator leaves the worker
+    output["scores"] = ScoreAccumulator(list(candidates), exact_medians=True).ingest(
+        ScoreMatrix(list(candidates), values.astype(np.float32))
+    )
+    output["sums"] = values.sum(axis=0)
+    return output
+
+
+_CHUNK_RUNNERS = {
+    "votes": _votes_chunk,
+    "ranked": _ranked_chunk,
+    "scores": _scores_chunk,
+}
+
+
+def _merge_tallies(tallies: List[dict]) -> dict:
+    merged = defaultdict(int)
+    for tally in tallies:
+        for key, count in tally.items():
+            merged[key] += count
+    return dict(merged)
+
+
+def _merge_sample(parts: List[dict], sample_size) -> list:
+    voters = [voter for part in parts for voter in part["voters"]]
+    if sample_size is None or not voters:
+        return voters
+    keys = np.concatenate([part["keys"] for part in parts])
+    # Smallest keys overall, back in voter order
+    keep = np.sort(np.argsort(keys, kind="stable")[:sample_size])
+    return [voters[i] for i in keep]
+
+
+def _merge_ballots(parts: List[dict]):
+    if any(part["ballots"] is None for part in parts):
+        return None
+    return [ballot for part in parts for ballot in part["ballots"]]
+
+
+def _merge_votes(parts, params):
+    return {
+        "voters": _merge_sample(parts, params.get("sample_size")),
+        "votes": _merge_ballots(parts),
+        "tally": _merge_tallies([part["tally"] for part in parts]),
+    }
+
+
+def _merge_ranked(parts, params):
+    candidates = params["candidates"]
+    if parts:
+        ballots = RankedBallots.merge([part["ranked"] for part in parts])
+    else:
+        ballots = RankedBallots(candidates, np.empty((0, len(candidates))))
+    return {
+        "voters": _merge_sample(parts, params.get("sample_size")),
+        "rankings": _merge_ballots(parts),
+        "first_choice_tally": _merge_tallies([part["tally"] for part in parts]),
+        "ballots": ballots,
+    }
+
+
+def _merge_scores(parts, params):
+    candidates = params["candidates"]
+    accumulator = ScoreAccumulator(list(candidates), exact_medians=True)
+    for part in parts:
+        accumulator.merge(part["scores"])
+    sums = sum((part["sums"] for part in parts), np.zeros(len(candidates)))
+    num_ballots = accumulator.num_ballots
+    avg_scores = (
+        dict(zip(candidates, (sums / num_ballots).tolist())) if num_ballots else {}
+    )
+    return {
+        "voters": _merge_sample(parts, params.get("sample_size")),
+        "all_scores": _merge_ballots(parts),
+        "avg_scores": avg_scores,
+        "accumulator": accumulator,
+    }
+
+
+def _no_progress(done, total):
+    pass
+
+
+class SimulationExecutor:
+    """
+    Runs the vote, ranked and score simulations of simul.py in chunks.
+
+    Each branch gets its own child seed, split by chunk_streams into
+    fixed-size chunks with independent streams. Chunks of every requested
+    branch are submitted together to a shared process pool, so the branches
+    run concurrently, and the per-chunk tallies, compressed ranked ballots
+    (with their pairwise matrices and position counts) and score
+    accumulators are merged in chunk order, so memory for the merged results
+    does not grow with the population. Results depend on the seed and chunk size but
+    not on the number of workers.
+    """
+
+    def __init__(self, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.workers = max(int(workers or 1), 1)
+        self.chunk_size = max(int(chunk_size or DEFAULT_CHUNK_SIZE), 1)
+
+    def _tasks(self, params: dict, branches, seed: RNGLike):
+        branch_seeds = dict(zip(BRANCHES, as_seed_sequence(seed).spawn(len(BRANCHES))))
+        streams = [
+            [
+                (branch, chunk)
+                for chunk in chunk_streams(
+                    branch_seeds[branch], params["population_size"], self.chunk_size
+                )
+            ]
+            for branch in BRANCHES
+            if branch in branches
+        ]
+        # Chunk by chunk, with every branch's copy of a chunk side by side
+        return [task for tasks in zip(*streams) for task in tasks]
+
+    def iter_chunks(self, params: dict, branches, seed: RNGLike = None, progress=None):
+        """
+        Simulate the requested branches chunk by chunk.
+        At most two chunks per worker are in flight, so memory is bounded by
+        the chunk size however large the population.
+        :param params: As for run
+        :param branches: Names from BRANCHES to run
+        :param seed: Seed or numpy Generator for the whole simulation
+        :param progress: Optional callable taking (chunks done, total chunks),
+                         called as chunks are yielded; if it raises, pending
+                         chunks are cancelled and the error propagates
+        :return: An iterator of (branch, Chunk, chunk output) in chunk order
+        """
+        tasks = self._tasks(params, branches, seed)
+        if progress is None:
+            progress = _no_progress
+        progress(0, len(tasks))
+
+        # A population that fits in one chunk per branch is not worth the
+        # pool's pickling and start-up costs
+        single_chunk = params["population_size"] <= self.chunk_size
+        if self.workers == 1 or single_chunk or len(tasks) <= 1:
+            for done, (branch, chunk) in enumerate(tasks, 1):
+                output = _CHUNK_RUNNERS[branch](params, chunk)
+                progress(done, len(tasks))
+                yield branch, chunk, output
+            return
+
+        pool = get_process_pool(self.workers)
+        remaining = iter(tasks)
+        pending = deque()
+
+        def submit(count):
+            for branch, chunk in islice(remaining, count):
+                future = pool.submit(_CHUNK_RUNNERS[branch], params, chunk)
+                pending.append((branch, chunk, future))
+
+        try:
+            submit(2 * self.workers)
+            done = 0
+            while pending:
+                branch, chunk, future = pending.popleft()
+                output = future.result()
+                submit(1)
+                done += 1
+                progress(done, len(tasks))
+                yield branch, chunk, output
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+
+    def run(
+        self, params: dict, branches, seed: RNGLike = None, progress=None
+    ) -> dict:
+        """
+        Simulate the requested branches.
+        :param params: 'population_size', 'candidates', 'demographics',
+                       'influence_weights' and 'turnout_rate' as taken by
+                       the simul.py simulators, and optionally 'sample_size'
+                       (voters to keep, default all) and 'ballots' (whether
+                       to keep per-voter ballots, default True); with a
+                       sample size of 0 and no ballots no voter is built
+        :param branches: Names from BRANCHES to run
+        :param seed: Seed or numpy Generator for the whole simulation
+        :param progress: Optional callable taking (chunks done, total chunks),
+                         see iter_chunks
+        :return: A dictionary per branch, each with the sampled 'voters':
+                 'votes' has 'votes' (per-voter ballots or None) and 'tally';
+                 'ranked' has 'rankings', 'first_choice_tally' and merged
+                 'ballots'; 'scores' has 'all_scores', 'avg_scores' and
+                 'accumulator', a ScoreAccumulator merged from every chunk
+        """
+        parts = defaultdict(list)
+        for branch, _, output in self.iter_chunks(params, branches, seed, progress):
+            parts[branch].append(output)
+
+        results = {}
+        if "votes" in branches:
+            results["votes"] = _merge_votes(parts["votes"], params)
+        if "ranked" in branches:
+            results["ranked"] = _merge_ranked(parts["ranked"], params)
+        if "scores" in branches:
+            results["scores"] = _merge_scores(parts["scores"], params)
+        return results
+
+
+def executor_from_config(config) -> SimulationExecutor:
+    """SimulationExecutor sized by the SIMULATION_* settings of a Flask config."""
+    return SimulationExecutor(
+        workers=config.get("SIMULATION_WORKERS", 1),
+        chunk_size=config.get("SIMULATION_CHUNK_SIZE", DEFAULT_CHUNK_SIZE),
+    )
@@ -1,501 +1,907 @@
-from collections import defaultdict, Counter
-from itertools import combinations, permutations
+import time
+from typing import List, NamedTuple, Optional
 
+import numpy as np
 
-def get_condorcet_winner(votes: list) -> str:
+
+class PairwiseMatrix(NamedTuple):
     """
-    Determine the Condorcet winner from a set of rankings.
-    :param votes: A list of rankings, where each ranking is either:
-                  1. A dictionary with 'ranking' (list of candidate names) and
-                  'voter_id', or
-                  2. A list of candidate names (ranking)
-    :return: The name of the Condorcet winner, or None if there is no
-                  Condorcet winner.
+    Pairwise preference counts for a set of rankings.
+    matrix[i, j] is the number of voters ranking candidates[i] above
+    candidates[j].
     """
-    # Get all unique candidates
-    candidates = set()
 
-    # Determine if votes are dictionaries or lists
-    is_dict_format = isinstance(votes[0], dict) if votes else False
+    candidates: List[str]
+    matrix: np.ndarray
 
-    for vote in votes:
-        if is_dict_format:
-            candidates.update(vote["ranking"])
-        else:
-            candidates.update(vote)
 
-    # Count pairwise wins
-    wins = defaultdict(int)
+class RankedBallots:
+    """
+    Compact integer representation of a set of rankings.
 
-    for candidate_1, candidate_2 in combinations(candidates, 2):
-        for vote in votes:
-            if is_dict_format:
-                ranking = vote["ranking"]
-            else:
-                ranking = vote
+    ``candidates`` is the candidate index table and ``choices[v, k]`` is the
+    index of the candidate ranked k-th on ballot v, or -1 past the end of a
+    partial (or empty) ranking. Choices are stored as int8, or int16 for
+    larger candidate sets.
 
-            rank_1 = (
-                ranking.index(candidate_1) if candidate_1 in ranking else float("inf")
-            )
-            rank_2 = (
-                ranking.index(candidate_2) if candidate_2 in ranking else float("inf")
+    ``weights[v]`` is the number of voters who cast ballot v. A compressed
+    ballot profile (see compress) holds each distinct ranking once with its
+    multiplicity, so every method's work scales with the number of distinct
+    ballots rather than the population size.
+    """
+
+    def __init__(
+        self,
+        candidates: List[str],
+        choices: np.ndarray,
+        voter_ids: Optional[list] = None,
+        weights: Optional[np.ndarray] = None,
+    ):
+        self.candidates = list(candidates)
+        self.index = {candidate: i for i, candidate in enumerate(self.candidates)}
+        self.choices = np.asarray(choices, dtype=_choice_dtype(len(self.candidates)))
+        self.voter_ids = voter_ids
+        if weights is None:
+            weights = np.ones(self.choices.shape[0], dtype=np.int64)
+        self.weights = np.asarray(weights, dtype=np.int64)
+        self._ranks = None
+        self._pairwise = None
+        self._position_counts = None
+
+    @classmethod
+    def from_rankings(cls, votes: list, candidates: Optional[List[str]] = None):
+        """
+        Build ballots from rankings in list or dict format.
+        :param votes: A list of rankings (see get_condorcet_winner for format)
+        :param candidates: Optional candidate order for the index table;
+                           defaults to the order of first appearance
+        :return: A RankedBallots instance
+        """
+        is_dict_format = isinstance(votes[0], dict) if votes else False
+        rankings = [vote["ranking"] if is_dict_format else vote for vote in votes]
+        voter_ids = [vote.get("voter_id") for vote in votes] if is_dict_format else None
+
+        # Candidates in order of first appearance, for deterministic tie-breaking
+        if candidates is None:
+            candidates = dict.fromkeys(c for ranking in rankings for c in ranking)
+        candidates = list(candidates)
+        index = {candidate: i for i, candidate in enumerate(candidates)}
+
+        lengths = np.fromiter(map(len, rankings), dtype=np.int64, count=len(rankings))
+        choices = np.full(
+            (len(rankings), len(candidates)), -1, dtype=_choice_dtype(len(candidates))
+        )
+        # Row-major boolean assignment fills each ballot left to right
+        filled = np.arange(len(candidates)) < lengths[:, None]
+        choices[filled] = [index[c] for ranking in rankings for c in ranking]
+
+        return cls(candidates, choices, voter_ids)
+
+    @classmethod
+    def from_profile(cls, profile: List[dict], candidates: Optional[List[str]] = None):
+        """
+        Build ballots from a weighted profile.
+        :param profile: A list of {'ranking': [...], 'count': int} entries
+        :param candidates: Optional candidate order for the index table
+        :return: A RankedBallots instance with one row per profile entry
+        """
+        ballots = cls.from_rankings(
+            [entry["ranking"] for entry in profile], candidates=candidates
+        )
+        ballots.weights = np.array(
+            [entry["count"] for entry in profile], dtype=np.int64
+        )
+        return ballots
+
+    def __len__(self) -> int:
+        """Number of ballot rows (distinct rankings once compressed)."""
+        return self.choices.shape[0]
+
+    @property
+    def num_voters(self) -> int:
+        """Number of voters represented, counting multiplicities."""
+        return int(self.weights.sum())
+
+    def compress(self) -> "RankedBallots":
+        """
+        Collapse identical rankings into unique rows with multiplicity weights.
+        Voter ids are dropped since rows no longer belong to a single voter.
+        """
+        if not len(self):
+            return RankedBallots(self.candidates, self.choices, weights=self.weights)
+        unique, inverse = np.unique(self.choices, axis=0, return_inverse=True)
+        weights = np.bincount(inverse.ravel(), weights=self.weights).astype(np.int64)
+        return RankedBallots(self.candidates, unique, weights=weights)
+
+    @classmethod
+    def merge(cls, parts: List["RankedBallots"]) -> "RankedBallots":
+        """
+        Combine ballot sets over the same candidates, e.g. built by worker
+        processes on chunks of a population, into one compressed set.
+        Pairwise matrices and position counts already computed on every part
+        are summed instead of being recomputed.
+        """
+        if not parts:
+            raise ValueError("Nothing to merge")
+        candidates = parts[0].candidates
+        if any(part.candidates != candidates for part in parts):
+            raise ValueError("Cannot merge ballots over different candidates")
+
+        merged = cls(
+            candidates,
+            np.concatenate([part.choices for part in parts]),
+            weights=np.concatenate([part.weights for part in parts]),
+        ).compress()
+
+        if all(part._pairwise is not None for part in parts):
+            matrix = sum(part._pairwise.matrix for part in parts)
+            merged._pairwise = PairwiseMatrix(candidates, matrix)
+        if all(part._position_counts is not None for part in parts):
+            counts = {}
+            for part in parts:
+                for length, table in part._position_counts.items():
+                    counts[length] = counts.get(length, 0) + table
+            merged._position_counts = dict(sorted(counts.items()))
+        return merged
+
+    @property
+    def num_candidates(self) -> int:
+        return len(self.candidates)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Number of candidates ranked on each ballot."""
+        return np.count_nonzero(self.choices >= 0, axis=1)
+
+    @property
+    def ranks(self) -> np.ndarray:
+        """
+        Position of every candidate on every ballot, shape (voters, C).
+        Unranked candidates are placed after all ranked ones (position C).
+        """
+        if self._ranks is None:
+            ranks = np.full(
+                self.choices.shape, self.num_candidates, dtype=self.choices.dtype
             )
+            rows, positions = np.nonzero(self.choices >= 0)
+            ranks[rows, self.choices[rows, positions]] = positions
+            self._ranks = ranks
+        return self._ranks
+
+    def pairwise_matrix(self) -> PairwiseMatrix:
+        """Pairwise preference matrix, computed once per ballot set."""
+        if self._pairwise is None:
+            ranks = self.ranks
+            matrix = np.zeros((self.num_candidates,) * 2, dtype=np.int64)
+            for i in range(self.num_candidates):
+                matrix[i] = self.weights @ (ranks[:, [i]] < ranks)
+            self._pairwise = PairwiseMatrix(self.candidates, matrix)
+        return self._pairwise
+
+    def position_counts(self) -> dict:
+        """
+        Weighted number of ballots placing each candidate at each position,
+        as {ballot_length: (C, C) array}, computed once per ballot set.
+        First-choice, last-choice and every positional score derive from it.
+        """
+        if self._position_counts is None:
+            lengths = self.lengths
+            counts = {}
+            for length in np.unique(lengths[lengths > 0]).tolist():
+                rows = lengths == length
+                choices = self.choices[rows, :length]
+                table = np.zeros((self.num_candidates,) * 2, dtype=np.int64)
+                for position in range(length):
+                    table[:, position] = np.bincount(
+                        choices[:, position],
+                        weights=self.weights[rows],
+                        minlength=self.num_candidates,
+                    )
+                counts[length] = table
+            self._position_counts = counts
+        return self._position_counts
+
+    def position_totals(self) -> np.ndarray:
+        """(C, C) counts of each candidate at each position, all lengths."""
+        totals = np.zeros((self.num_candidates,) * 2, dtype=np.int64)
+        for table in self.position_counts().values():
+            totals += table
+        return totals
+
+    def first_choice_counts(self) -> np.ndarray:
+        """Weighted number of first choices per candidate."""
+        return self.position_totals()[:, 0]
+
+    def last_choice_counts(self) -> np.ndarray:
+        """Weighted number of last choices per candidate."""
+        last = np.zeros(self.num_candidates, dtype=np.int64)
+        for length, table in self.position_counts().items():
+            last += table[:, length - 1]
+        return last
+
+    def to_rankings(self) -> List[List[str]]:
+        """
+        Convert back to a list of rankings (lists of candidate names), with
+        weighted rows repeated once per voter.
+        """
+        names = np.array(self.candidates, dtype=object)
+        choices = np.repeat(self.choices, self.weights, axis=0)
+        return [names[row[row >= 0]].tolist() for row in choices]
+
+    def to_profile(self) -> List[dict]:
+        """Convert to a list of {'ranking': [...], 'count': int} entries."""
+        names = np.array(self.candidates, dtype=object)
+        return [
+            {"ranking": names[row[row >= 0]].tolist(), "count": int(count)}
+            for row, count in zip(self.choices, self.weights)
+        ]
+
+    def to_dicts(self) -> List[dict]:
+        """Convert back to a list of {'voter_id', 'ranking'} dictionaries."""
+        voter_ids = self.voter_ids or range(len(self))
+        return [
+            {"voter_id": voter_id, "ranking": ranking}
+            for voter_id, ranking in zip(voter_ids, self.to_rankings())
+        ]
+
+
+def _choice_dtype(num_candidates: int):
+    return np.int8 if num_candidates < np.iinfo(np.int8).max else np.int16
+
+
+def as_ranked_ballots(votes) -> RankedBallots:
+    """
+    Return votes as RankedBallots, converting from list or dict format if needed.
+    """
+    if isinstance(votes, RankedBallots):
+        return votes
+    return RankedBallots.from_rankings(votes)
+
+
+def build_pairwise_matrix(votes) -> PairwiseMatrix:
+    """
+    Build the pairwise preference matrix for a set of rankings in one pass.
+    :param votes: A list of rankings (see get_condorcet_winner for format)
+    :return: A PairwiseMatrix shared by the Condorcet-style methods
+    """
+    return as_ranked_ballots(votes).pairwise_matrix()
+
+
+def _resolve_pairwise(votes, pairwise: PairwiseMatrix = None):
+    return pairwise if pairwise is not None else build_pairwise_matrix(votes)
+
+
+def _tally(ballots: RankedBallots, choices: np.ndarray) -> np.ndarray:
+    """
+    Weighted count of the candidate indices in choices, whose first axis runs
+    over the ballot rows; -1 entries are ignored.
+    """
+    weights = np.broadcast_to(
+        ballots.weights.reshape((-1,) + (1,) * (choices.ndim - 1)), choices.shape
+    )
+    counted = choices >= 0
+    return np.bincount(
+        choices[counted], weights=weights[counted], minlength=ballots.num_candidates
+    ).astype(np.int64)
+
+
+def _positional_scores(ballots: RankedBallots, points) -> np.ndarray:
+    """
+    Sum positional points onto each candidate. points(length) returns the
+    points awarded to each position on a ballot of that length.
+    """
+    scores = np.zeros(ballots.num_candidates)
+    for length, table in ballots.position_counts().items():
+        scores += table @ points(length)
+    return scores
 
-            if rank_1 < rank_2:
-                wins[(candidate_1, candidate_2)] += 1
-            elif rank_2 < rank_1:
-                wins[(candidate_2, candidate_1)] += 1
 
-    # Check for a Condorcet winner
-    for candidate in candidates:
-        if all(
-            wins.get((candidate, other), 0) > wins.get((other, candidate), 0)
-            for other in candidates
-            if other != candidate
-        ):
-            return candidate
+def get_condorcet_winner(votes, pairwise: PairwiseMatrix = None) -> str:
+    """
+    Determine the Condorcet winner from a set of rankings.
+    :param votes: A list of rankings, where each ranking is either:
+                  1. A dictionary with 'ranking' (list of candidate names) and
+                  'voter_id', or
+                  2. A list of candidate names (ranking)
+                  Every method also accepts a RankedBallots instance.
+    :param pairwise: Optional precomputed matrix from build_pairwise_matrix
+    :return: The name of the Condorcet winner, or None if there is no
+                  Condorcet winner.
+    """
+    candidates, matrix = _resolve_pairwise(votes, pairwise)
+
+    # A candidate beats every other candidate head-to-head
+    beats = (matrix > matrix.T) | np.eye(len(candidates), dtype=bool)
+    winners = np.flatnonzero(beats.all(axis=1))
+    if winners.size:
+        return candidates[winners[0]]
 
     return None
 
 
-def get_two_round_winner(votes: list) -> str:
+def get_two_round_winner(votes) -> str:
     """
     Determine the winner of a two-round system from a set of rankings.
     :param votes: A list of rankings (see get_condorcet_winner for format)
     :return: The name of the winner.
     """
-    # Determine format
-    is_dict_format = isinstance(votes[0], dict) if votes else False
+    ballots = as_ranked_ballots(votes)
+    if not len(ballots) or not ballots.num_candidates:
+        return None
 
     # Count the first-choice votes for each candidate
-    first_choice_votes = Counter()
-    for vote in votes:
-        if is_dict_format:
-            ranking = vote["ranking"]
-        else:
-            ranking = vote
+    first_choice_votes = ballots.first_choice_counts()
 
-        if ranking:
-            first_choice_votes[ranking[0]] += 1
-
-    # Determine the total number of voters
-    total_voters = len(votes)
+    # No runoff without two candidates: a sole candidate wins if ranked at all
+    if ballots.num_candidates == 1:
+        return ballots.candidates[0] if first_choice_votes[0] > 0 else None
 
     # Check if any candidate has a majority in the first round
-    majority = total_voters // 2
-    for candidate, count in first_choice_votes.items():
-        if count > majority:
-            return candidate
+    majority = ballots.num_voters // 2
+    leader = int(np.argmax(first_choice_votes))
+    if first_choice_votes[leader] > majority:
+        return ballots.candidates[leader]
 
     # If no majority, proceed to the second round with the top two candidates
-    top_two_candidates = [
-        candidate for candidate, _ in first_choice_votes.most_common(2)
-    ]
-
-    # Count the votes for the top two candidates in the second round
-    second_round_votes = Counter()
-    for vote in votes:
-        if is_dict_format:
-            ranking = vote["ranking"]
-        else:
-            ranking = vote
-
-        # Find the highest-ranked candidate among the top two
-        for candidate in ranking:
-            if candidate in top_two_candidates:
-                second_round_votes[candidate] += 1
-                break  # Only count the highest-ranked of the top two
+    first, second = np.argsort(-first_choice_votes, kind="stable")[:2]
+
+    # Each ballot goes to whichever of the top two it ranks higher, which is
+    # exactly their head-to-head contest in the pairwise matrix
+    matrix = ballots.pairwise_matrix().matrix
+    first_votes = matrix[first, second]
+    second_votes = matrix[second, first]
 
     # Determine the winner of the second round
-    winner = max(second_round_votes, key=second_round_votes.get)
-    return winner
+    winner = first if first_votes >= second_votes else second
+    return ballots.candidates[winner]
 
 
-def get_borda_winner(votes: list) -> str:
+def get_borda_winner(votes) -> str:
     """
     Determine the Borda count winner from a set of rankings.
     :param votes: A list of rankings (see get_condorcet_winner for format)
     :return: The name of the Borda winner
     """
-    # Determine format
-    is_dict_format = isinstance(votes[0], dict) if votes else False
-
-    candidates = set()
-    for vote in votes:
-        if is_dict_format:
-            ranking = vote["ranking"]
-        else:
-            ranking = vote
-        candidates.update(ranking)
+    ballots = as_ranked_ballots(votes)
+    if not ballots.num_candidates:
+        return None
 
-    scores = defaultdict(int)
+    # Assign points: last place gets 0, second last gets 1, etc.
+    positions = np.arange(ballots.num_candidates)
+    scores = _positional_scores(ballots, lambda length: length - 1 - positions)
 
-    for vote in votes:
-        if is_dict_format:
-            ranking = vote["ranking"]
-        else:
-            ranking = vote
+    return ballots.candidates[int(np.argmax(scores))]
 
-        num_candidates = len(ranking)
-        for position, candidate in enumerate(ranking):
-            # Assign points: last place gets 0, second last gets 1, etc.
-            scores[candidate] += num_candidates - 1 - position
 
-    return max(scores.items(), key=lambda x: x[1])[0]
-
-
-def get_plurality_winner(votes: list) -> str:
+def get_plurality_winner(votes) -> str:
     """
     Determine the plurality winner from a set of rankings.
     :param votes: A list of rankings (see get_condorcet_winner for format)
     :return: The name of the plurality winner
     """
-    # Determine format
-    is_dict_format = isinstance(votes[0], dict) if votes else False
+    ballots = as_ranked_ballots(votes)
+    if not ballots.num_candidates:
+        return None
 
-    first_choice_votes = Counter()
-    for vote in votes:
-        if is_dict_format:
-            ranking = vote["ranking"]
-        else:
-            ranking = vote
+    first_choice_votes = ballots.first_choice_counts()
 
-        if ranking:
-            first_choice_votes[ranking[0]] += 1
+    return ballots.candidates[int(np.argmax(first_choice_votes))]
 
-    return max(first_choice_votes.items(), key=lambda x: x[1])[0]
 
-
-def get_approval_winner(votes: list, approval_threshold: int = 2) -> str:
+def get_approval_winner(votes, approval_threshold: int = 2) -> str:
     """
     Determine the approval voting winner from a set of rankings.
     :param votes: A list of rankings (see get_condorcet_winner for format)
     :param approval_threshold: Number of top candidates to approve (default: 2)
     :return: The name of the approval voting winner
     """
-    # Determine format
-    is_dict_format = isinstance(votes[0], dict) if votes else False
+    ballots = as_ranked_ballots(votes)
+    if not ballots.num_candidates:
+        return None
+
+    # Approve top N candidates
+    approval_votes = ballots.position_totals()[:, :approval_threshold].sum(axis=1)
+
+    return ballots.candidates[int(np.argmax(approval_votes))]
+
+
+def _advance_pointers(
+    ballots: RankedBallots,
+    pointers: np.ndarray,
+    rows: np.ndarray,
+    alive: np.ndarray,
+    step: int,
+) -> np.ndarray:
+    """
+    Move the pointers of the given ballot rows by step until they reach a
+    still-running candidate. Returns the new current choice of those rows,
+    or -1 for exhausted ballots.
+    """
+    num_positions = ballots.choices.shape[1]
+    current = np.full(rows.size, -1, dtype=np.int64)
+    pending = np.arange(rows.size)
+
+    while pending.size:
+        pointers[rows[pending]] += step
+        position = pointers[rows[pending]]
+        in_range = (position >= 0) & (position < num_positions)
+        pending = pending[in_range]
+        choice = ballots.choices[rows[pending], position[in_range]].astype(np.int64)
+
+        # Padding (-1) marks the end of a partial ballot
+        valid = choice >= 0
+        found = np.zeros(pending.size, dtype=bool)
+        found[valid] = alive[choice[valid]]
+        current[pending[found]] = choice[found]
+        pending = pending[valid & ~found]
+
+    return current
+
+
+def _run_elimination(ballots: RankedBallots, from_bottom: bool) -> dict:
+    """
+    Shared round engine for IRV (from_bottom=False) and Coombs' method
+    (from_bottom=True).
 
-    approval_votes = Counter()
+    Every ballot keeps a pointer to its current top (or bottom) still-running
+    choice. After an elimination only the ballots pointing at an eliminated
+    candidate are re-routed, so the total work is O(V * C) over all rounds.
+    """
+    num_candidates = ballots.num_candidates
+    names = ballots.candidates
+    alive = np.ones(num_candidates, dtype=bool)
+    rows = np.arange(len(ballots))
+
+    # Start one step outside the ballot and advance onto the first choice
+    step = -1 if from_bottom else 1
+    pointers = ballots.lengths if from_bottom else np.full(len(ballots), -1)
+    pointers = pointers.astype(np.int64)
+    current = _advance_pointers(ballots, pointers, rows, alive, step)
+    tally = _tally(ballots, current)
+
+    rounds = []
+    winner = None
+    while np.count_nonzero(alive) > 1:
+        round_log = {
+            "round": len(rounds) + 1,
+            "tally": {names[c]: int(tally[c]) for c in np.flatnonzero(alive)},
+            "eliminated": [],
+            "transfers": {},
+        }
+        rounds.append(round_log)
+
+        if not from_bottom:
+            # Check for majority winner among the non-exhausted ballots
+            leader = int(np.argmax(tally))
+            if tally[leader] > tally.sum() / 2:
+                winner = leader
+                break
+
+        # IRV drops the fewest first choices, Coombs the most last choices
+        target = tally[alive].max() if from_bottom else tally[alive].min()
+        eliminated = alive & (tally == target)
+
+        # If everyone left is tied, the first of them wins
+        if np.array_equal(eliminated, alive):
+            break
+
+        # If tie for elimination, eliminate all tied candidates
+        alive &= ~eliminated
+        round_log["eliminated"] = [names[c] for c in np.flatnonzero(eliminated)]
+
+        # Re-route only the ballots sitting on an eliminated candidate
+        moved = np.flatnonzero(eliminated[np.maximum(current, 0)] & (current >= 0))
+        previous = current[moved]
+        current[moved] = _advance_pointers(ballots, pointers, moved, alive, step)
 
-    for vote in votes:
-        if is_dict_format:
-            ranking = vote["ranking"]
-        else:
-            ranking = vote
+        # Transfer table, with exhausted ballots in the last column
+        transfers = np.zeros((num_candidates, num_candidates + 1), dtype=np.int64)
+        destination = np.where(current[moved] >= 0, current[moved], num_candidates)
+        np.add.at(transfers, (previous, destination), ballots.weights[moved])
+        tally = _tally(ballots, current)
 
-        # Approve top N candidates
-        approved = ranking[:approval_threshold]
-        for candidate in approved:
-            approval_votes[candidate] += 1
+        for source in np.flatnonzero(eliminated):
+            received = np.flatnonzero(transfers[source])
+            round_log["transfers"][names[source]] = {
+                (names[c] if c < num_candidates else "exhausted"): int(
+                    transfers[source, c]
+                )
+                for c in received
+            }
 
-    return max(approval_votes.items(), key=lambda x: x[1])[0]
+    if winner is None:
+        # Return the (first) remaining candidate
+        winner = int(np.argmax(alive))
 
+    return {"winner": names[winner], "rounds": rounds}
 
-def get_irv_winner(votes: list) -> str:
+
+def get_irv_rounds(votes) -> dict:
+    """
+    Run Instant Runoff Voting and log every round.
+    :param votes: A list of rankings (see get_condorcet_winner for format)
+    :return: A dictionary with the 'winner' and a 'rounds' list, each round
+             holding its first-choice 'tally', the 'eliminated' candidates and
+             a 'transfers' table of where their ballots went
+    """
+    ballots = as_ranked_ballots(votes)
+    if not ballots.num_candidates:
+        return {"winner": None, "rounds": []}
+    return _run_elimination(ballots, from_bottom=False)
+
+
+def get_irv_winner(votes) -> str:
     """
     Determine the Instant Runoff Voting winner from a set of rankings.
     :param votes: A list of rankings (see get_condorcet_winner for format)
     :return: The name of the IRV winner
     """
-    # Determine format
-    is_dict_format = isinstance(votes[0], dict) if votes else False
-
-    candidates = set()
-    for vote in votes:
-        if is_dict_format:
-            ranking = vote["ranking"]
-        else:
-            ranking = vote
-        candidates.update(ranking)
-
-    while len(candidates) > 1:
-        # Count first-choice votes
-        votes_count = Counter()
-        for vote in votes:
-            if is_dict_format:
-                ranking = vote["ranking"]
-            else:
-                ranking = vote
-
-            for candidate in ranking:
-                if candidate in candidates:
-                    votes_count[candidate] += 1
-                    break  # Only count first valid choice
-
-        # Check for majority winner
-        total_votes = sum(votes_count.values())
-        majority = total_votes / 2
-
-        for candidate, count in votes_count.items():
-            if count > majority:
-                return candidate
-
-        # Eliminate candidate(s) with fewest votes
-        min_votes = min(votes_count.values())
-        eliminated = [c for c, v in votes_count.items() if v == min_votes]
+    return get_irv_rounds(votes)["winner"]
 
-        # If tie for elimination, eliminate all tied candidates
-        for candidate in eliminated:
-            candidates.remove(candidate)
 
-    return candidates.pop()  # Return the last remaining candidate
+def get_coombs_rounds(votes) -> dict:
+    """
+    Run Coombs' method and log every round.
+    :param votes: A list of rankings (see get_condorcet_winner for format)
+    :return: A dictionary with the 'winner' and a 'rounds' list, each round
+             holding its last-choice 'tally', the 'eliminated' candidates and
+             a 'transfers' table of where their ballots went
+    """
+    ballots = as_ranked_ballots(votes)
+    if not ballots.num_candidates:
+        return {"winner": None, "rounds": []}
+    return _run_elimination(ballots, from_bottom=True)
 
 
-def get_coombs_winner(votes: list) -> str:
+def get_coombs_winner(votes) -> str:
     """
     Determine the Coombs' method winner from a set of rankings.
     :param votes: A list of rankings (see get_condorcet_winner for format)
     :return: The name of the Coombs' winner
     """
-    # Determine format
-    is_dict_format = isinstance(votes[0], dict) if votes else False
-
-    candidates = set()
-    for vote in votes:
-        if is_dict_format:
-            ranking = vote["ranking"]
-        else:
-            ranking = vote
-        candidates.update(ranking)
-
-    while len(candidates) > 1:
-        # Count last-choice votes
-        last_choices = Counter()
-        for vote in votes:
-            if is_dict_format:
-                ranking = vote["ranking"]
-            else:
-                ranking = vote
-
-            # Find the lowest-ranked remaining candidate
-            for candidate in reversed(ranking):
-                if candidate in candidates:
-                    last_choices[candidate] += 1
-                    break
-
-        # Eliminate candidate(s) with most last-place votes
-        max_last_choices = max(last_choices.values())
-        eliminated = [c for c, v in last_choices.items() if v == max_last_choices]
-
-        # If tie for elimination, eliminate all tied candidates
-        for candidate in eliminated:
-            candidates.remove(candidate)
-
-    return candidates.pop()  # Return the last remaining candidate
+    return get_coombs_rounds(votes)["winner"]
 
 
-def get_score_winner(votes: list) -> str:
+def get_score_winner(votes) -> str:
     """
     Determine the score voting winner from a set of rankings.
     :param votes: A list of rankings (see get_condorcet_winner for format)
     :return: The name of the score voting winner
     """
-    # Determine format
-    is_dict_format = isinstance(votes[0], dict) if votes else False
+    ballots = as_ranked_ballots(votes)
+    if not ballots.num_candidates:
+        return None
 
-    scores = defaultdict(float)
+    # Assign scores from 0 (worst) to 1 (best)
+    positions = np.arange(ballots.num_candidates)
 
-    for vote in votes:
-        if is_dict_format:
-            ranking = vote["ranking"]
-        else:
-            ranking = vote
+    def points(length):
+        if length == 1:
+            return np.ones(ballots.num_candidates)
+        return 1 - positions / (length - 1)
 
-        num_candidates = len(ranking)
-        for position, candidate in enumerate(ranking):
-            # Assign scores from 0 (worst) to 1 (best)
-            score = 1 - (position / (num_candidates - 1)) if num_candidates > 1 else 1
-            scores[candidate] += score
+    scores = _positional_scores(ballots, points)
 
-    return max(scores.items(), key=lambda x: x[1])[0]
+    return ballots.candidates[int(np.argmax(scores))]
 
 
-def get_kemeny_young_winner(votes: list) -> str:
-    """
-    Determine the Kemeny-Young winner from a set of rankings.
-    :param votes: A list of rankings (see get_condorcet_winner for format)
-    :return: The name of the Kemeny-Young winner
-    """
-    # Determine format
-    is_dict_format = isinstance(votes[0], dict) if votes else False
-
-    candidates = set()
-    for vote in votes:
-        if is_dict_format:
-            ranking = vote["ranking"]
-        else:
-            ranking = vote
-        candidates.update(ranking)
-    candidates = list(candidates)
+def _kemeny_score(matrix: np.ndarray, order: List[int]) -> int:
+    """Pairwise agreements between a consensus order and the ballots."""
+    return int(np.triu(matrix[np.ix_(order, order)], k=1).sum())
 
-    # Generate all possible complete rankings
-    all_rankings = list(permutations(candidates))
 
-    def ranking_distance(r1, r2):
-        """Calculate the Kendall tau distance between two rankings"""
-        # Convert to dictionaries for position lookup
-        pos1 = {c: i for i, c in enumerate(r1)}
-        pos2 = {c: i for i, c in enumerate(r2)}
+def _kemeny_exact_order(matrix: np.ndarray, deadline: float) -> Optional[List[int]]:
+    """
+    Optimal Kemeny order by dynamic programming over candidate subsets, in
+    O(2^C * C) time and memory. Returns None if the deadline passes first.
+    """
+    num_candidates = matrix.shape[0]
+    num_subsets = 1 << num_candidates
+
+    # gain[S, c]: agreements won by placing c directly below the set S
+    gain = np.zeros((num_subsets, num_candidates), dtype=np.int64)
+    popcount = np.zeros(num_subsets, dtype=np.int8)
+    for k in range(num_candidates):
+        gain[1 << k : 1 << (k + 1)] = gain[: 1 << k] + matrix[k]
+        popcount[1 << k : 1 << (k + 1)] = popcount[: 1 << k] + 1
+
+    # best[S]: best score of an order whose top |S| candidates are S
+    best = np.zeros(num_subsets, dtype=np.int64)
+    for size in range(1, num_candidates + 1):
+        if time.perf_counter() > deadline:
+            return None
+
+        subsets = np.flatnonzero(popcount == size)
+        layer = np.full(subsets.size, -1, dtype=np.int64)
+        for c in range(num_candidates):
+            has_c = (subsets >> c) & 1 == 1
+            above = subsets[has_c] ^ (1 << c)
+            layer[has_c] = np.maximum(layer[has_c], best[above] + gain[above, c])
+        best[subsets] = layer
+
+    # Walk back from the full set, peeling off the last-placed candidate
+    order = []
+    subset = num_subsets - 1
+    while subset:
+        for c in range(num_candidates):
+            above = subset ^ (1 << c)
+            if subset >> c & 1 and best[above] + gain[above, c] == best[subset]:
+                order.append(c)
+                subset = above
+                break
+    return order[::-1]
+
+
+def _kemeny_local_search(matrix: np.ndarray, order: List[int]) -> List[int]:
+    """
+    Improve an order by moving single candidates to their best position until
+    no move increases the Kemeny score.
+    """
+    order = list(order)
+    improved = True
+    while improved:
+        improved = False
+        for candidate in list(order):
+            position = order.index(candidate)
+            rest = order[:position] + order[position + 1 :]
+
+            # Score contribution of the candidate at each insertion point
+            above = np.concatenate(([0], np.cumsum(matrix[rest, candidate])))
+            below = np.concatenate(
+                (np.cumsum(matrix[candidate, rest][::-1])[::-1], [0])
+            )
+            contributions = above + below
+            best_position = int(np.argmax(contributions))
 
-        # Count the number of pairs in different order
-        distance = 0
-        for i, j in combinations(range(len(r1)), 2):
-            if (pos1[r1[i]] < pos1[r1[j]]) != (pos2[r1[i]] < pos2[r1[j]]):
-                distance += 1
-        return distance
+            if contributions[best_position] > contributions[position]:
+                order = rest[:best_position] + [candidate] + rest[best_position:]
+                improved = True
+    return order
 
-    # Calculate the total distance for each possible ranking
-    min_distance = float("inf")
-    best_ranking = None
 
-    for candidate_ranking in all_rankings:
-        total_distance = 0
-        for vote in votes:
-            if is_dict_format:
-                ranking = vote["ranking"]
-            else:
-                ranking = vote
-            total_distance += ranking_distance(candidate_ranking, ranking)
+# Largest candidate count get_kemeny_young_ranking solves exactly by default
+KEMENY_MAX_EXACT_CANDIDATES = 16
 
-        if total_distance < min_distance:
-            min_distance = total_distance
-            best_ranking = candidate_ranking
 
-    return best_ranking[0]  # Return the top candidate in the best ranking
+def get_kemeny_young_ranking(
+    votes,
+    pairwise: PairwiseMatrix = None,
+    time_budget: float = 5.0,
+    max_exact_candidates: int = KEMENY_MAX_EXACT_CANDIDATES,
+) -> dict:
+    """
+    Compute the Kemeny-Young consensus ranking from a set of rankings.
+    Solved exactly by dynamic programming over subsets of candidates. With
+    more than max_exact_candidates candidates, or when the exact solver runs
+    past time_budget seconds, a Borda-seeded local search is used instead and
+    the result is flagged as approximate.
+    :param votes: A list of rankings (see get_condorcet_winner for format)
+    :param pairwise: Optional precomputed matrix from build_pairwise_matrix
+    :param time_budget: Seconds allowed for the exact solver
+    :param max_exact_candidates: Largest candidate count solved exactly
+    :return: A dictionary with the 'winner', the 'ranking', its 'score'
+             (pairwise agreements with the ballots) and 'approximate'
+    """
+    candidates, matrix = _resolve_pairwise(votes, pairwise)
+    if not candidates:
+        return {"winner": None, "ranking": [], "score": 0, "approximate": False}
+
+    # Minimising the total Kendall tau distance to the ballots is the same as
+    # maximising the pairwise agreements of the consensus ranking
+    order = None
+    if len(candidates) <= max_exact_candidates:
+        order = _kemeny_exact_order(matrix, time.perf_counter() + time_budget)
+    approximate = order is None
+
+    if approximate:
+        # Pairwise row sums equal the Borda scores for complete rankings
+        seed = np.argsort(-matrix.sum(axis=1), kind="stable").tolist()
+        order = _kemeny_local_search(matrix, seed)
+
+    return {
+        "winner": candidates[order[0]],
+        "ranking": [candidates[c] for c in order],
+        "score": _kemeny_score(matrix, order),
+        "approximate": approximate,
+    }
+
+
+def get_kemeny_young_winner(votes, pairwise: PairwiseMatrix = None) -> str:
+    """
+    Determine the Kemeny-Young winner from a set of rankings.
+    :param votes: A list of rankings (see get_condorcet_winner for format)
+    :param pairwise: Optional precomputed matrix from build_pairwise_matrix
+    :return: The name of the Kemeny-Young winner
+    """
+    return get_kemeny_young_ranking(votes, pairwise=pairwise)["winner"]
 
 
-def get_bucklin_winner(votes: list) -> str:
+def get_bucklin_winner(votes) -> str:
     """
     Determine the Bucklin voting winner from a set of rankings.
     :param votes: A list of rankings (see get_condorcet_winner for format)
     :return: The name of the Bucklin winner
     """
-    # Determine format
-    is_dict_format = isinstance(votes[0], dict) if votes else False
+    ballots = as_ranked_ballots(votes)
+    if not ballots.position_counts():
+        return None
 
-    candidates = set()
-    for vote in votes:
-        if is_dict_format:
-            ranking = vote["ranking"]
-        else:
-            ranking = vote
-        candidates.update(ranking)
-
-    max_rank = max(len(vote["ranking"] if is_dict_format else vote) for vote in votes)
+    max_rank = max(ballots.position_counts())
+    majority = ballots.num_voters / 2
+    position_totals = ballots.position_totals()
 
     for rank in range(1, max_rank + 1):
-        votes_count = Counter()
-        for vote in votes:
-            if is_dict_format:
-                ranking = vote["ranking"]
-            else:
-                ranking = vote
-
-            if len(ranking) >= rank:
-                votes_count[ranking[rank - 1]] += 1
+        votes_count = position_totals[:, rank - 1]
 
-        majority = len(votes) / 2
-        winners = [c for c, v in votes_count.items() if v > majority]
-
-        if winners:
-            return winners[0]  # Return the first winner if there's a tie
+        winners = np.flatnonzero(votes_count > majority)
+        if winners.size:
+            return ballots.candidates[winners[0]]
 
     # If no majority found at any rank, return the candidate with most votes
     # at the last rank
-    return max(votes_count.items(), key=lambda x: x[1])[0]
+    return ballots.candidates[int(np.argmax(votes_count))]
 
 
-def get_minimax_winner(votes: list) -> str:
+def get_minimax_winner(votes, pairwise: PairwiseMatrix = None) -> str:
     """
     Determine the Minimax winner from a set of rankings.
     :param votes: A list of rankings (see get_condorcet_winner for format)
+    :param pairwise: Optional precomputed matrix from build_pairwise_matrix
     :return: The name of the Minimax winner
     """
-    # Determine format
-    is_dict_format = isinstance(votes[0], dict) if votes else False
-
-    candidates = set()
-    for vote in votes:
-        if is_dict_format:
-            ranking = vote["ranking"]
-        else:
-            ranking = vote
-        candidates.update(ranking)
-
-    # Calculate pairwise opposition
-    opposition = defaultdict(int)
-    for c1, c2 in combinations(candidates, 2):
-        for vote in votes:
-            if is_dict_format:
-                ranking = vote["ranking"]
-            else:
-                ranking = vote
-
-            pos1 = ranking.index(c1) if c1 in ranking else float("inf")
-            pos2 = ranking.index(c2) if c2 in ranking else float("inf")
-            if pos2 < pos1:  # c2 is preferred over c1
-                opposition[(c1, c2)] += 1
-
-    # Find the maximum opposition for each candidate
-    max_opposition = {}
-    for candidate in candidates:
-        max_opposition[candidate] = max(
-            opposition.get((candidate, other), 0)
-            for other in candidates
-            if other != candidate
-        )
+    candidates, matrix = _resolve_pairwise(votes, pairwise)
+    if not candidates:
+        return None
+
+    # Opposition to a candidate is the number of voters preferring another
+    # candidate over it, i.e. the column of the pairwise matrix
+    opposition = matrix.T.copy()
+    np.fill_diagonal(opposition, 0)
+    max_opposition = opposition.max(axis=1)
 
     # Return the candidate with the smallest maximum opposition
-    return min(max_opposition.items(), key=lambda x: x[1])[0]
+    return candidates[int(np.argmin(max_opposition))]
+
+
+def _schulze_strengths(matrix: np.ndarray) -> np.ndarray:
+    """
+    Strengths of the strongest (widest) paths between every pair of
+    candidates, by Floyd-Warshall with the intermediate candidate outermost.
+    """
+    # Only winning pairwise contests form links in the path graph
+    strength = np.where(matrix > matrix.T, matrix, 0)
 
+    for k in range(strength.shape[0]):
+        np.maximum(
+            strength, np.minimum(strength[:, [k]], strength[[k], :]), out=strength
+        )
+
+    np.fill_diagonal(strength, 0)
+    return strength
 
-def get_schulze_winner(votes: list) -> str:
+
+def get_schulze_ranking(votes, pairwise: PairwiseMatrix = None) -> List[str]:
+    """
+    Compute the full Schulze ranking from a set of rankings.
+    :param votes: A list of rankings (see get_condorcet_winner for format)
+    :param pairwise: Optional precomputed matrix from build_pairwise_matrix
+    :return: Candidate names, best first
+    """
+    candidates, matrix = _resolve_pairwise(votes, pairwise)
+    strength = _schulze_strengths(matrix)
+
+    # The Schulze relation is transitive, so ordering by the number of
+    # candidates each one beats yields the Schulze ranking
+    wins = np.count_nonzero(strength > strength.T, axis=1)
+    return [candidates[c] for c in np.argsort(-wins, kind="stable")]
+
+
+def get_schulze_winner(votes, pairwise: PairwiseMatrix = None) -> str:
     """
     Determine the Schulze method winner from a set of rankings.
     :param votes: A list of rankings (see get_condorcet_winner for format)
+    :param pairwise: Optional precomputed matrix from build_pairwise_matrix
     :return: The name of the Schulze winner
     """
-    # Determine format
-    is_dict_format = isinstance(votes[0], dict) if votes else False
-
-    candidates = set()
-    for vote in votes:
-        if is_dict_format:
-            ranking = vote["ranking"]
-        else:
-            ranking = vote
-        candidates.update(ranking)
-
-    # Initialize pairwise preference matrix
-    pref = defaultdict(lambda: defaultdict(int))
-    for c1, c2 in combinations(candidates, 2):
-        for vote in votes:
-            if is_dict_format:
-                ranking = vote["ranking"]
-            else:
-                ranking = vote
-
-            pos1 = ranking.index(c1) if c1 in ranking else float("inf")
-            pos2 = ranking.index(c2) if c2 in ranking else float("inf")
-            if pos1 < pos2:
-                pref[c1][c2] += 1
-
-    # Calculate the strength of the strongest paths
-    strength = defaultdict(lambda: defaultdict(int))
-    for c1, c2 in combinations(candidates, 2):
-        if c1 != c2:
-            strength[c1][c2] = pref[c1][c2]
-
-    for c1, c2, c3 in permutations(candidates, 3):
-        strength[c1][c2] = max(
-            strength[c1][c2], min(strength[c1][c3], strength[c3][c2])
-        )
+    ranking = get_schulze_ranking(votes, pairwise=pairwise)
+    return ranking[0] if ranking else None
 
-    # Find the Schulze winner
-    wins = defaultdict(int)
-    for c1, c2 in combinations(candidates, 2):
-        if strength[c1][c2] > strength[c2][c1]:
-            wins[c1] += 1
 
-    return max(wins.items(), key=lambda x: x[1])[0]
+def get_copeland_winner(votes, pairwise: PairwiseMatrix = None) -> str:
+    """
+    Determine the Copeland winner from a set of rankings.
+    :param votes: A list of rankings (see get_condorcet_winner for format)
+    :param pairwise: Optional precomputed matrix from build_pairwise_matrix
+    :return: The name of the Copeland winner
+    """
+    candidates, matrix = _resolve_pairwise(votes, pairwise)
+    if not candidates:
+        return None
+
+    # One point per head-to-head win, half a point per tie
+    wins = np.count_nonzero(matrix > matrix.T, axis=1)
+    ties = np.count_nonzero(matrix == matrix.T, axis=1) - 1
+    scores = wins + 0.5 * ties
+
+    return candidates[int(np.argmax(scores))]
+
+
+# Methods run by run_all_ranked_methods. Each returns either the winner, the
+# full ranking (best first) or a dictionary holding the 'winner'.
+RANKED_METHODS = {
+    "condorcet": get_condorcet_winner,
+    "two_round": get_two_round_winner,
+    "borda": get_borda_winner,
+    "plurality": get_plurality_winner,
+    "approval": get_approval_winner,
+    "irv": get_irv_rounds,
+    "coombs": get_coombs_rounds,
+    "score": get_score_winner,
+    "kemeny_young": get_kemeny_young_ranking,
+    "bucklin": get_bucklin_winner,
+    "minimax": get_minimax_winner,
+    "schulze": get_schulze_ranking,
+    "copeland": get_copeland_winner,
+}
+
+_PAIRWISE_METHODS = {
+    "condorcet",
+    "two_round",
+    "kemeny_young",
+    "minimax",
+    "schulze",
+    "copeland",
+}
+
+
+def _winner_of(result):
+    if isinstance(result, dict):
+        return result["winner"]
+    if isinstance(result, list):
+        return result[0] if result else None
+    return result
+
+
+def run_all_ranked_methods(ballots, methods: Optional[List[str]] = None) -> dict:
+    """
+    Run ranked voting methods over one ballot set and return the results.
+    Shared intermediates (position counts, from which first- and last-choice
+    counts and positional scores derive, and the pairwise matrix) are
+    computed once up front and reused by every method.
+    :param ballots: A list of rankings (see get_condorcet_winner for format)
+    :param methods: Names from RANKED_METHODS to run (default: all)
+    :return: A dictionary with each method's 'winners', its full 'results'
+             and 'timings' in seconds for the shared intermediates and for
+             each method
+    """
+    methods = list(RANKED_METHODS) if methods is None else list(methods)
+    unknown = [method for method in methods if method not in RANKED_METHODS]
+    if unknown:
+        raise ValueError(f"Unknown ranked methods: {', '.join(unknown)}")
+
+    timings = {}
+    start = time.perf_counter()
+    if not isinstance(ballots, RankedBallots):
+        ballots = RankedBallots.from_rankings(ballots).compress()
+    timings["ballots"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ballots.position_counts()
+    timings["position_counts"] = time.perf_counter() - start
+
+    if _PAIRWISE_METHODS.intersection(methods):
+        start = time.perf_counter()
+        ballots.pairwise_matrix()
+        timings["pairwise_matrix"] = time.perf_counter() - start
+
+    results = {}
+    for method in methods:
+        start = time.perf_counter()
+        results[method] = RANKED_METHODS[method](ballots)
+        timings[method] = time.perf_counter() - start
+
+    return {
+        "winners": {method: _winner_of(result) for method, result in results.items()},
+        "results": results,
+        "timings": timings,
+    }
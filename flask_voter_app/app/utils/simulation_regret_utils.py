@@ -0,0 +1,209 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from typing import List, Optional
+
+import numpy as np
+
+from app.utils.rng import chunk_streams
+from app.utils.simul import simulate_score_matrix
+from app.utils.simulation_ranked_utils import (
+    RANKED_METHODS,
+    RankedBallots,
+    run_all_ranked_methods,
+)
+from app.utils.simulation_score_utils import (
+    ScoreMatrix,
+    get_mean_median_hybrid_winner,
+    get_median_voting_winner,
+    get_simple_score_winner,
+    get_star_voting_winner,
+    get_variance_based_winner,
+)
+
+# Score methods that elect a single winner
+SCORE_METHODS = {
+    "simple_score": get_simple_score_winner,
+    "star_voting": get_star_voting_winner,
+    "median_voting": get_median_voting_winner,
+    "mean_median_hybrid": get_mean_median_hybrid_winner,
+    "variance_based": get_variance_based_winner,
+}
+
+# Ranked methods worth benchmarking by default; Kemeny-Young is exponential
+# in the number of candidates and has to be asked for explicitly
+DEFAULT_RANKED_METHODS = [
+    method for method in RANKED_METHODS if method != "kemeny_young"
+]
+
+
+def election_regrets(scores: np.ndarray, candidates: List[str], methods: List[str]):
+    """
+    Bayesian regret of each method for one election.
+    Regret is the average utility of the utilitarian best candidate minus that
+    of the method's winner, with 0-5 scores normalised to 0-1 utilities.
+    :param scores: (voters x candidates) array of sincere 0-5 scores
+    :param candidates: Candidate names, one per column
+    :param methods: Names from SCORE_METHODS or RANKED_METHODS
+    :return: A dictionary of regret per method, NaN for a method that elects
+             no one (e.g. condorcet on a Condorcet cycle)
+    """
+    avg_utilities = scores.mean(axis=0) / 5 if len(scores) else np.zeros(
+        len(candidates)
+    )
+    best = avg_utilities.max()
+    index = {candidate: i for i, candidate in enumerate(candidates)}
+
+    winners = {}
+    score_matrix = ScoreMatrix(candidates, scores.astype(np.float32))
+    for method in methods:
+        if method in SCORE_METHODS:
+            winners[method] = SCORE_METHODS[method](score_matrix)["winner"]
+
+    ranked = [method for method in methods if method in RANKED_METHODS]
+    if ranked:
+        # Sincere rankings: highest score first, ties in candidate order
+        choices = np.argsort(-scores, axis=1, kind="stable")
+        ballots = RankedBallots(candidates, choices).compress()
+        winners.update(run_all_ranked_methods(ballots, methods=ranked)["winners"])
+
+    return {
+        method: float(best - avg_utilities[index[winner]])
+        if winner in index
+        else float("nan")
+        for method, winner in winners.items()
+    }
+
+
+def _regret_batch(args):
+    """Run one batch of elections; module level so worker processes can pickle it."""
+    seed, num_elections, election, methods = args
+    rng = np.random.default_rng(seed)
+    candidates = list(election["candidates"])
+
+    regrets = np.empty((num_elections, len(methods)))
+    for row in range(num_elections):
+        scores = simulate_score_matrix(
+            election["population_size"],
+            candidates,
+            election["demographics"],
+            election.get("influence_weights", {}),
+            election.get("turnout_rate", 1.0),
+            rng,
+        )
+        result = election_regrets(scores, candidates, methods)
+        regrets[row] = [result[method] for method in methods]
+
+    # Sufficient statistics over the elections each method decided, so
+    # batches merge by addition
+    decided = ~np.isnan(regrets)
+    return (
+        num_elections,
+        decided.sum(axis=0),
+        np.nansum(regrets, axis=0),
+        np.nansum(regrets**2, axis=0),
+    )
+
+
+def run_bayesian_regret_benchmark(
+    election: dict,
+    num_elections: int = 1000,
+    methods: Optional[List[str]] = None,
+    seed: Optional[int] = None,
+    batch_size: int = 50,
+    workers: Optional[int] = None,
+    confidence: float = 0.95,
+) -> dict:
+    """
+    Monte Carlo Bayesian regret of voting methods over simulated elections.
+    Elections are drawn from the simul.py voter model in batches; each batch
+    gets its own child of one SeedSequence, so results depend on the seed
+    and batch size but not on the number of workers.
+    :param election: simul.py parameters: 'population_size', 'candidates',
+                     'demographics', and optionally 'influence_weights' and
+                     'turnout_rate'
+    :param num_elections: Number of elections to simulate
+    :param methods: Names from SCORE_METHODS or RANKED_METHODS
+                    (default: all score methods and DEFAULT_RANKED_METHODS)
+    :param seed: Seed for reproducible runs
+    :param batch_size: Elections per task sent to a worker
+    :param workers: Worker processes (default: CPU count); 1 runs in-process
+    :param confidence: Confidence level of the reported intervals
+    :return: A dictionary with per-method 'results' (mean regret, standard
+             deviation and confidence interval over the elections the method
+             decided, and the number of 'no_winner' elections, which are left
+             out of the statistics; None when it never elected anyone) and
+             the methods 'ranking' from lowest to highest mean regret
+    """
+    if methods is None:
+        methods = list(SCORE_METHODS) + DEFAULT_RANKED_METHODS
+    methods = list(methods)
+    unknown = [
+        method
+        for method in methods
+        if method not in SCORE_METHODS and method not in RANKED_METHODS
+    ]
+    if unknown:
+        raise ValueError(f"Unknown voting methods: {', '.join(unknown)}")
+    if num_elections < 1:
+        raise ValueError("num_elections must be at least 1")
+
+    tasks = [
+        (chunk.seed, chunk.stop - chunk.start, election, methods)
+        for chunk in chunk_streams(seed, num_elections, batch_size)
+    ]
+
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers == 1:
+        batches = map(_regret_batch, tasks)
+        totals = _merge_batches(batches, len(methods))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            totals = _merge_batches(executor.map(_regret_batch, tasks), len(methods))
+
+    count, decided, sums, sums_sq = totals
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / decided
+        variances = (
+            np.maximum(sums_sq / decided - means**2, 0)
+            * decided
+            / np.maximum(decided - 1, 1)
+        )
+    std_devs = np.sqrt(variances)
+    half_widths = (
+        NormalDist().inv_cdf(0.5 + confidence / 2) * std_devs / np.sqrt(decided)
+    )
+
+    def statistic(value):
+        return None if np.isnan(value) else float(value)
+
+    results = {
+        method: {
+            "mean_regret": statistic(means[i]),
+            "std_dev": statistic(std_devs[i]),
+            "ci_low": statistic(means[i] - half_widths[i]),
+            "ci_high": statistic(means[i] + half_widths[i]),
+            "no_winner": int(count - decided[i]),
+        }
+        for i, method in enumerate(methods)
+    }
+    # Methods that never elected anyone (NaN means) come last
+    ranking = [methods[i] for i in np.argsort(means, kind="stable")]
+
+    return {
+        "num_elections": int(count),
+        "confidence": confidence,
+        "results": results,
+        "ranking": ranking,
+    }
+
+
+def _merge_batches(batches, num_methods):
+    count, decided = 0, np.zeros(num_methods, dtype=np.int64)
+    sums, sums_sq = np.zeros(num_methods), np.zeros(num_methods)
+    for batch_count, batch_decided, batch_sums, batch_sums_sq in batches:
+        count += batch_count
+        decided += batch_decided
+        sums += batch_sums
+        sums_sq += batch_sums_sq
+    return count, decided, sums, sums_sq
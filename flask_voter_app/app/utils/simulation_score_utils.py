@@ -1,321 +1,617 @@
-from collections import defaultdict
-import math
-import statistics
+from typing import List, NamedTuple
 
+import numpy as np
 
-def get_simple_score_winner(all_scores):
+# Score bins used by the distribution analysis (0-0.5, 0.5-1, ..., 4.5-5)
+SCORE_BINS = [i * 0.5 for i in range(0, 11)]
+
+
+class ScoreMatrix(NamedTuple):
     """
-    Determine the winner using simple score sum/average method.
+    Score ballots held column-wise.
+    values[v, c] is the score ballot v gave candidates[c], or NaN if the
+    ballot did not score that candidate.
     """
-    candidate_scores = defaultdict(lambda: {"sum": 0, "count": 0})
-
-    for vote in all_scores:
-        for candidate, score in vote["scores"].items():
-            candidate_scores[candidate]["sum"] += score
-            candidate_scores[candidate]["count"] += 1
 
-    # Calculate averages
-    averages = []
-    for candidate, data in candidate_scores.items():
-        avg = data["sum"] / data["count"] if data["count"] > 0 else 0
-        averages.append((candidate, avg))
+    candidates: List[str]
+    values: np.ndarray
 
-    # Sort by average score (descending)
-    averages.sort(key=lambda x: x[1], reverse=True)
 
+def build_score_matrix(all_scores) -> ScoreMatrix:
+    """
+    Build a (voters x candidates) float32 score matrix.
+    :param all_scores: A list of score ballots, each either a dictionary with
+                       'scores' ({candidate: score}) or a {candidate: score}
+                       dictionary itself
+    :return: A ScoreMatrix shared by every score voting method
+    """
+    if isinstance(all_scores, ScoreMatrix):
+        return all_scores
+
+    ballots = [
+        vote["scores"] if isinstance(vote.get("scores"), dict) else vote
+        for vote in all_scores
+    ]
+
+    # Candidates in order of first appearance, for deterministic tie-breaking
+    candidates = list(dict.fromkeys(c for ballot in ballots for c in ballot))
+    values = np.full((len(ballots), len(candidates)), np.nan, dtype=np.float32)
+
+    if all(len(ballot) == len(candidates) for ballot in ballots):
+        # Complete ballots: one vectorised fill in candidate order
+        values[:] = [[ballot[c] for c in candidates] for ballot in ballots]
+    else:
+        index = {candidate: i for i, candidate in enumerate(candidates)}
+        for row, ballot in enumerate(ballots):
+            for candidate, score in ballot.items():
+                values[row, index[candidate]] = score
+
+    return ScoreMatrix(candidates, values)
+
+
+def _column_means(values: np.ndarray) -> np.ndarray:
+    present = ~np.isnan(values)
+    counts = present.sum(axis=0)
+    sums = np.where(present, values, 0).sum(axis=0, dtype=np.float64)
+    return np.divide(sums, counts, out=np.zeros(len(counts)), where=counts > 0)
+
+
+def _column_medians(values: np.ndarray) -> np.ndarray:
+    if np.isnan(values).any():
+        present = (~np.isnan(values)).any(axis=0)
+        medians = np.zeros(values.shape[1])
+        medians[present] = np.nanmedian(values[:, present], axis=0)
+        return medians
+
+    num_voters = values.shape[0]
+    if not num_voters:
+        return np.zeros(values.shape[1])
+
+    # Middle order statistics without a full sort
+    upper = num_voters // 2
+    lower = upper if num_voters % 2 else upper - 1
+    middle = np.partition(values, [lower, upper], axis=0)
+    return (middle[lower].astype(np.float64) + middle[upper]) / 2
+
+
+def _column_variances(values: np.ndarray, means: np.ndarray) -> np.ndarray:
+    present = ~np.isnan(values)
+    counts = present.sum(axis=0)
+    squares = np.where(present, values, 0).astype(np.float64) ** 2
+    mean_squares = np.divide(
+        squares.sum(axis=0), counts, out=np.zeros(len(counts)), where=counts > 0
+    )
+    return np.maximum(mean_squares - means * means, 0)
+
+
+def _column_histograms(values: np.ndarray) -> np.ndarray:
+    """(C, bins) counts of the scores falling in each SCORE_BINS range."""
+    num_bins = len(SCORE_BINS) - 1
+    num_candidates = values.shape[1]
+    bin_index = np.floor(values / 0.5)
+
+    # Scores outside [0, 5), including exactly 5, fall outside every bin
+    inside = (bin_index >= 0) & (bin_index < num_bins)
+    columns = np.broadcast_to(np.arange(num_candidates), values.shape)
+    flat = columns[inside] * num_bins + bin_index[inside].astype(np.int64)
+    counts = np.bincount(flat, minlength=num_candidates * num_bins)
+    return counts.reshape(num_candidates, num_bins)
+
+
+def _order(values: np.ndarray) -> np.ndarray:
+    """Candidate indices by value, highest first, ties in candidate order."""
+    return np.argsort(-np.asarray(values), kind="stable")
+
+
+def _simple_score_result(candidates, means):
+    order = _order(means)
     return {
         "method": "Simple Score",
-        "winner": averages[0][0] if averages else None,
-        "details": {candidate: avg for candidate, avg in averages},
+        "winner": candidates[order[0]] if len(order) else None,
+        "details": {candidates[c]: float(means[c]) for c in order},
     }
 
 
-def get_star_voting_winner(all_scores):
-    """
-    Determine the winner using STAR (Score Then Automatic Runoff) voting.
-    """
-    # First round: calculate average scores
-    candidate_scores = defaultdict(lambda: {"sum": 0, "count": 0})
-
-    for vote in all_scores:
-        for candidate, score in vote["scores"].items():
-            candidate_scores[candidate]["sum"] += score
-            candidate_scores[candidate]["count"] += 1
-
-    averages = []
-    for candidate, data in candidate_scores.items():
-        avg = data["sum"] / data["count"] if data["count"] > 0 else 0
-        averages.append((candidate, avg))
-
-    # Sort by average score (descending)
-    averages.sort(key=lambda x: x[1], reverse=True)
+def _star_result(candidates, means, runoff):
+    order = _order(means)
+    first_round = {candidates[c]: float(means[c]) for c in order}
 
     # Take top two candidates for runoff
-    if len(averages) < 2:
+    if len(order) < 2:
         return {
             "method": "STAR Voting",
-            "winner": averages[0][0] if averages else None,
-            "details": {
-                "first_round": {candidate: avg for candidate, avg in averages},
-                "runoff": None,
-            },
+            "winner": candidates[order[0]] if len(order) else None,
+            "details": {"first_round": first_round, "runoff": None},
         }
 
-    top_two = averages[:2]
-    candidate1, candidate2 = top_two[0][0], top_two[1][0]
-
-    # Runoff: compare head-to-head
-    votes1 = 0
-    votes2 = 0
-    tied = 0
-
-    for vote in all_scores:
-        score1 = vote["scores"].get(candidate1, 0)
-        score2 = vote["scores"].get(candidate2, 0)
-
-        if score1 > score2:
-            votes1 += 1
-        elif score2 > score1:
-            votes2 += 1
-        else:
-            tied += 1
-
+    candidate1, candidate2 = candidates[order[0]], candidates[order[1]]
+    votes1, votes2, tied, total_voters = runoff(order[0], order[1])
     runoff_winner = candidate1 if votes1 > votes2 else candidate2
 
     return {
         "method": "STAR Voting",
         "winner": runoff_winner,
         "details": {
-            "first_round": {candidate: avg for candidate, avg in averages},
+            "first_round": first_round,
             "runoff": {
                 "candidate1": candidate1,
                 "candidate2": candidate2,
-                "votes1": votes1,
-                "votes2": votes2,
-                "tied": tied,
-                "total_voters": len(all_scores),
+                "votes1": int(votes1),
+                "votes2": int(votes2),
+                "tied": int(tied),
+                "total_voters": int(total_voters),
             },
         },
     }
 
 
-def get_median_voting_winner(all_scores):
-    """
-    Determine the winner using median score method.
-    """
-    candidate_scores = defaultdict(list)
-
-    for vote in all_scores:
-        for candidate, score in vote["scores"].items():
-            candidate_scores[candidate].append(score)
-
-    medians = []
-    for candidate, scores in candidate_scores.items():
-        median = statistics.median(scores) if scores else 0
-        medians.append((candidate, median))
+def _median_result(candidates, medians):
+    order = _order(medians)
+    return {
+        "method": "Median Voting",
+        "winner": candidates[order[0]] if len(order) else None,
+        "details": {candidates[c]: float(medians[c]) for c in order},
+    }
 
-    # Sort by median score (descending)
-    medians.sort(key=lambda x: x[1], reverse=True)
 
+def _mean_median_hybrid_result(candidates, means, medians):
+    # Combined score (50% mean, 50% median)
+    combined = 0.5 * means + 0.5 * medians
+    order = _order(combined)
+    results = [
+        {
+            "candidate": candidates[c],
+            "mean": float(means[c]),
+            "median": float(medians[c]),
+            "combined": float(combined[c]),
+        }
+        for c in order
+    ]
     return {
-        "method": "Median Voting",
-        "winner": medians[0][0] if medians else None,
-        "details": {candidate: median for candidate, median in medians},
+        "method": "Mean-Median Hybrid",
+        "winner": results[0]["candidate"] if results else None,
+        "details": results,
     }
 
 
-def get_mean_median_hybrid_winner(all_scores):
-    """
-    Determine the winner using a combination of mean and median scores.
-    """
-    candidate_stats = defaultdict(lambda: {"sum": 0, "count": 0, "scores": []})
+def _variance_based_result(candidates, means, variances):
+    std_devs = np.sqrt(variances)
 
-    for vote in all_scores:
-        for candidate, score in vote["scores"].items():
-            candidate_stats[candidate]["sum"] += score
-            candidate_stats[candidate]["count"] += 1
-            candidate_stats[candidate]["scores"].append(score)
+    # Weighted score that balances mean and consistency (lower variance is better)
+    weighted_scores = means - 0.5 * std_devs
+    order = _order(weighted_scores)
+    results = [
+        {
+            "candidate": candidates[c],
+            "mean": float(means[c]),
+            "variance": float(variances[c]),
+            "std_dev": float(std_devs[c]),
+            "weighted_score": float(weighted_scores[c]),
+        }
+        for c in order
+    ]
+    return {
+        "method": "Variance-Based",
+        "winner": results[0]["candidate"] if results else None,
+        "details": results,
+    }
 
+
+def _score_distribution_result(candidates, histograms):
+    totals = histograms.sum(axis=1)
     results = []
-    for candidate, stats in candidate_stats.items():
-        mean = stats["sum"] / stats["count"] if stats["count"] > 0 else 0
-        median = statistics.median(stats["scores"]) if stats["scores"] else 0
+    for c, candidate in enumerate(candidates):
+        distribution = histograms[c]
+        total = int(totals[c])
+        percentages = distribution / total if total > 0 else np.zeros(len(distribution))
 
-        # Combined score (50% mean, 50% median)
-        combined = 0.5 * mean + 0.5 * median
+        # Find mode (most common score range)
+        max_index = int(np.argmax(distribution))
+        mode_range = f"{SCORE_BINS[max_index]}-{SCORE_BINS[max_index + 1]}"
 
         results.append(
             {
                 "candidate": candidate,
-                "mean": mean,
-                "median": median,
-                "combined": combined,
+                "distribution": distribution.tolist(),
+                "percentages": percentages.tolist(),
+                "total": total,
+                "mode_range": mode_range,
             }
         )
 
-    # Sort by combined score (descending)
-    results.sort(key=lambda x: x["combined"], reverse=True)
+    # Sort by total votes (descending)
+    results.sort(key=lambda x: x["total"], reverse=True)
+
+    return {"method": "Score Distribution Analysis", "details": results}
+
 
+def _bayesian_regret_result(candidates, avg_utilities, avg_regrets):
+    # Sort by average regret (ascending - lower regret is better)
+    order = _order(-np.asarray(avg_regrets))
+    regrets = [
+        {
+            "candidate": candidates[c],
+            "avg_utility": float(avg_utilities[c]),
+            "avg_regret": float(avg_regrets[c]),
+        }
+        for c in order
+    ]
     return {
-        "method": "Mean-Median Hybrid",
-        "winner": results[0]["candidate"] if results else None,
-        "details": results,
+        "method": "Bayesian Regret",
+        "winner": regrets[0]["candidate"] if regrets else None,
+        "details": regrets,
     }
 
 
-def get_variance_based_winner(all_scores):
+def get_simple_score_winner(all_scores):
     """
-    Determine the winner considering both average score and variance.
+    Determine the winner using simple score sum/average method.
     """
-    candidate_stats = defaultdict(lambda: {"sum": 0, "sum_sq": 0, "count": 0})
+    candidates, values = build_score_matrix(all_scores)
+    return _simple_score_result(candidates, _column_means(values))
 
-    for vote in all_scores:
-        for candidate, score in vote["scores"].items():
-            candidate_stats[candidate]["sum"] += score
-            candidate_stats[candidate]["sum_sq"] += score * score
-            candidate_stats[candidate]["count"] += 1
 
-    results = []
-    for candidate, stats in candidate_stats.items():
-        count = stats["count"]
-        if count == 0:
-            mean = 0
-            variance = 0
-        else:
-            mean = stats["sum"] / count
-            variance = (stats["sum_sq"] / count) - (mean * mean)
-        std_dev = math.sqrt(variance) if variance >= 0 else 0
-
-        # Weighted score that balances mean and consistency (lower variance is better)
-        weighted_score = mean - 0.5 * std_dev
-
-        results.append(
-            {
-                "candidate": candidate,
-                "mean": mean,
-                "variance": variance,
-                "std_dev": std_dev,
-                "weighted_score": weighted_score,
-            }
-        )
+def get_star_voting_winner(all_scores):
+    """
+    Determine the winner using STAR (Score Then Automatic Runoff) voting.
+    """
+    candidates, values = build_score_matrix(all_scores)
 
-    # Sort by weighted score (descending)
-    results.sort(key=lambda x: x["weighted_score"], reverse=True)
+    def runoff(first, second):
+        # Runoff: compare head-to-head, unscored candidates count as 0
+        score1 = np.nan_to_num(values[:, first])
+        score2 = np.nan_to_num(values[:, second])
+        votes1 = np.count_nonzero(score1 > score2)
+        votes2 = np.count_nonzero(score2 > score1)
+        return votes1, votes2, len(values) - votes1 - votes2, len(values)
 
-    return {
-        "method": "Variance-Based",
-        "winner": results[0]["candidate"] if results else None,
-        "details": results,
-    }
+    return _star_result(candidates, _column_means(values), runoff)
 
 
-def get_score_distribution_analysis(all_scores):
+def get_median_voting_winner(all_scores):
     """
-    Analyze the distribution of scores for each candidate.
+    Determine the winner using median score method.
     """
-    # Define score bins (0-0.5, 0.5-1, ..., 4.5-5)
-    bins = [i * 0.5 for i in range(0, 11)]  # 0, 0.5, 1, ..., 5
-    candidate_distributions = defaultdict(lambda: [0] * (len(bins) - 1))
-
-    for vote in all_scores:
-        for candidate, score in vote["scores"].items():
-            # Find the appropriate bin
-            for i in range(len(bins) - 1):
-                if bins[i] <= score < bins[i + 1]:
-                    candidate_distributions[candidate][i] += 1
-                    break
+    candidates, values = build_score_matrix(all_scores)
+    return _median_result(candidates, _column_medians(values))
 
-    results = []
-    for candidate, distribution in candidate_distributions.items():
-        total = sum(distribution)
-        percentages = [count / total if total > 0 else 0 for count in distribution]
 
-        # Find mode (most common score range)
-        max_index = max(range(len(distribution)), key=lambda i: distribution[i])
-        mode_range = f"{bins[max_index]}-{bins[max_index + 1]}"
+def get_mean_median_hybrid_winner(all_scores):
+    """
+    Determine the winner using a combination of mean and median scores.
+    """
+    candidates, values = build_score_matrix(all_scores)
+    return _mean_median_hybrid_result(
+        candidates, _column_means(values), _column_medians(values)
+    )
 
-        results.append(
-            {
-                "candidate": candidate,
-                "distribution": distribution,
-                "percentages": percentages,
-                "total": total,
-                "mode_range": mode_range,
-            }
-        )
 
-    # Sort by total votes (descending)
-    results.sort(key=lambda x: x["total"], reverse=True)
+def get_variance_based_winner(all_scores):
+    """
+    Determine the winner considering both average score and variance.
+    """
+    candidates, values = build_score_matrix(all_scores)
+    means = _column_means(values)
+    return _variance_based_result(
+        candidates, means, _column_variances(values, means)
+    )
 
-    return {"method": "Score Distribution Analysis", "details": results}
+
+def get_score_distribution_analysis(all_scores):
+    """
+    Analyze the distribution of scores for each candidate.
+    """
+    candidates, values = build_score_matrix(all_scores)
+    return _score_distribution_result(candidates, _column_histograms(values))
 
 
 def calculate_bayesian_regret(all_scores):
     """
     Calculate Bayesian regret for each candidate.
     """
-    candidates = set()
-    for vote in all_scores:
-        candidates.update(vote["scores"].keys())
-    candidates = list(candidates)
-
-    # Calculate utilities (normalized scores)
-    utilities = defaultdict(list)
-    for vote in all_scores:
-        for candidate, score in vote["scores"].items():
-            # Normalize to 0-1 range
-            utilities[candidate].append(score / 5)
-
-    # Calculate expected regret for each candidate
-    regrets = []
-    for candidate in candidates:
-        total_regret = 0
-
-        for vote in all_scores:
-            # Find the utility of the voter's most preferred candidate
-            best_utility = max(vote["scores"].values()) / 5
-            current_utility = vote["scores"].get(candidate, 0) / 5
-
-            # Regret is the difference between best possible and current
-            total_regret += best_utility - current_utility
-
-        avg_regret = total_regret / len(all_scores)
-        avg_utility = (
-            sum(utilities[candidate]) / len(utilities[candidate])
-            if utilities[candidate]
-            else 0
-        )
+    candidates, values = build_score_matrix(all_scores)
 
-        regrets.append(
-            {
-                "candidate": candidate,
-                "avg_utility": avg_utility,
-                "avg_regret": avg_regret,
-            }
-        )
-
-    # Sort by average regret (ascending - lower regret is better)
-    regrets.sort(key=lambda x: x["avg_regret"])
+    # Normalize to 0-1 range; unscored candidates count as 0 for regret
+    utilities = values / 5
+    filled = np.nan_to_num(utilities)
+    if len(values):
+        # Regret is the difference between the voter's best candidate and each
+        best_utility = np.nanmax(utilities, axis=1, keepdims=True)
+        avg_regrets = (best_utility - filled).mean(axis=0, dtype=np.float64)
+    else:
+        avg_regrets = np.zeros(len(candidates))
 
-    return {
-        "method": "Bayesian Regret",
-        "winner": regrets[0]["candidate"] if regrets else None,
-        "details": regrets,
-    }
+    return _bayesian_regret_result(candidates, _column_means(utilities), avg_regrets)
 
 
 def run_all_score_voting_methods(all_scores):
     """
     Run all score voting methods and return the results.
+    The score matrix is built once and shared by every method.
     """
+    score_matrix = build_score_matrix(all_scores)
+
     results = {
-        "simple_score": get_simple_score_winner(all_scores),
-        "star_voting": get_star_voting_winner(all_scores),
-        "median_voting": get_median_voting_winner(all_scores),
-        "mean_median_hybrid": get_mean_median_hybrid_winner(all_scores),
-        "variance_based": get_variance_based_winner(all_scores),
-        "score_distribution": get_score_distribution_analysis(all_scores),
-        "bayesian_regret": calculate_bayesian_regret(all_scores),
+        "simple_score": get_simple_score_winner(score_matrix),
+        "star_voting": get_star_voting_winner(score_matrix),
+        "median_voting": get_median_voting_winner(score_matrix),
+        "mean_median_hybrid": get_mean_median_hybrid_winner(score_matrix),
+        "variance_based": get_variance_based_winner(score_matrix),
+        "score_distribution": get_score_distribution_analysis(score_matrix),
+        "bayesian_regret": calculate_bayesian_regret(score_matrix),
     }
 
     return results
+
+
+class ScoreAccumulator:
+    """
+    Streaming aggregation of score ballots in bounded memory.
+
+    Ballots are ingested chunk by chunk and only per-candidate sums, sums of
+    squares, the 0.5-wide SCORE_BINS histograms, a fine histogram for medians
+    and head-to-head counts for the STAR runoff are kept, so memory stays
+    O(C * bins + C^2) however many voters stream through. Accumulators built
+    by different workers can be combined with merge.
+
+    Medians are read off the fine histogram (bin width 0.5 / resolution).
+    They are exact while every score lies on that grid, and interpolated
+    within the bin otherwise (see median_exact). With exact_medians, the
+    count of every distinct score is kept as well and medians are exact
+    whatever the scores; memory then grows with the number of distinct
+    scores, which the simul.py model bounds by its demographic combinations.
+    """
+
+    def __init__(
+        self,
+        candidates: List[str] = None,
+        resolution: int = 50,
+        exact_medians: bool = False,
+    ):
+        num_fine_bins = (len(SCORE_BINS) - 1) * resolution + 1
+        self.resolution = resolution
+        self.candidates = []
+        self.index = {}
+        self.num_ballots = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.sums = np.zeros(0)
+        self.sums_sq = np.zeros(0)
+        self.positive = np.zeros(0, dtype=np.int64)
+        self.best_sum = 0.0
+        self.histograms = np.zeros((0, len(SCORE_BINS) - 1), dtype=np.int64)
+        # The last fine bin holds scores of exactly 5
+        self.fine_histograms = np.zeros((0, num_fine_bins), dtype=np.int64)
+        self.higher = np.zeros((0, 0), dtype=np.int64)
+        self.median_exact = True
+        # Per candidate, sorted distinct float32 scores and their counts
+        self.value_counts = [] if exact_medians else None
+        self._extend(candidates or [])
+
+    def _extend(self, candidates: List[str]) -> List[int]:
+        """Add unseen candidates and return the index of every candidate."""
+        new = [c for c in dict.fromkeys(candidates) if c not in self.index]
+        if new:
+            old, grow = len(self.candidates), len(new)
+            for candidate in new:
+                self.index[candidate] = len(self.candidates)
+                self.candidates.append(candidate)
+
+            def pad(array, axis=0):
+                widths = [(0, 0)] * array.ndim
+                widths[axis] = (0, grow)
+                return np.pad(array, widths)
+
+            self.counts = pad(self.counts)
+            self.sums = pad(self.sums)
+            self.sums_sq = pad(self.sums_sq)
+            self.positive = pad(self.positive)
+            self.histograms = pad(self.histograms)
+            self.fine_histograms = pad(self.fine_histograms)
+            self.higher = pad(pad(self.higher), axis=1)
+            if self.value_counts is not None:
+                self.value_counts.extend(
+                    (np.zeros(0, np.float32), np.zeros(0, np.int64)) for _ in new
+                )
+            # Ballots seen so far left the new candidates unscored, i.e. 0
+            self.higher[:old, old:] = self.positive[:old, None]
+
+        return [self.index[c] for c in candidates]
+
+    def _aligned(self, chunk) -> np.ndarray:
+        candidates, values = build_score_matrix(chunk)
+        columns = self._extend(candidates)
+        if columns == list(range(len(self.candidates))):
+            return values
+
+        aligned = np.full((len(values), len(self.candidates)), np.nan, np.float32)
+        aligned[:, columns] = values
+        return aligned
+
+    def ingest(self, chunk) -> "ScoreAccumulator":
+        """
+        Add a chunk of score ballots.
+        :param chunk: Score ballots in any format accepted by build_score_matrix
+        :return: The accumulator itself
+        """
+        values = self._aligned(chunk)
+        if not len(values):
+            return self
+
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0).astype(np.float64)
+        self.num_ballots += len(values)
+        self.counts += present.sum(axis=0)
+        self.sums += filled.sum(axis=0)
+        self.sums_sq += (filled**2).sum(axis=0)
+        self.positive += (filled > 0).sum(axis=0)
+        self.best_sum += float(np.nanmax(values, axis=1).sum(dtype=np.float64))
+        self.histograms += _column_histograms(values)
+
+        # Fine histogram over [0, 5], one column per candidate
+        scaled = np.clip(filled, 0, 5) * (self.resolution / 0.5)
+        # Scores on the grid may come in as float32, a few 1e-5 of a bin off
+        # it; snap those to their grid point rather than the bin below
+        nearest = np.rint(scaled)
+        on_grid = np.abs(scaled - nearest) <= 1e-3
+        fine_bins = np.where(on_grid, nearest, np.floor(scaled)).astype(np.int64)
+        self.median_exact &= bool(on_grid[present].all())
+        num_fine_bins = self.fine_histograms.shape[1]
+        columns = np.broadcast_to(np.arange(len(self.candidates)), values.shape)
+        self.fine_histograms += np.bincount(
+            (columns * num_fine_bins + fine_bins)[present],
+            minlength=self.fine_histograms.size,
+        ).reshape(self.fine_histograms.shape)
+
+        if self.value_counts is not None:
+            for c in range(len(self.candidates)):
+                column = values[present[:, c], c].astype(np.float32)
+                self._add_value_counts(c, *np.unique(column, return_counts=True))
+
+        # Head-to-head counts for the STAR runoff; unscored counts as 0
+        for i in range(len(self.candidates)):
+            self.higher[i] += np.count_nonzero(filled[:, [i]] > filled, axis=0)
+
+        return self
+
+    def merge(self, other: "ScoreAccumulator") -> "ScoreAccumulator":
+        """
+        Fold another accumulator (e.g. from a worker process) into this one.
+        :return: The accumulator itself
+        """
+        if other.resolution != self.resolution:
+            raise ValueError("Cannot merge accumulators of different resolutions")
+
+        # Candidates are matched by name; either side may have seen extra ones
+        idx = self._extend(other.candidates)
+        self.num_ballots += other.num_ballots
+        self.counts[idx] += other.counts
+        self.sums[idx] += other.sums
+        self.sums_sq[idx] += other.sums_sq
+        self.positive[idx] += other.positive
+        self.best_sum += other.best_sum
+        self.histograms[idx] += other.histograms
+        self.fine_histograms[idx] += other.fine_histograms
+        self.higher[np.ix_(idx, idx)] += other.higher
+        # Candidates other never saw scored 0 on its ballots
+        missing = np.setdiff1d(np.arange(len(self.candidates)), idx)
+        self.higher[np.ix_(idx, missing)] += other.positive[:, None]
+        self.median_exact &= other.median_exact
+        if other.value_counts is None:
+            self.value_counts = None
+        elif self.value_counts is not None:
+            for c, (values, counts) in zip(idx, other.value_counts):
+                self._add_value_counts(c, values, counts)
+        return self
+
+    def _add_value_counts(self, c: int, values: np.ndarray, counts: np.ndarray):
+        old_values, old_counts = self.value_counts[c]
+        merged, inverse = np.unique(
+            np.concatenate([old_values, values]), return_inverse=True
+        )
+        self.value_counts[c] = (
+            merged,
+            np.bincount(
+                inverse,
+                weights=np.concatenate([old_counts, counts]),
+                minlength=len(merged),
+            ).astype(np.int64),
+        )
+
+    def _exact_medians(self) -> np.ndarray:
+        # As _column_medians: mean of the middle order statistics
+        medians = np.zeros(len(self.candidates))
+        for c, (values, counts) in enumerate(self.value_counts):
+            total = int(counts.sum())
+            if not total:
+                continue
+            cumulative = counts.cumsum()
+            upper = total // 2
+            lower = upper if total % 2 else upper - 1
+            low, high = values[np.searchsorted(cumulative, [lower, upper], "right")]
+            medians[c] = (np.float64(low) + high) / 2
+        return medians
+
+    def means(self) -> np.ndarray:
+        return np.divide(
+            self.sums,
+            self.counts,
+            out=np.zeros(len(self.counts)),
+            where=self.counts > 0,
+        )
+
+    def variances(self) -> np.ndarray:
+        mean_squares = np.divide(
+            self.sums_sq,
+            self.counts,
+            out=np.zeros(len(self.counts)),
+            where=self.counts > 0,
+        )
+        means = self.means()
+        return np.maximum(mean_squares - means * means, 0)
+
+    def medians(self) -> np.ndarray:
+        """
+        Per-candidate medians, exact when distinct scores are counted and
+        from the fine histograms otherwise.
+        """
+        if self.value_counts is not None:
+            return self._exact_medians()
+        width = 0.5 / self.resolution
+        histograms = self.fine_histograms
+        cumulative = histograms.cumsum(axis=1)
+        rows = np.arange(len(histograms))
+        top_bin = histograms.shape[1] - 1
+
+        def order_statistic(k):
+            # Value of the k-th smallest score (0-based) of every candidate
+            bins = (cumulative > k[:, None]).argmax(axis=1)
+            if self.median_exact:
+                return bins * width
+            # Spread the scores of a bin evenly across it
+            before = cumulative[rows, bins] - histograms[rows, bins]
+            inside = (k - before + 0.5) / np.maximum(histograms[rows, bins], 1)
+            return np.where(bins == top_bin, 5.0, (bins + inside) * width)
+
+        upper = self.counts // 2
+        lower = np.where(self.counts % 2 == 1, upper, upper - 1)
+        medians = (order_statistic(np.maximum(lower, 0)) + order_statistic(upper)) / 2
+        return np.where(self.counts > 0, medians, 0)
+
+    def results(self) -> dict:
+        """
+        Results of every score voting method over the ballots seen so far,
+        in the same shape as run_all_score_voting_methods.
+        """
+        candidates = self.candidates
+        if not candidates:
+            return run_all_score_voting_methods([])
+
+        means = self.means()
+        medians = self.medians()
+
+        def runoff(first, second):
+            votes1 = self.higher[first, second]
+            votes2 = self.higher[second, first]
+            return votes1, votes2, self.num_ballots - votes1 - votes2, self.num_ballots
+
+        # Regret against each voter's best candidate, normalised to 0-1
+        num_ballots = max(self.num_ballots, 1)
+        avg_regrets = (self.best_sum - self.sums) / 5 / num_ballots
+
+        return {
+            "simple_score": _simple_score_result(candidates, means),
+            "star_voting": _star_result(candidates, means, runoff),
+            "median_voting": _median_result(candidates, medians),
+            "mean_median_hybrid": _mean_median_hybrid_result(
+                candidates, means, medians
+            ),
+            "variance_based": _variance_based_result(
+                candidates, means, self.variances()
+            ),
+            "score_distribution": _score_distribution_result(
+                candidates, self.histograms
+            ),
+            "bayesian_regret": _bayesian_regret_result(
+                candidates, means / 5, avg_regrets
+            ),
+        }
@@ -1,6 +1,7 @@
-import random
 import numpy as np
-from typing import List, Dict, Optional, Union
+from typing import List, Dict, NamedTuple, Optional, Union
+
+from app.utils.rng import RNGLike, as_generator
 
 # --- Define types for clarity ---
 Voter = Dict[str, Union[float, str, Dict[str, float]]]
@@ -110,17 +111,20 @@ age_probabilities = [count / total_population for count in age_data.values()]
 ages = list(age_data.keys())
 
 
-def sample_age():
-    return int(random.choices(ages, weights=age_probabilities, k=1)[0])
+def sample_age(rng: RNGLike = None):
+    rng = as_generator(rng)
+    return int(rng.choice(ages, p=age_probabilities))
 
 
-def sample_region():
-    return np.random.choice(["urban", "suburban", "rural"], p=[0.8, 0.15, 0.05])
+def sample_region(rng: RNGLike = None):
+    rng = as_generator(rng)
+    return rng.choice(["urban", "suburban", "rural"], p=[0.8, 0.15, 0.05])
 
 
-def sample_income():
+def sample_income(rng: RNGLike = None):
+    rng = as_generator(rng)
     # Use a gamma distribution which is better for right-skewed data like income
-    income_score = np.random.gamma(shape=2, scale=0.2)
+    income_score = rng.gamma(shape=2, scale=0.2)
 
     if income_score < 0.3:
         return "low"
@@ -130,23 +134,25 @@ def sample_income():
         return "high"
 
 
-def sample_likelihood_to_vote(age):
+def sample_likelihood_to_vote(age, rng: RNGLike = None):
     # Base turnout: 50% + age effect + income effect
     base = 0.5
     age_effect = min(age / 100, 0.4)  # Older = more likely
-    income_effect = 0.1 if sample_income() == "high" else 0
+    income_effect = 0.1 if sample_income(rng) == "high" else 0
     return base + age_effect + income_effect
 
 
-def sample_political_lean():
+def sample_political_lean(rng: RNGLike = None):
+    rng = as_generator(rng)
     # Mix of two normal distributions (left and right)
-    if np.random.random() < 0.5:
-        return np.random.normal(-0.5, 0.3)  # Left-leaning
+    if rng.random() < 0.5:
+        return rng.normal(-0.5, 0.3)  # Left-leaning
     else:
-        return np.random.normal(0.5, 0.3)  # Right-leaning
+        return rng.normal(0.5, 0.3)  # Right-leaning
 
 
-def sample_employment_status():
+def sample_employment_status(rng: RNGLike = None):
+    rng = as_generator(rng)
     # Probabilities based on typical employment distributions
     probabilities = {
         "employed": 0.6,  # 60% chance
@@ -154,51 +160,49 @@ def sample_employment_status():
         "self_employed": 0.1,  # 10% chance
         "retired": 0.2,  # 20% chance
     }
-    return random.choices(
-        population=list(probabilities.keys()), weights=list(probabilities.values()), k=1
-    )[0]
+    return rng.choice(list(probabilities.keys()), p=list(probabilities.values()))
 
 
-def sample_family_status():
+def sample_family_status(rng: RNGLike = None):
+    rng = as_generator(rng)
     # Probabilities based on typical family structures
     probabilities = {
         "single": 0.3,  # 30% chance
         "with_children": 0.4,  # 40% chance
         "retired": 0.3,  # 30% chance (includes empty-nesters and elderly)
     }
-    return random.choices(
-        population=list(probabilities.keys()), weights=list(probabilities.values()), k=1
-    )[0]
+    return rng.choice(list(probabilities.keys()), p=list(probabilities.values()))
 
 
-def sample_ethnicity_immigration():
+def sample_ethnicity_immigration(rng: RNGLike = None):
+    rng = as_generator(rng)
     # Probabilities based on typical immigration rates in many Western countries
     probabilities = {"native": 0.8, "immigrant": 0.2}  # 80% chance  # 20% chance
-    return random.choices(
-        population=list(probabilities.keys()), weights=list(probabilities.values()), k=1
-    )[0]
+    return rng.choice(list(probabilities.keys()), p=list(probabilities.values()))
 
 
-def sample_religion():
+def sample_religion(rng: RNGLike = None):
+    rng = as_generator(rng)
     # Probabilities based on global religious affiliation trends
     probabilities = {"religious": 0.6, "non_religious": 0.4}  # 60% chance  # 40% chance
-    return random.choices(
-        population=list(probabilities.keys()), weights=list(probabilities.values()), k=1
-    )[0]
+    return rng.choice(list(probabilities.keys()), p=list(probabilities.values()))
 
 
-def sample_gender():
-    return np.random.choice(
+def sample_gender(rng: RNGLike = None):
+    rng = as_generator(rng)
+    return rng.choice(
         ["male", "female"], p=[0.49, 0.51]  # Slightly more females in many populations
     )
 
 
-def sample_education(age: int) -> str:
+def sample_education(age: int, rng: RNGLike = None) -> str:
     """
     Génère un niveau d'éducation en fonction de l'âge du voter.
     Les personnes âgées ont généralement un niveau d'éducation plus bas,
     et les jeunes n'ont pas encore eu le temps d'obtenir des diplômes avancés.
     """
+    rng = as_generator(rng)
+
     # Probabilités de base par niveau d'éducation (France, données approximatives)
     base_probs = {
         "none": 0.1,
@@ -211,23 +215,23 @@ def sample_education(age: int) -> str:
     # Ajustement des probabilités en fonction de l'âge
     if age < 22:  # 18-21 ans (étudiants ou jeunes actifs)
         # Les très jeunes n'ont pas encore eu le temps de faire des études longues
-        return np.random.choice(
+        return rng.choice(
             ["high_school", "bachelor"],
             p=[0.7, 0.3],  # 70% ont seulement le bac, 30% ont commencé un bachelor
         )
     elif age < 25:  # 22-24 ans
         # Certains ont terminé un bachelor, peu ont un master
-        return np.random.choice(
+        return rng.choice(
             ["high_school", "bachelor", "master"], p=[0.3, 0.6, 0.1]
         )
     elif age < 30:  # 25-29 ans
         # Âge où beaucoup terminent leurs études supérieures
-        return np.random.choice(
+        return rng.choice(
             ["high_school", "bachelor", "master", "phd"], p=[0.2, 0.4, 0.35, 0.05]
         )
     elif age < 40:  # 30-39 ans
         # Âge où les gens ont généralement terminé leurs études
-        return np.random.choice(
+        return rng.choice(
             ["high_school", "bachelor", "master", "phd"], p=[0.2, 0.4, 0.3, 0.1]
         )
     elif age < 60:  # 40-59 ans
@@ -253,10 +257,10 @@ def sample_education(age: int) -> str:
     if age >= 40:
         total = sum(adjusted_probs.values())
         normalized_probs = [v / total for v in adjusted_probs.values()]
-        return np.random.choice(list(adjusted_probs.keys()), p=normalized_probs)
+        return rng.choice(list(adjusted_probs.keys()), p=normalized_probs)
 
     # Pour les 30-39 ans, utiliser les probabilités de base
-    return np.random.choice(list(base_probs.keys()), p=list(base_probs.values()))
+    return rng.choice(list(base_probs.keys()), p=list(base_probs.values()))
 
 
 def assign_issue_priorities(
@@ -269,7 +273,9 @@ def assign_issue_priorities(
     family_status,
     ethnicity_immigration,
     religion,
+    rng: RNGLike = None,
 ):
+    rng = as_generator(rng)
     issue_priorities = {
         "economy": 0.5,
         "environment": 0.5,
@@ -298,135 +304,135 @@ def assign_issue_priorities(
 
     # Age influence
     if age < 30:
-        issue_priorities["environment"] = random.uniform(0.7, 1.0)
-        issue_priorities["education"] = random.uniform(0.6, 0.9)
-        issue_priorities["climate_change"] = random.uniform(0.6, 0.9)
-        issue_priorities["gender_equality"] = random.uniform(0.6, 0.9)
-        issue_priorities["public_transport"] = random.uniform(0.5, 0.8)
-        political_lean *= random.uniform(
+        issue_priorities["environment"] = rng.uniform(0.7, 1.0)
+        issue_priorities["education"] = rng.uniform(0.6, 0.9)
+        issue_priorities["climate_change"] = rng.uniform(0.6, 0.9)
+        issue_priorities["gender_equality"] = rng.uniform(0.6, 0.9)
+        issue_priorities["public_transport"] = rng.uniform(0.5, 0.8)
+        political_lean *= rng.uniform(
             0.8, 0.9
         )  # Younger voters tend to be more progressive
     elif age > 60:
-        issue_priorities["healthcare"] = random.uniform(0.7, 1.0)
-        issue_priorities["pensions"] = random.uniform(0.6, 0.9)
-        political_lean *= random.uniform(
+        issue_priorities["healthcare"] = rng.uniform(0.7, 1.0)
+        issue_priorities["pensions"] = rng.uniform(0.6, 0.9)
+        political_lean *= rng.uniform(
             1.1, 1.2
         )  # Older voters tend to be more conservative
     else:
-        issue_priorities["economy"] = random.uniform(0.6, 0.9)
-        issue_priorities["jobs"] = random.uniform(0.5, 0.8)
+        issue_priorities["economy"] = rng.uniform(0.6, 0.9)
+        issue_priorities["jobs"] = rng.uniform(0.5, 0.8)
 
     # Gender influence
     if gender == "female":
-        issue_priorities["healthcare"] *= random.uniform(1.1, 1.3)
-        issue_priorities["education"] *= random.uniform(1.1, 1.2)
-        issue_priorities["gender_equality"] *= random.uniform(1.1, 1.3)
-        issue_priorities["social_welfare"] *= random.uniform(1.0, 1.2)
-        issue_priorities["crime_safety"] *= random.uniform(1.0, 1.2)
-        political_lean *= random.uniform(
+        issue_priorities["healthcare"] *= rng.uniform(1.1, 1.3)
+        issue_priorities["education"] *= rng.uniform(1.1, 1.2)
+        issue_priorities["gender_equality"] *= rng.uniform(1.1, 1.3)
+        issue_priorities["social_welfare"] *= rng.uniform(1.0, 1.2)
+        issue_priorities["crime_safety"] *= rng.uniform(1.0, 1.2)
+        political_lean *= rng.uniform(
             0.8, 0.95
         )  # Females may lean slightly more progressive
     else:
-        issue_priorities["economy"] *= random.uniform(1.1, 1.3)
-        issue_priorities["defense"] *= random.uniform(1.1, 1.3)
-        political_lean *= random.uniform(
+        issue_priorities["economy"] *= rng.uniform(1.1, 1.3)
+        issue_priorities["defense"] *= rng.uniform(1.1, 1.3)
+        political_lean *= rng.uniform(
             1.05, 1.15
         )  # Males may lean slightly more conservative
 
     # Region influence
     if region == "urban":
-        issue_priorities["public_transport"] = random.uniform(0.7, 1.0)
-        issue_priorities["environment"] = random.uniform(0.6, 0.9)
-        issue_priorities["housing"] = random.uniform(0.6, 0.9)
-        issue_priorities["climate_change"] = random.uniform(0.6, 0.9)
+        issue_priorities["public_transport"] = rng.uniform(0.7, 1.0)
+        issue_priorities["environment"] = rng.uniform(0.6, 0.9)
+        issue_priorities["housing"] = rng.uniform(0.6, 0.9)
+        issue_priorities["climate_change"] = rng.uniform(0.6, 0.9)
     elif region == "rural":
-        issue_priorities["agriculture"] = random.uniform(0.7, 1.0)
-        issue_priorities["infrastructure"] = random.uniform(0.6, 0.9)
-        issue_priorities["defense"] = random.uniform(0.6, 0.9)
+        issue_priorities["agriculture"] = rng.uniform(0.7, 1.0)
+        issue_priorities["infrastructure"] = rng.uniform(0.6, 0.9)
+        issue_priorities["defense"] = rng.uniform(0.6, 0.9)
     else:  # suburban
-        issue_priorities["education"] = random.uniform(0.7, 1.0)
-        issue_priorities["taxes"] = random.uniform(0.5, 0.8)
-        issue_priorities["housing"] = random.uniform(0.6, 0.9)
+        issue_priorities["education"] = rng.uniform(0.7, 1.0)
+        issue_priorities["taxes"] = rng.uniform(0.5, 0.8)
+        issue_priorities["housing"] = rng.uniform(0.6, 0.9)
 
     # Education influence
     if education in ["none", "high_school"]:
-        issue_priorities["social_welfare"] *= random.uniform(1.1, 1.4)
-        issue_priorities["economy"] *= random.uniform(1.1, 1.3)
+        issue_priorities["social_welfare"] *= rng.uniform(1.1, 1.4)
+        issue_priorities["economy"] *= rng.uniform(1.1, 1.3)
         if age > 50:
-            political_lean *= random.uniform(
+            political_lean *= rng.uniform(
                 1.05, 1.2
             )  # Less educated older voters tend to be more conservative
     elif education in ["master", "phd"]:
-        issue_priorities["environment"] *= random.uniform(1.1, 1.4)
-        issue_priorities["education"] *= random.uniform(1.2, 1.5)
-        issue_priorities["technology_innovation"] = random.uniform(0.7, 1.0)
-        issue_priorities["climate_change"] *= random.uniform(1.1, 1.4)
-        political_lean *= random.uniform(
+        issue_priorities["environment"] *= rng.uniform(1.1, 1.4)
+        issue_priorities["education"] *= rng.uniform(1.2, 1.5)
+        issue_priorities["technology_innovation"] = rng.uniform(0.7, 1.0)
+        issue_priorities["climate_change"] *= rng.uniform(1.1, 1.4)
+        political_lean *= rng.uniform(
             0.8, 0.95
         )  # More educated voters tend to be more progressive
 
     # Income influence
     if income == "low":
-        issue_priorities["social_welfare"] = random.uniform(0.8, 1.0)
-        issue_priorities["minimum_wage"] = random.uniform(0.7, 0.9)
-        issue_priorities["healthcare"] *= random.uniform(1.1, 1.3)
-        issue_priorities["housing"] = random.uniform(0.7, 1.0)
-        political_lean *= random.uniform(
+        issue_priorities["social_welfare"] = rng.uniform(0.8, 1.0)
+        issue_priorities["minimum_wage"] = rng.uniform(0.7, 0.9)
+        issue_priorities["healthcare"] *= rng.uniform(1.1, 1.3)
+        issue_priorities["housing"] = rng.uniform(0.7, 1.0)
+        political_lean *= rng.uniform(
             0.8, 0.95
         )  # Lower income voters tend to be more progressive
     elif income == "high":
-        issue_priorities["taxes"] = random.uniform(0.7, 1.0)
-        issue_priorities["business_regulation"] = random.uniform(0.5, 0.8)
-        issue_priorities["economy"] *= random.uniform(1.1, 1.3)
-        political_lean *= random.uniform(
+        issue_priorities["taxes"] = rng.uniform(0.7, 1.0)
+        issue_priorities["business_regulation"] = rng.uniform(0.5, 0.8)
+        issue_priorities["economy"] *= rng.uniform(1.1, 1.3)
+        political_lean *= rng.uniform(
             1.05, 1.2
         )  # Higher income voters tend to be more conservative
 
     # Employment status influence
     if employment_status == "unemployed":
-        issue_priorities["social_welfare"] *= random.uniform(1.2, 1.5)
-        issue_priorities["jobs"] = random.uniform(0.8, 1.0)
-        issue_priorities["minimum_wage"] = random.uniform(0.8, 1.0)
-        political_lean *= random.uniform(
+        issue_priorities["social_welfare"] *= rng.uniform(1.2, 1.5)
+        issue_priorities["jobs"] = rng.uniform(0.8, 1.0)
+        issue_priorities["minimum_wage"] = rng.uniform(0.8, 1.0)
+        political_lean *= rng.uniform(
             0.8, 0.95
         )  # Unemployed voters tend to be more progressive
     elif employment_status == "employed":
-        issue_priorities["economy"] *= random.uniform(1.1, 1.3)
-        issue_priorities["taxes"] *= random.uniform(1.0, 1.2)
+        issue_priorities["economy"] *= rng.uniform(1.1, 1.3)
+        issue_priorities["taxes"] *= rng.uniform(1.0, 1.2)
 
     # Family status influence
     if family_status == "with_children":
-        issue_priorities["education"] *= random.uniform(1.2, 1.5)
-        issue_priorities["healthcare"] *= random.uniform(1.1, 1.3)
-        issue_priorities["housing"] *= random.uniform(1.1, 1.3)
+        issue_priorities["education"] *= rng.uniform(1.2, 1.5)
+        issue_priorities["healthcare"] *= rng.uniform(1.1, 1.3)
+        issue_priorities["housing"] *= rng.uniform(1.1, 1.3)
     elif family_status == "single":
-        issue_priorities["social_welfare"] *= random.uniform(1.0, 1.2)
-        issue_priorities["taxes"] *= random.uniform(1.0, 1.2)
+        issue_priorities["social_welfare"] *= rng.uniform(1.0, 1.2)
+        issue_priorities["taxes"] *= rng.uniform(1.0, 1.2)
 
     # Ethnicity/Immigration influence
     if ethnicity_immigration == "immigrant":
-        issue_priorities["immigration"] = random.uniform(0.8, 1.0)
-        issue_priorities["social_welfare"] *= random.uniform(1.1, 1.3)
-        issue_priorities["gender_equality"] *= random.uniform(1.1, 1.3)
-        political_lean *= random.uniform(
+        issue_priorities["immigration"] = rng.uniform(0.8, 1.0)
+        issue_priorities["social_welfare"] *= rng.uniform(1.1, 1.3)
+        issue_priorities["gender_equality"] *= rng.uniform(1.1, 1.3)
+        political_lean *= rng.uniform(
             0.8, 0.95
         )  # Immigrants may lean more progressive
     else:
-        issue_priorities["defense"] *= random.uniform(1.0, 1.2)
-        issue_priorities["immigration"] *= random.uniform(0.8, 1.0)
+        issue_priorities["defense"] *= rng.uniform(1.0, 1.2)
+        issue_priorities["immigration"] *= rng.uniform(0.8, 1.0)
 
     # Religion influence
     if religion == "religious":
-        issue_priorities["gender_equality"] *= random.uniform(0.8, 1.0)
-        issue_priorities["social_welfare"] *= random.uniform(1.0, 1.2)
-        issue_priorities["education"] *= random.uniform(0.9, 1.1)
-        political_lean *= random.uniform(
+        issue_priorities["gender_equality"] *= rng.uniform(0.8, 1.0)
+        issue_priorities["social_welfare"] *= rng.uniform(1.0, 1.2)
+        issue_priorities["education"] *= rng.uniform(0.9, 1.1)
+        political_lean *= rng.uniform(
             1.1, 1.2
         )  # Religious voters tend to be more conservative
     else:
-        issue_priorities["gender_equality"] *= random.uniform(1.1, 1.3)
-        issue_priorities["climate_change"] *= random.uniform(1.0, 1.2)
-        political_lean *= random.uniform(
+        issue_priorities["gender_equality"] *= rng.uniform(1.1, 1.3)
+        issue_priorities["climate_change"] *= rng.uniform(1.0, 1.2)
+        political_lean *= rng.uniform(
             0.8, 0.95
         )  # Non-religious voters tend to be more progressive
 
@@ -434,16 +440,17 @@ def assign_issue_priorities(
 
 
 # --- 1. Generate Voters and Candidates ---
-def create_voter(issues: List[str], voter_id: int) -> Voter:
-    age = sample_age()
-    gender = sample_gender()
-    region = sample_region()
-    income = sample_income()
-    education = sample_education(age)
-    employment_status = sample_employment_status()
-    family_status = sample_family_status()
-    religion = sample_religion()
-    ethnicity_immigration = sample_ethnicity_immigration()
+def create_voter(issues: List[str], voter_id: int, rng: RNGLike = None) -> Voter:
+    rng = as_generator(rng)
+    age = sample_age(rng)
+    gender = sample_gender(rng)
+    region = sample_region(rng)
+    income = sample_income(rng)
+    education = sample_education(age, rng)
+    employment_status = sample_employment_status(rng)
+    family_status = sample_family_status(rng)
+    religion = sample_religion(rng)
+    ethnicity_immigration = sample_ethnicity_immigration(rng)
 
     issue_priorities, political_lean = assign_issue_priorities(
         age,
@@ -455,6 +462,7 @@ def create_voter(issues: List[str], voter_id: int) -> Voter:
         family_status,
         ethnicity_immigration,
         religion,
+        rng,
     )
 
     # Normalize so priorities sum to ~1
@@ -487,22 +495,23 @@ def create_voter(issues: List[str], voter_id: int) -> Voter:
         "religion": religion,
         "political_lean": political_lean,
         "issue_priorities": issue_priorities,
-        "party_loyalty": random.uniform(0, 1),
-        "preferred_party": random.choice(
+        "party_loyalty": rng.uniform(0, 1),
+        "preferred_party": rng.choice(
             ["Green", "Conservative", "Liberal", "Independent"]
         ),
         # More extreme = more likely to vote
         "likelihood_to_vote": float(
-            min(0.95, sample_likelihood_to_vote(age) + education_vote_boost)
+            min(0.95, sample_likelihood_to_vote(age, rng) + education_vote_boost)
         ),
-        "mood": random.uniform(-1, 1),
+        "mood": rng.uniform(-1, 1),
     }
 
 
 def create_candidate(
-    issues: List[str], candidate_id: int, name: str, party: str
+    issues: List[str], candidate_id: int, name: str, party: str, rng: RNGLike = None
 ) -> Dict:
     """Create a candidate with random policies."""
+    rng = as_generator(rng)
     # Map party to a political lean (-1 to 1)
     party_leans = {
         "Green": -0.8,
@@ -517,7 +526,7 @@ def create_candidate(
         # Base policy position influenced by party lean
         base_position = (party_leans.get(party, 0) + 1) / 2  # Convert to 0-1 range
         # Add some variation but keep it close to party line
-        variation = random.uniform(-0.2, 0.2)
+        variation = rng.uniform(-0.2, 0.2)
         policies[issue] = max(0, min(1, base_position + variation))
 
     return {
@@ -526,16 +535,439 @@ def create_candidate(
         "party": party,
         "party_lean": party_leans.get(party, 0),
         "policies": policies,
-        "charisma": random.uniform(0.5, 1.0),  # Candidates generally have some charisma
-        "scandals": random.randint(0, 2),
-        "campaign_funds": random.uniform(100000, 1000000),  # Adding campaign funds
-        "experience": random.randint(1, 20),  # Years of political experience
-        "popularity": random.uniform(0.3, 0.9),  # Base popularity
+        "charisma": rng.uniform(0.5, 1.0),  # Candidates generally have some charisma
+        "scandals": int(rng.integers(0, 3)),
+        "campaign_funds": rng.uniform(100000, 1000000),  # Adding campaign funds
+        "experience": int(rng.integers(1, 21)),  # Years of political experience
+        "popularity": rng.uniform(0.3, 0.9),  # Base popularity
+    }
+
+
+# --- 1b. Batch Voter Generation ---
+REGIONS = ["urban", "suburban", "rural"]
+INCOMES = ["low", "middle", "high"]
+GENDERS = ["male", "female"]
+EDUCATIONS = ["none", "high_school", "bachelor", "master", "phd"]
+EMPLOYMENT_STATUSES = ["employed", "unemployed", "self_employed", "retired"]
+FAMILY_STATUSES = ["single", "with_children", "retired"]
+ETHNICITIES = ["native", "immigrant"]
+RELIGIONS = ["religious", "non_religious"]
+PARTIES = ["Green", "Conservative", "Liberal", "Independent"]
+
+# Education distribution per age bracket (upper bound exclusive), as in
+# sample_education
+EDUCATION_BRACKETS = [22, 25, 30, 40, 60]
+EDUCATION_TABLE = np.array(
+    [
+        [0.0, 0.7, 0.3, 0.0, 0.0],
+        [0.0, 0.3, 0.6, 0.1, 0.0],
+        [0.0, 0.2, 0.4, 0.35, 0.05],
+        [0.0, 0.2, 0.4, 0.3, 0.1],
+        [0.1 * 0.7, 0.4 * 0.9, 0.3 * 1.1, 0.15 * 1.2, 0.05 * 1.3],
+        [0.1 * 2.0, 0.4 * 1.3, 0.3 * 0.7, 0.15 * 0.5, 0.05 * 0.3],
+    ]
+)
+EDUCATION_TABLE /= EDUCATION_TABLE.sum(axis=1, keepdims=True)
+
+EDUCATION_VOTE_BOOST = np.array([0.0, 0.05, 0.1, 0.15, 0.2])
+
+# Categorical columns of a VoterPopulation and their category lists
+VOTER_CATEGORIES = {
+    "region": REGIONS,
+    "income": INCOMES,
+    "gender": GENDERS,
+    "education": EDUCATIONS,
+    "employment_status": EMPLOYMENT_STATUSES,
+    "family_status": FAMILY_STATUSES,
+    "ethnicity_immigration": ETHNICITIES,
+    "religion": RELIGIONS,
+    "preferred_party": PARTIES,
+}
+
+
+class VoterPopulation:
+    """
+    Columnar voter population.
+
+    Categorical attributes are stored as integer codes into the lists in
+    VOTER_CATEGORIES, numeric attributes as float arrays, and issue priorities
+    as an (N x len(issues)) matrix in the order of the module-level issues
+    list, with NaN for issues a voter has no priority on. to_dicts gives the
+    same voter dictionaries as create_voter.
+    """
+
+    def __init__(self, ids: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.ids = ids
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def labels(self, name: str) -> np.ndarray:
+        """Decoded values of a categorical column."""
+        return np.asarray(VOTER_CATEGORIES[name], dtype=object)[self.columns[name]]
+
+    def priority_matrix(self, issue_list: List[str] = issues) -> np.ndarray:
+        """Dense (N x len(issue_list)) priorities, 0 where a voter has none."""
+        return _select_issues(
+            np.nan_to_num(self.columns["issue_priorities"]), issue_list
+        )
+
+    def to_dicts(self) -> List[Voter]:
+        """Voter dictionaries in the create_voter format."""
+        decoded = {
+            name: self.labels(name).tolist() if name in VOTER_CATEGORIES
+            # Plain Python numbers for JSON
+            else self.columns[name].tolist()
+            for name in (
+                "age",
+                "region",
+                "income",
+                "gender",
+                "education",
+                "employment_status",
+                "family_status",
+                "ethnicity_immigration",
+                "religion",
+                "political_lean",
+                "party_loyalty",
+                "preferred_party",
+                "likelihood_to_vote",
+                "mood",
+            )
+        }
+        priorities = self.columns["issue_priorities"].tolist()
+
+        names = list(decoded)
+        rows = zip(self.ids.tolist(), *decoded.values())
+        voters = []
+        for row, (voter_id, *values) in enumerate(rows):
+            voter = {"id": voter_id, **dict(zip(names, values))}
+            voter["issue_priorities"] = {
+                issue: value
+                for issue, value in zip(issues, priorities[row])
+                if value == value  # skip NaN
+            }
+            voters.append(voter)
+        return voters
+
+
+def _issue_priority_matrix(population: dict, rng: np.random.Generator):
+    """
+    Vectorised assign_issue_priorities over a whole population.
+    :return: (N x len(issues)) priority matrix and political lean array
+    """
+    num_voters = len(population["age"])
+    column = {issue: i for i, issue in enumerate(issues)}
+    priorities = np.full((num_voters, len(issues)), 0.5)
+    # "jobs" only gets a priority from the middle-age or unemployed branches
+    priorities[:, column["jobs"]] = np.nan
+    political_lean = np.ones(num_voters)
+
+    def draw(mask, low, high):
+        return rng.uniform(low, high, int(np.count_nonzero(mask)))
+
+    def assign(mask, issue, low, high):
+        priorities[mask, column[issue]] = draw(mask, low, high)
+
+    def scale(mask, issue, low, high):
+        priorities[mask, column[issue]] *= draw(mask, low, high)
+
+    def lean(mask, low, high):
+        political_lean[mask] *= draw(mask, low, high)
+
+    def code(name, value):
+        return population[name] == VOTER_CATEGORIES[name].index(value)
+
+    age = population["age"]
+
+    # Age influence
+    young, old = age < 30, age > 60
+    middle = ~young & ~old
+    assign(young, "environment", 0.7, 1.0)
+    assign(young, "education", 0.6, 0.9)
+    assign(young, "climate_change", 0.6, 0.9)
+    assign(young, "gender_equality", 0.6, 0.9)
+    assign(young, "public_transport", 0.5, 0.8)
+    lean(young, 0.8, 0.9)
+    assign(old, "healthcare", 0.7, 1.0)
+    assign(old, "pensions", 0.6, 0.9)
+    lean(old, 1.1, 1.2)
+    assign(middle, "economy", 0.6, 0.9)
+    assign(middle, "jobs", 0.5, 0.8)
+
+    # Gender influence
+    female = code("gender", "female")
+    scale(female, "healthcare", 1.1, 1.3)
+    scale(female, "education", 1.1, 1.2)
+    scale(female, "gender_equality", 1.1, 1.3)
+    scale(female, "social_welfare", 1.0, 1.2)
+    scale(female, "crime_safety", 1.0, 1.2)
+    lean(female, 0.8, 0.95)
+    scale(~female, "economy", 1.1, 1.3)
+    scale(~female, "defense", 1.1, 1.3)
+    lean(~female, 1.05, 1.15)
+
+    # Region influence
+    urban, rural = code("region", "urban"), code("region", "rural")
+    suburban = ~urban & ~rural
+    assign(urban, "public_transport", 0.7, 1.0)
+    assign(urban, "environment", 0.6, 0.9)
+    assign(urban, "housing", 0.6, 0.9)
+    assign(urban, "climate_change", 0.6, 0.9)
+    assign(rural, "agriculture", 0.7, 1.0)
+    assign(rural, "infrastructure", 0.6, 0.9)
+    assign(rural, "defense", 0.6, 0.9)
+    assign(suburban, "education", 0.7, 1.0)
+    assign(suburban, "taxes", 0.5, 0.8)
+    assign(suburban, "housing", 0.6, 0.9)
+
+    # Education influence
+    low_education = code("education", "none") | code("education", "high_school")
+    high_education = code("education", "master") | code("education", "phd")
+    scale(low_education, "social_welfare", 1.1, 1.4)
+    scale(low_education, "economy", 1.1, 1.3)
+    lean(low_education & (age > 50), 1.05, 1.2)
+    scale(high_education, "environment", 1.1, 1.4)
+    scale(high_education, "education", 1.2, 1.5)
+    assign(high_education, "technology_innovation", 0.7, 1.0)
+    scale(high_education, "climate_change", 1.1, 1.4)
+    lean(high_education, 0.8, 0.95)
+
+    # Income influence
+    low_income, high_income = code("income", "low"), code("income", "high")
+    assign(low_income, "social_welfare", 0.8, 1.0)
+    assign(low_income, "minimum_wage", 0.7, 0.9)
+    scale(low_income, "healthcare", 1.1, 1.3)
+    assign(low_income, "housing", 0.7, 1.0)
+    lean(low_income, 0.8, 0.95)
+    assign(high_income, "taxes", 0.7, 1.0)
+    assign(high_income, "business_regulation", 0.5, 0.8)
+    scale(high_income, "economy", 1.1, 1.3)
+    lean(high_income, 1.05, 1.2)
+
+    # Employment status influence
+    unemployed = code("employment_status", "unemployed")
+    employed = code("employment_status", "employed")
+    scale(unemployed, "social_welfare", 1.2, 1.5)
+    assign(unemployed, "jobs", 0.8, 1.0)
+    assign(unemployed, "minimum_wage", 0.8, 1.0)
+    lean(unemployed, 0.8, 0.95)
+    scale(employed, "economy", 1.1, 1.3)
+    scale(employed, "taxes", 1.0, 1.2)
+
+    # Family status influence
+    with_children = code("family_status", "with_children")
+    single = code("family_status", "single")
+    scale(with_children, "education", 1.2, 1.5)
+    scale(with_children, "healthcare", 1.1, 1.3)
+    scale(with_children, "housing", 1.1, 1.3)
+    scale(single, "social_welfare", 1.0, 1.2)
+    scale(single, "taxes", 1.0, 1.2)
+
+    # Ethnicity/Immigration influence
+    immigrant = code("ethnicity_immigration", "immigrant")
+    assign(immigrant, "immigration", 0.8, 1.0)
+    scale(immigrant, "social_welfare", 1.1, 1.3)
+    scale(immigrant, "gender_equality", 1.1, 1.3)
+    lean(immigrant, 0.8, 0.95)
+    scale(~immigrant, "defense", 1.0, 1.2)
+    scale(~immigrant, "immigration", 0.8, 1.0)
+
+    # Religion influence
+    religious = code("religion", "religious")
+    scale(religious, "gender_equality", 0.8, 1.0)
+    scale(religious, "social_welfare", 1.0, 1.2)
+    scale(religious, "education", 0.9, 1.1)
+    lean(religious, 1.1, 1.2)
+    scale(~religious, "gender_equality", 1.1, 1.3)
+    scale(~religious, "climate_change", 1.0, 1.2)
+    lean(~religious, 0.8, 0.95)
+
+    return priorities, political_lean
+
+
+def _income_codes(num_voters: int, rng: np.random.Generator) -> np.ndarray:
+    # Same gamma draw and thresholds as sample_income
+    income_score = rng.gamma(shape=2, scale=0.2, size=num_voters)
+    return np.searchsorted([0.3, 0.7], income_score, side="right")
+
+
+def generate_voters(
+    num_voters: int, rng: RNGLike = None, start_id: int = 0
+) -> VoterPopulation:
+    """
+    Generate a voter population in one pass, drawing every attribute for all
+    voters at once. Distributions match create_voter.
+    :param num_voters: Number of voters to generate
+    :param rng: Seed or numpy Generator (default: fresh entropy)
+    :param start_id: id of the first voter
+    :return: A VoterPopulation
+    """
+    rng = as_generator(rng)
+
+    def categorical(probabilities):
+        return rng.choice(len(probabilities), size=num_voters, p=probabilities)
+
+    age = np.asarray(ages)[categorical(age_probabilities)]
+    population = {
+        "age": age,
+        "gender": categorical([0.49, 0.51]),
+        "region": categorical([0.8, 0.15, 0.05]),
+        "income": _income_codes(num_voters, rng),
     }
 
+    # Education conditional on age bracket, by inverse CDF
+    cumulative = EDUCATION_TABLE.cumsum(axis=1)[
+        np.searchsorted(EDUCATION_BRACKETS, age, side="right")
+    ]
+    population["education"] = np.minimum(
+        (rng.random(num_voters)[:, None] >= cumulative).sum(axis=1),
+        len(EDUCATIONS) - 1,
+    )
+    population["employment_status"] = categorical([0.6, 0.1, 0.1, 0.2])
+    population["family_status"] = categorical([0.3, 0.4, 0.3])
+    population["religion"] = categorical([0.6, 0.4])
+    population["ethnicity_immigration"] = categorical([0.8, 0.2])
+
+    priorities, political_lean = _issue_priority_matrix(population, rng)
+    # Normalize so priorities sum to ~1
+    priorities /= np.nansum(priorities, axis=1, keepdims=True)
+
+    # sample_likelihood_to_vote draws its own income, independent of the
+    # voter's income attribute
+    likelihood = 0.5 + np.minimum(age / 100, 0.4)
+    likelihood += np.where(_income_codes(num_voters, rng) == 2, 0.1, 0)
+    education = population["education"]
+    likelihood += EDUCATION_VOTE_BOOST[education]
+    likelihood += np.where((age > 60) & (education >= 3), 0.1, 0)
+
+    population.update(
+        {
+            "political_lean": political_lean,
+            "issue_priorities": priorities,
+            "party_loyalty": rng.uniform(0, 1, num_voters),
+            "preferred_party": categorical([0.25] * 4),
+            "likelihood_to_vote": np.minimum(0.95, likelihood),
+            "mood": rng.uniform(-1, 1, num_voters),
+        }
+    )
+    ids = np.arange(start_id, start_id + num_voters)
+    return VoterPopulation(ids, population)
+
+
+# --- 1c. Issue Matrices ---
+# Fixed column index of the issue matrices, from the module-level issues list
+ISSUE_INDEX = {issue: i for i, issue in enumerate(issues)}
+
+
+def _select_issues(matrix: np.ndarray, issue_list: List[str]) -> np.ndarray:
+    """Columns of an ISSUE_INDEX matrix for issue_list; 0 for unknown issues."""
+    if list(issue_list) == issues:
+        return matrix
+    selected = np.zeros((len(matrix), len(issue_list)))
+    for col, issue in enumerate(issue_list):
+        if issue in ISSUE_INDEX:
+            selected[:, col] = matrix[:, ISSUE_INDEX[issue]]
+    return selected
+
+
+def _dict_matrix(rows: List[Dict[str, float]], issue_list: List[str]) -> np.ndarray:
+    """Dense (len(rows) x len(issue_list)) matrix of per-issue dicts."""
+    matrix = np.zeros((len(rows), len(issue_list)))
+    for col, issue in enumerate(issue_list):
+        matrix[:, col] = [row.get(issue, 0) for row in rows]
+    return matrix
+
+
+class CandidateSet:
+    """
+    Columnar candidate set.
+
+    Holds the candidate dictionaries as given (returned unchanged by
+    to_dicts) alongside numeric attribute arrays and a dense
+    (C x len(issues)) policy matrix in ISSUE_INDEX order, 0 where a
+    candidate has no policy.
+    """
+
+    def __init__(self, candidates: List[Candidate]):
+        self.records = list(candidates)
+        self.ids = [candidate.get("id") for candidate in self.records]
+        self.names = [candidate.get("name") for candidate in self.records]
+        self.party_lean = np.array(
+            [candidate.get("party_lean", 0) for candidate in self.records], dtype=float
+        )
+        self.charisma = np.array(
+            [candidate["charisma"] for candidate in self.records], dtype=float
+        )
+        self.scandals = np.array(
+            [candidate["scandals"] for candidate in self.records], dtype=float
+        )
+        self.policies = _dict_matrix(
+            [candidate["policies"] for candidate in self.records], issues
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def policy_matrix(self, issue_list: List[str] = issues) -> np.ndarray:
+        """Dense (C x len(issue_list)) policies, 0 where a candidate has none."""
+        if all(issue in ISSUE_INDEX for issue in issue_list):
+            return _select_issues(self.policies, issue_list)
+        return _dict_matrix(
+            [candidate["policies"] for candidate in self.records], issue_list
+        )
+
+    def to_dicts(self) -> List[Candidate]:
+        return self.records
+
+
+def priority_matrix(voters, issue_list: List[str] = issues) -> np.ndarray:
+    """
+    Dense voter issue priorities.
+    :param voters: A VoterPopulation or a list of voter dictionaries
+    :param issue_list: Issues, one per column (default: the issues list)
+    :return: (N x len(issue_list)) array, 0 where a voter has no priority
+    """
+    if isinstance(voters, VoterPopulation):
+        return voters.priority_matrix(issue_list)
+    return _dict_matrix([voter["issue_priorities"] for voter in voters], issue_list)
+
+
+def policy_matrix(candidates, issue_list: List[str] = issues) -> np.ndarray:
+    """
+    Dense candidate policies.
+    :param candidates: A CandidateSet or a list of candidate dictionaries
+    :param issue_list: Issues, one per column (default: the issues list)
+    :return: (C x len(issue_list)) array, 0 where a candidate has no policy
+    """
+    if isinstance(candidates, CandidateSet):
+        return candidates.policy_matrix(issue_list)
+    return _dict_matrix(
+        [candidate["policies"] for candidate in candidates], issue_list
+    )
+
+
+def issue_alignment(voters, candidates, issue_list: List[str] = issues) -> np.ndarray:
+    """
+    Issue alignment of every voter-candidate pair in one matrix multiply:
+    sum over issue_list of voter priority times candidate policy.
+    :return: (N x C) array
+    """
+    priorities = priority_matrix(voters, issue_list)
+    return priorities @ policy_matrix(candidates, issue_list).T
+
 
 # --- 2. Utility Calculation ---
-def calculate_utility(voter: Dict, candidate: Dict, issues: List[str]) -> Dict:
+def calculate_utility(
+    voter: Dict, candidate: Dict, issues: List[str], rng: RNGLike = None
+) -> Dict:
     """
     Calculate the utility score for a voter-candidate pair.
     Returns a dictionary with the utility score and its breakdown.
@@ -575,7 +1007,8 @@ def calculate_utility(voter: Dict, candidate: Dict, issues: List[str]) -> Dict:
     )
 
     # Determine if voter will vote for this candidate
-    will_vote = random.random() < voter["likelihood_to_vote"] and utility > 0.3
+    draw = as_generator(rng).random()
+    will_vote = draw < voter["likelihood_to_vote"] and utility > 0.3
 
     return {
         "voter_id": voter["id"],
@@ -593,25 +1026,184 @@ def calculate_utility(voter: Dict, candidate: Dict, issues: List[str]) -> Dict:
     }
 
 
+class UtilityMatrix(NamedTuple):
+    """
+    Utilities of every voter-candidate pair, as calculate_utility computes
+    them one pair at a time. Every array is (voters x candidates); the
+    breakdown components add up to utility with the weights of
+    calculate_utility (gender_bonus is already included in issue_score).
+    """
+
+    voter_ids: list
+    candidate_ids: list
+    utility: np.ndarray
+    will_vote: np.ndarray
+    issue_score: np.ndarray
+    loyalty_bonus: np.ndarray
+    charisma_effect: np.ndarray
+    scandal_penalty: np.ndarray
+    mood_effect: np.ndarray
+    gender_bonus: np.ndarray
+
+    def results(self) -> List[Dict]:
+        """Per-pair results in the calculate_utility format, voter by voter."""
+        components = {
+            name: np.round(getattr(self, name), 4).ravel().tolist()
+            for name in (
+                "issue_score",
+                "loyalty_bonus",
+                "charisma_effect",
+                "scandal_penalty",
+                "mood_effect",
+                "gender_bonus",
+            )
+        }
+        utility = np.round(self.utility, 4).ravel().tolist()
+        will_vote = self.will_vote.ravel().tolist()
+
+        results = []
+        pairs = (
+            (voter_id, candidate_id)
+            for voter_id in self.voter_ids
+            for candidate_id in self.candidate_ids
+        )
+        for k, (voter_id, candidate_id) in enumerate(pairs):
+            results.append(
+                {
+                    "voter_id": voter_id,
+                    "candidate_id": candidate_id,
+                    "utility": utility[k],
+                    "will_vote": will_vote[k],
+                    "breakdown": {
+                        name: values[k] for name, values in components.items()
+                    },
+                }
+            )
+        return results
+
+
+def calculate_utility_matrix(
+    voters,
+    candidates,
+    issues: List[str] = issues,
+    rng: RNGLike = None,
+) -> UtilityMatrix:
+    """
+    Calculate the utility of every voter-candidate pair at once.
+    :param voters: A VoterPopulation or a list of voter dictionaries
+    :param candidates: A CandidateSet or a list of candidate dictionaries
+    :param issues: Issues to score alignment on
+    :param rng: Seed or numpy Generator for the will_vote draws
+    :return: A UtilityMatrix
+    """
+    rng = as_generator(rng)
+    if not isinstance(candidates, CandidateSet):
+        candidates = CandidateSet(candidates)
+
+    if isinstance(voters, VoterPopulation):
+        voter_ids = voters.ids.tolist()
+        female = voters.gender == GENDERS.index("female")
+        political_lean = voters.political_lean
+        party_loyalty = voters.party_loyalty
+        mood = voters.mood
+        likelihood_to_vote = voters.likelihood_to_vote
+    else:
+        voter_ids = [voter["id"] for voter in voters]
+        female = np.array([voter["gender"] == "female" for voter in voters])
+        political_lean, party_loyalty, mood, likelihood_to_vote = (
+            np.array([voter[name] for voter in voters], dtype=float)
+            for name in (
+                "political_lean",
+                "party_loyalty",
+                "mood",
+                "likelihood_to_vote",
+            )
+        )
+    shape = (len(voter_ids), len(candidates))
+
+    # Issue alignment
+    issue_score = issue_alignment(voters, candidates, issues)
+
+    # Gender-specific bonus
+    has_gender_policy = np.array(
+        ["gender_equality" in c["policies"] for c in candidates.records], dtype=bool
+    )
+    gender_policy = candidates.policy_matrix(["gender_equality"])[:, 0]
+    gender_bonus = np.where(
+        female[:, None] & has_gender_policy, 0.1 * gender_policy, 0.0
+    )
+    issue_score += gender_bonus
+
+    # Party loyalty
+    party_match = 1 - np.abs(political_lean[:, None] - candidates.party_lean)
+    loyalty_bonus = party_loyalty[:, None] * party_match
+
+    # Charisma and scandals (non-linear effect)
+    charisma_effect = np.broadcast_to(candidates.charisma, shape)
+    scandal_penalty = -0.3 * candidates.scandals
+    # Bigger penalty if low charisma
+    scandal_penalty = np.where(
+        candidates.charisma < 0.5, scandal_penalty * 1.5, scandal_penalty
+    )
+    scandal_penalty = np.broadcast_to(scandal_penalty, shape)
+
+    # Mood effect
+    mood_effect = mood[:, None] * 0.1 * (1 - candidates.scandals)
+
+    # Combine into utility
+    utility = (
+        0.6 * issue_score
+        + 0.2 * loyalty_bonus
+        + 0.15 * charisma_effect
+        + scandal_penalty
+        + mood_effect
+    )
+
+    # Determine if each voter will vote for each candidate
+    will_vote = (rng.random(shape) < likelihood_to_vote[:, None]) & (utility > 0.3)
+
+    return UtilityMatrix(
+        voter_ids,
+        list(candidates.ids),
+        utility,
+        will_vote,
+        issue_score,
+        loyalty_bonus,
+        charisma_effect,
+        scandal_penalty,
+        mood_effect,
+        gender_bonus,
+    )
+
+
 # --- 3. Voting Methods ---
+def _utilities(voter, candidates, issues, rng) -> Dict[str, float]:
+    return {
+        c["name"]: calculate_utility(voter, c, issues, rng)["utility"]
+        for c in candidates
+    }
+
+
 def vote_plurality(
-    voter: Voter, candidates: List[Candidate], issues: List[str]
+    voter: Voter, candidates: List[Candidate], issues: List[str], rng: RNGLike = None
 ) -> Optional[str]:
-    utilities = {c["name"]: calculate_utility(voter, c, issues) for c in candidates}
+    utilities = _utilities(voter, candidates, issues, as_generator(rng))
     max_utility = max(utilities.values())
     return max(utilities, key=utilities.get) if max_utility > 0.3 else None
 
 
 def vote_ranked(
-    voter: Voter, candidates: List[Candidate], issues: List[str]
+    voter: Voter, candidates: List[Candidate], issues: List[str], rng: RNGLike = None
 ) -> List[str]:
-    return sorted(candidates, key=lambda c: -calculate_utility(voter, c, issues))
+    utilities = _utilities(voter, candidates, issues, as_generator(rng))
+    return sorted(candidates, key=lambda c: -utilities[c["name"]])
 
 
 def vote_score(
-    voter: Voter, candidates: List[Candidate], issues: List[str]
+    voter: Voter, candidates: List[Candidate], issues: List[str], rng: RNGLike = None
 ) -> Dict[str, int]:
-    return {c["name"]: int(5 * calculate_utility(voter, c, issues)) for c in candidates}
+    utilities = _utilities(voter, candidates, issues, as_generator(rng))
+    return {name: int(5 * utility) for name, utility in utilities.items()}
 
 
 def simulate_vote(
@@ -619,39 +1211,46 @@ def simulate_vote(
     candidates: List[Candidate],
     issues: List[str],
     method: str = "plurality",
+    rng: RNGLike = None,
 ) -> Union[Optional[str], List[str], Dict[str, int]]:
-    if random.random() > voter["likelihood_to_vote"]:
+    rng = as_generator(rng)
+    if rng.random() > voter["likelihood_to_vote"]:
         return None
     if method == "plurality":
-        return vote_plurality(voter, candidates, issues)
+        return vote_plurality(voter, candidates, issues, rng)
     elif method == "ranked":
-        return [c["name"] for c in vote_ranked(voter, candidates, issues)]
+        return [c["name"] for c in vote_ranked(voter, candidates, issues, rng)]
     elif method == "score":
-        return vote_score(voter, candidates, issues)
+        return vote_score(voter, candidates, issues, rng)
     else:
         return None
 
 
 # --- 4. Run Simulation ---
 def run_simulation(
-    num_voters: int = 1000, num_candidates: int = 3, method: str = "plurality"
+    num_voters: int = 1000,
+    num_candidates: int = 3,
+    method: str = "plurality",
+    rng: RNGLike = None,
 ):
+    rng = as_generator(rng)
     issues = ["economy", "environment", "healthcare"]
-    voters = [create_voter(issues) for _ in range(num_voters)]
+    voters = [create_voter(issues, i, rng) for i in range(num_voters)]
     candidates = [
-        create_candidate(issues, f"Candidate {i+1}", party)
+        create_candidate(issues, i, f"Candidate {i+1}", party, rng)
         for i, party in enumerate(["Green", "Conservative", "Liberal"])
     ]
 
     results = []
     for voter in voters:
-        vote = simulate_vote(voter, candidates, issues, method)
+        vote = simulate_vote(voter, candidates, issues, method, rng)
         results.append(
             {
                 "voter": voter,
                 "vote": vote,
                 "utilities": {
-                    c["name"]: calculate_utility(voter, c, issues) for c in candidates
+                    c["name"]: calculate_utility(voter, c, issues, rng)
+                    for c in candidates
                 },
             }
         )
@@ -34,6 +34,49 @@ class Config:
     # Flask-CORS configuration
     CORS_HEADERS = 'Content-Type'
 
+    # Simulation process pool size and voters per chunk; results depend on
+    # the chunk size but not on the number of workers
+    SIMULATION_WORKERS = int(
+        os.environ.get('SIMULATION_WORKERS', os.cpu_count() or 1))
+    SIMULATION_CHUNK_SIZE = int(
+        os.environ.get('SIMULATION_CHUNK_SIZE', 100000))
+
+    # Background simulation jobs: 'redis' (falling back to an in-process
+    # store when Redis is down) or 'memory'; results are kept for
+    # SIMULATION_JOB_TTL seconds
+    SIMULATION_JOB_STORE = os.environ.get('SIMULATION_JOB_STORE', 'redis')
+    SIMULATION_JOB_TTL = int(os.environ.get('SIMULATION_JOB_TTL', 3600))
+    SIMULATION_MAX_JOBS = int(os.environ.get('SIMULATION_MAX_JOBS', 2))
+    SIMULATION_MAX_QUEUED_JOBS = int(
+        os.environ.get('SIMULATION_MAX_QUEUED_JOBS', 8))
+
+    # Cache of seeded simulation results, in Redis (run it with
+    # maxmemory-policy allkeys-lru) or an in-process LRU when Redis is down
+    SIMULATION_CACHE_ENABLED = True
+    SIMULATION_CACHE_STORE = os.environ.get('SIMULATION_CACHE_STORE', 'redis')
+    SIMULATION_CACHE_TTL = int(os.environ.get('SIMULATION_CACHE_TTL', 86400))
+    SIMULATION_CACHE_MAX_ENTRIES = 128
+
+    # Largest agent-based runs accepted by /simulations/agent_based
+    SIMULATION_AGENT_MAX_ELECTORS = int(
+        os.environ.get('SIMULATION_AGENT_MAX_ELECTORS', 5000000))
+    SIMULATION_AGENT_MAX_STEPS = int(
+        os.environ.get('SIMULATION_AGENT_MAX_STEPS', 10000))
+    # Largest mean_degree, k or m of a network, and largest num_electors
+    # times that degree, which bounds the memory taken to generate it
+    SIMULATION_AGENT_MAX_DEGREE = int(
+        os.environ.get('SIMULATION_AGENT_MAX_DEGREE', 1000))
+    SIMULATION_AGENT_MAX_EDGES = int(
+        os.environ.get('SIMULATION_AGENT_MAX_EDGES', 50000000))
+
+    # Seeded interaction graphs of the agent-based model can be cached in
+    # this directory as .npz files and memory-mapped. The cache is off
+    # unless a directory is set, and holds at most
+    # SIMULATION_GRAPH_CACHE_MAX_BYTES, least recently used graphs first out
+    SIMULATION_GRAPH_CACHE_DIR = os.environ.get('SIMULATION_GRAPH_CACHE_DIR')
+    SIMULATION_GRAPH_CACHE_MAX_BYTES = int(
+        os.environ.get('SIMULATION_GRAPH_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+
     # Other configurations
     DEBUG = os.environ.get('DEBUG') or True
 
@@ -49,6 +92,9 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'your_default_secret_key'
     JWT_VERIFY_SUB = False
+    SIMULATION_WORKERS = 1
+    SIMULATION_JOB_STORE = 'memory'
+    SIMULATION_CACHE_STORE = 'memory'
 
 
 class ProductionConfig(Config):
@@ -0,0 +1,276 @@
+# tests/test_agent_based_model.py
+import numpy as np
+import pytest
+from app.simulation.agent_based_model import (
+    distribution_changes,
+    load_checkpoint,
+    simulate_election,
+    simulate_opinion_dynamics,
+)
+from app.simulation.network_topology import from_edges, watts_strogatz
+
+MATRIX = [
+    [0.1, 0.2, 0.3],
+    [0.2, 0.1, 0.4],
+    [0.3, 0.4, 0.1],
+]
+
+
+@pytest.mark.parametrize('update', ['synchronous', 'asynchronous'])
+def test_counts_are_conserved(update):
+    trajectory = simulate_opinion_dynamics(5000, 3, MATRIX, 20, 7, update=update)
+    assert trajectory.counts.shape == (21, 3)
+    assert (trajectory.counts.sum(axis=1) == 5000).all()
+    assert trajectory.counts[-1].tolist() == np.bincount(
+        trajectory.preferences, minlength=3
+    ).tolist()
+
+
+@pytest.mark.parametrize('update', ['synchronous', 'asynchronous'])
+def test_seed_reproducibility(update):
+    first = simulate_opinion_dynamics(2000, 3, MATRIX, 10, 42, update=update)
+    second = simulate_opinion_dynamics(2000, 3, MATRIX, 10, 42, update=update)
+    assert (first.counts == second.counts).all()
+
+
+def test_zero_influence_keeps_preferences():
+    trajectory = simulate_opinion_dynamics(1000, 4, np.zeros((4, 4)), 5, 1)
+    assert (trajectory.counts == trajectory.counts[0]).all()
+
+
+def test_full_influence_copies_a_random_elector():
+    # Every elector adopts a preference drawn from the previous step, so
+    # a choice nobody holds can never come back
+    trajectory = simulate_opinion_dynamics(
+        1000, 3, np.ones((3, 3)), 5, 3, initial_distribution=[1, 1, 0]
+    )
+    assert (trajectory.counts[:, 2] == 0).all()
+    assert (trajectory.counts.sum(axis=1) == 1000).all()
+
+
+def test_simulate_election_returns_final_counts():
+    counts = simulate_election(1000, 3, np.array(MATRIX), 10, 5)
+    assert isinstance(counts, list)
+    assert sum(counts) == 1000
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'influence_matrix': [[0.1, 0.2], [0.3, 0.4]]},
+    {'influence_matrix': [[1.5] * 3] * 3},
+    {'update': 'parallel'},
+    {'num_electors': 0},
+    {'initial_distribution': [1, 1]},
+])
+def test_invalid_arguments(kwargs):
+    arguments = dict(
+        num_electors=100, num_choices=3, influence_matrix=MATRIX, num_steps=2
+    )
+    arguments.update(kwargs)
+    with pytest.raises(ValueError):
+        simulate_opinion_dynamics(**arguments)
+
+
+
+def test_distribution_changes():
+    counts = np.array([[50, 50], [60, 40], [60, 40]])
+    assert distribution_changes(counts).tolist() == [0.1, 0.0]
+
+
+def test_early_stopping_on_convergence():
+    # Without influence nothing ever changes, so the run stops after
+    # patience quiet steps
+    trajectory = simulate_opinion_dynamics(
+        1000, 3, np.zeros((3, 3)), 100, 1, tolerance=0, patience=3
+    )
+    assert trajectory.converged
+    assert trajectory.steps == 3
+    assert trajectory.counts.shape == (4, 3)
+
+    trajectory = simulate_opinion_dynamics(1000, 3, MATRIX, 20, 1, tolerance=0)
+    assert not trajectory.converged
+    assert trajectory.steps == 20
+
+
+def test_counts_grow_with_the_steps_executed():
+    # num_steps only bounds the run; nothing is allocated for it up front
+    trajectory = simulate_opinion_dynamics(
+        100, 2, np.zeros((2, 2)), 10**12, 1, tolerance=0
+    )
+    assert trajectory.steps == 1
+
+
+@pytest.mark.parametrize('update', ['synchronous', 'asynchronous'])
+def test_resumed_run_matches_unbroken_run(tmp_path, update):
+    path = str(tmp_path / 'run.npz')
+    arguments = dict(
+        num_electors=2000, num_choices=3, influence_matrix=MATRIX, update=update
+    )
+    unbroken = simulate_opinion_dynamics(num_steps=12, rng=8, **arguments)
+
+    first = simulate_opinion_dynamics(
+        num_steps=5, rng=8, checkpoint_path=path, **arguments
+    )
+    assert load_checkpoint(path)[0].steps == 5
+    resumed = simulate_opinion_dynamics(
+        num_steps=12, resume_from=path, checkpoint_path=path, **arguments
+    )
+    assert (first.counts == unbroken.counts[:6]).all()
+    assert (resumed.counts == unbroken.counts).all()
+    assert (resumed.preferences == unbroken.preferences).all()
+    assert load_checkpoint(path)[0].steps == 12
+
+
+def test_periodic_checkpoints(tmp_path):
+    path = str(tmp_path / 'run.npz')
+    trajectory = simulate_opinion_dynamics(
+        500, 3, MATRIX, 7, 2, checkpoint_path=path, checkpoint_every=3
+    )
+    saved, rng = load_checkpoint(path)
+    assert saved.steps == 7
+    assert (saved.preferences == trajectory.preferences).all()
+    assert isinstance(rng, np.random.Generator)
+
+
+def test_checkpoint_must_match_the_simulation(tmp_path):
+    path = str(tmp_path / 'run.npz')
+    simulate_opinion_dynamics(500, 3, MATRIX, 2, 2, checkpoint_path=path)
+    with pytest.raises(ValueError):
+        simulate_opinion_dynamics(400, 3, MATRIX, 4, resume_from=path)
+
+
+def test_agent_based_endpoint(client):
+    payload = {
+        'num_electors': 500,
+        'num_choices': 3,
+        'influence_matrix': MATRIX,
+        'num_steps': 4,
+        'seed': 11,
+    }
+    response = client.post('/simulations/agent_based', json=payload)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert len(data['trajectory']) == 5
+    assert sum(data['final_counts']) == 500
+    assert data['final_counts'] == data['trajectory'][-1]
+    assert data['metadata']['update'] == 'synchronous'
+    assert data['metadata']['steps'] == 4
+    assert len(data['changes']) == 4
+    assert response.get_json() == client.post(
+        '/simulations/agent_based', json=payload
+    ).get_json()
+
+
+def test_agent_based_endpoint_stops_early(client):
+    response = client.post('/simulations/agent_based', json={
+        'num_electors': 500,
+        'num_choices': 2,
+        'influence_matrix': [[0, 0], [0, 0]],
+        'num_steps': 50,
+        'tolerance': 0,
+        'patience': 2,
+    })
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['metadata']['converged']
+    assert data['metadata']['steps'] == 2
+    assert len(data['trajectory']) == 3
+
+
+def test_agent_based_endpoint_rejects_invalid_matrix(client):
+    response = client.post('/simulations/agent_based', json={
+        'num_choices': 3,
+        'influence_matrix': [[0.5, 0.5]],
+    })
+    assert response.status_code == 400
+    assert 'influence_matrix' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('update', ['synchronous', 'asynchronous'])
+def test_isolated_electors_keep_their_preference(update):
+    graph = from_edges(1000, [], [])
+    trajectory = simulate_opinion_dynamics(
+        1000, 3, np.ones((3, 3)), 5, 1, update=update, graph=graph
+    )
+    assert (trajectory.counts == trajectory.counts[0]).all()
+
+
+@pytest.mark.parametrize('update', ['synchronous', 'asynchronous'])
+def test_dynamics_on_a_graph(update):
+    graph = watts_strogatz(2000, 6, 0.1, 2)
+    trajectory = simulate_opinion_dynamics(
+        2000, 3, MATRIX, 10, 4, update=update, graph=graph
+    )
+    assert (trajectory.counts.sum(axis=1) == 2000).all()
+    with pytest.raises(ValueError):
+        simulate_opinion_dynamics(1000, 3, MATRIX, 10, graph=graph)
+
+
+def test_agent_based_endpoint_with_network(client):
+    payload = {
+        'num_electors': 500,
+        'num_choices': 3,
+        'influence_matrix': MATRIX,
+        'num_steps': 4,
+        'seed': 11,
+        'network': {'type': 'barabasi_albert', 'm': 2},
+    }
+    response = client.post('/simulations/agent_based', json=payload)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['metadata']['network']['type'] == 'barabasi_albert'
+    assert data['metadata']['network']['num_edges'] > 0
+    assert sum(data['final_counts']) == 500
+
+    payload['network'] = {'type': 'complete'}
+    response = client.post('/simulations/agent_based', json=payload)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('network', [
+    {'type': 'erdos_renyi', 'mean_degree': 1e12},
+    {'type': 'watts_strogatz', 'k': 10**9},
+    {'type': 'barabasi_albert', 'm': 10**6},
+])
+def test_agent_based_endpoint_caps_network_size(client, network):
+    payload = {
+        'num_electors': 1000,
+        'num_choices': 2,
+        'influence_matrix': [[0.5, 0.5], [0.5, 0.5]],
+        'num_steps': 3,
+        'network': network,
+    }
+    response = client.post('/simulations/agent_based', json=payload)
+    assert response.status_code == 400
+
+
+def test_agent_based_endpoint_caps_network_edges(app, client):
+    app.config['SIMULATION_AGENT_MAX_EDGES'] = 1000
+    payload = {
+        'num_electors': 1000,
+        'num_choices': 2,
+        'influence_matrix': [[0.5, 0.5], [0.5, 0.5]],
+        'num_steps': 3,
+        'network': {'type': 'barabasi_albert', 'm': 2},
+    }
+    response = client.post('/simulations/agent_based', json=payload)
+    assert response.status_code == 400
+    assert 'too large' in response.get_json()['error']
+
+
+@pytest.mark.parametrize('field, value', [
+    ('num_steps', 0),
+    ('num_steps', 10**12),
+    ('num_electors', -5),
+    ('num_electors', 10**12),
+])
+def test_agent_based_endpoint_caps_run_size(client, field, value):
+    payload = {
+        'num_electors': 100,
+        'num_choices': 2,
+        'influence_matrix': [[0.5, 0.5], [0.5, 0.5]],
+        'num_steps': 3,
+    }
+    payload[field] = value
+    response = client.post('/simulations/agent_based', json=payload)
+    assert response.status_code == 400
+    assert field in response.get_json()['error']
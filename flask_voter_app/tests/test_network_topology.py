@@ -0,0 +1,151 @@
+# tests/test_network_topology.py
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from app.simulation.network_topology import (
+    barabasi_albert,
+    build_graph,
+    cached_graph,
+    erdos_renyi,
+    from_edges,
+    knn_graph,
+    load_graph,
+    save_graph,
+    watts_strogatz,
+)
+from app.simulation.population_simulation import simulate_population
+
+MAX_BYTES = 1 << 20
+
+
+def assert_simple_undirected(graph):
+    edges = set()
+    for node in range(graph.num_nodes):
+        neighbours = graph.indices[graph.indptr[node]:graph.indptr[node + 1]]
+        assert node not in neighbours
+        assert list(neighbours) == sorted(set(neighbours))
+        edges.update((node, int(other)) for other in neighbours)
+    assert all((other, node) in edges for node, other in edges)
+
+
+def test_from_edges_builds_symmetric_csr():
+    graph = from_edges(4, [0, 1, 1, 2, 3], [1, 0, 2, 2, 0])
+    assert graph.indptr.tolist() == [0, 2, 4, 5, 6]
+    assert graph.indices.tolist() == [1, 3, 0, 2, 1, 0]
+    assert graph.num_edges == 3
+
+
+@pytest.mark.parametrize('graph', [
+    erdos_renyi(2000, 6, 1),
+    watts_strogatz(2000, 6, 0.1, 1),
+    barabasi_albert(2000, 3, 1),
+    knn_graph(simulate_population(500, 45, 1), 5),
+])
+def test_generated_graphs_are_simple_and_undirected(graph):
+    assert_simple_undirected(graph)
+    assert graph.degrees().sum() == 2 * graph.num_edges
+
+
+def test_graph_degrees():
+    assert abs(erdos_renyi(5000, 8, 2).degrees().mean() - 8) < 0.5
+    # Without rewiring every node keeps its k ring neighbours
+    assert (watts_strogatz(100, 4, 0, 2).degrees() == 4).all()
+    # Preferential attachment gives hubs far above the mean degree
+    degrees = barabasi_albert(5000, 3, 2).degrees()
+    assert degrees.max() > 10 * degrees.mean()
+
+
+def test_graphs_are_reproducible():
+    spec = {'type': 'watts_strogatz', 'k': 4, 'beta': 0.3}
+    first = build_graph(spec, 1000, 9)
+    second = build_graph(spec, 1000, 9)
+    assert (first.indices == second.indices).all()
+
+
+def test_sample_neighbours():
+    graph = from_edges(4, [0, 0], [1, 2])
+    nodes = np.array([0, 0, 0, 1, 2, 3] * 100)
+    partners = graph.sample_neighbours(nodes, 3)
+    assert set(partners[nodes == 0]) == {1, 2}
+    assert set(partners[nodes == 1]) == {0}
+    # Node 3 has no neighbour
+    assert set(partners[nodes == 3]) == {3}
+
+
+def test_saved_graphs_are_memory_mapped(tmp_path):
+    graph = barabasi_albert(1000, 2, 4)
+    path = str(tmp_path / 'graph.npz')
+    save_graph(graph, path)
+    loaded = load_graph(path)
+    assert isinstance(loaded.indices, np.memmap)
+    assert (loaded.indptr == graph.indptr).all()
+    assert (loaded.indices == graph.indices).all()
+
+
+def test_cached_graph_is_generated_once(tmp_path, monkeypatch):
+    spec = {'type': 'erdos_renyi', 'mean_degree': 4}
+    first = cached_graph(spec, 1000, 5, str(tmp_path), MAX_BYTES)
+    assert len(list(tmp_path.iterdir())) == 1
+
+    def fail(*args):
+        raise AssertionError('graph regenerated')
+
+    monkeypatch.setattr('app.simulation.network_topology.build_graph', fail)
+    second = cached_graph(spec, 1000, 5, str(tmp_path), MAX_BYTES)
+    assert (first.indices == second.indices).all()
+
+
+def test_graph_cache_is_bounded(tmp_path):
+    spec = {'type': 'erdos_renyi', 'mean_degree': 4}
+    size = cached_graph(spec, 1000, 0, str(tmp_path), MAX_BYTES)
+    size = size.indptr.nbytes + size.indices.nbytes + 1024
+    # Room for two graphs: the least recently used one goes first
+    for seed in range(3):
+        cached_graph(spec, 1000, seed, str(tmp_path), 2 * size)
+    assert len(list(tmp_path.iterdir())) == 2
+    # Graphs too large for the cache are built but not stored
+    cached_graph(spec, 1000, 9, str(tmp_path / 'small'), 100)
+    assert not (tmp_path / 'small').exists()
+    # No cache without a size budget
+    cached_graph(spec, 1000, 9, str(tmp_path / 'off'))
+    assert not (tmp_path / 'off').exists()
+
+
+def test_invalid_network_spec():
+    with pytest.raises(ValueError):
+        build_graph({'type': 'complete'}, 10)
+    with pytest.raises(ValueError):
+        build_graph({'type': 'watts_strogatz', 'beta': 2}, 10)
+
+
+@pytest.mark.parametrize('spec', [
+    {'type': 'erdos_renyi', 'mean_degree': 1e9},
+    {'type': 'watts_strogatz', 'k': 101},
+    {'type': 'barabasi_albert', 'm': 101},
+    {'type': 'knn', 'k': 101},
+])
+def test_network_degree_is_capped(spec):
+    with pytest.raises(ValueError, match='at most 100'):
+        build_graph(spec, 10, max_degree=100)
+
+
+def test_network_size_is_capped(tmp_path):
+    spec = {'type': 'barabasi_albert', 'm': 5}
+    with pytest.raises(ValueError, match='too large'):
+        build_graph(spec, 1000, max_edges=4999)
+    assert build_graph(spec, 1000, max_edges=5000).num_nodes == 1000
+    # Checked before the cache is looked up
+    cached_graph(spec, 1000, 1, str(tmp_path), MAX_BYTES)
+    with pytest.raises(ValueError, match='too large'):
+        cached_graph(spec, 1000, 1, str(tmp_path), MAX_BYTES, max_edges=4999)
+
+
+def test_concurrent_saves_do_not_collide(tmp_path):
+    graphs = [barabasi_albert(2000, 2, seed) for seed in range(8)]
+    path = str(tmp_path / 'graph.npz')
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda graph: save_graph(graph, path), graphs))
+    loaded = load_graph(path, mmap=False)
+    assert any(np.array_equal(loaded.indices, graph.indices) for graph in graphs)
+    assert [entry.name for entry in tmp_path.iterdir()] == ['graph.npz']
@@ -0,0 +1,72 @@
+# tests/test_population_simulation.py
+import numpy as np
+import pytest
+from app.simulation import population_simulation
+from app.simulation.population_simulation import (
+    assign_voters_to_candidates,
+    nearest_candidates,
+)
+
+
+def brute_force(voters, candidates):
+    return [
+        int(np.argmin([
+            np.linalg.norm(np.array(voter) - np.array(candidate))
+            for candidate in candidates
+        ]))
+        for voter in voters
+    ]
+
+
+@pytest.mark.parametrize('num_candidates', [1, 5, 50])
+def test_assignment_matches_brute_force(num_candidates):
+    rng = np.random.default_rng(num_candidates)
+    voters = rng.uniform(-5, 5, (500, 2)).tolist()
+    candidates = rng.uniform(-5, 5, (num_candidates, 2)).tolist()
+    assert assign_voters_to_candidates(voters, candidates) == brute_force(
+        voters, candidates
+    )
+
+
+def test_ties_go_to_the_first_candidate():
+    assert assign_voters_to_candidates([[0, 0]], [[1, 0], [-1, 0]]) == [0]
+
+
+def test_k_nearest_broadcast_and_kdtree_agree(monkeypatch):
+    rng = np.random.default_rng(3)
+    voters = rng.uniform(-5, 5, (300, 2))
+    candidates = rng.uniform(-5, 5, (12, 2))
+    indices, distances = nearest_candidates(voters, candidates, k=4)
+    assert indices.shape == distances.shape == (300, 4)
+    assert (np.diff(distances, axis=1) >= 0).all()
+
+    monkeypatch.setattr(population_simulation, 'KDTREE_MIN_CANDIDATES', 1)
+    tree_indices, tree_distances = nearest_candidates(voters, candidates, k=4)
+    assert (tree_indices == indices).all()
+    assert np.allclose(tree_distances, distances)
+
+
+def test_k_is_capped_by_the_number_of_candidates():
+    indices, _ = nearest_candidates([[0, 0]], [[1, 1], [2, 2]], k=5)
+    assert indices.tolist() == [[0, 1]]
+
+
+def test_closest_candidate_endpoint(client):
+    payload = {
+        'voters': [[0, 0], [4, 4]],
+        'candidates': [[3, 3], [1, 0], [-4, -4]],
+    }
+    response = client.post('/simulations/get_closest_candidate', json=payload)
+    assert response.status_code == 200
+    assert response.get_json() == {'result': [1, 0]}
+
+    payload['k'] = 2
+    data = client.post(
+        '/simulations/get_closest_candidate', json=payload
+    ).get_json()
+    assert data['rankings'] == [[1, 0], [0, 1]]
+    assert data['distances'][0][0] == pytest.approx(1.0)
+
+    payload['candidates'] = []
+    response = client.post('/simulations/get_closest_candidate', json=payload)
+    assert response.status_code == 400
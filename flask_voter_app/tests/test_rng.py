@@ -0,0 +1,69 @@
+# tests/test_rng.py
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+from app.simulation.population_simulation import simulate_population
+from app.utils.rng import as_generator, chunk_streams, parse_seed, spawn_generators
+from app.utils.simul import simulate_ranked_voters, simulate_voters
+from app.utils.simulation_voting_utils import create_voter, generate_voters, issues
+
+DEMOGRAPHICS = {
+    'age': {'18-25': 0.3, '26-60': 0.5, '60+': 0.2},
+    'gender': {'male': 0.5, 'female': 0.5},
+    'location': {'urban': 0.6, 'rural': 0.4},
+    'education': {'bachelor': 0.5, 'advanced': 0.5},
+    'income': {'low': 0.3, 'high': 0.7},
+    'ideology': {'left': 0.5, 'right': 0.5},
+}
+WEIGHTS = {'ideology': {'left': {'A': 2.0}, 'right': {'B': 2.0}}}
+
+
+def _chunk_priorities(chunk):
+    population = generate_voters(chunk.stop - chunk.start, chunk.seed, chunk.start)
+    return population.ids, population.issue_priorities
+
+
+def test_chunked_generation_is_identical_serial_and_parallel():
+    chunks = chunk_streams(42, 1000, chunk_size=300)
+    assert [(c.start, c.stop) for c in chunks] == [
+        (0, 300), (300, 600), (600, 900), (900, 1000)
+    ]
+
+    serial = [_chunk_priorities(chunk) for chunk in chunks]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        parallel = list(executor.map(_chunk_priorities, chunks))
+
+    for (ids, priorities), (other_ids, other_priorities) in zip(serial, parallel):
+        assert np.array_equal(ids, other_ids)
+        assert np.array_equal(priorities, other_priorities, equal_nan=True)
+
+
+def test_seeded_entry_points_are_reproducible():
+    def run(seed):
+        rng = as_generator(seed)
+        return (
+            simulate_voters(200, ['A', 'B'], DEMOGRAPHICS, WEIGHTS, 0.7, rng)[1],
+            simulate_ranked_voters(50, ['A', 'B'], DEMOGRAPHICS, WEIGHTS, 0.7, rng)[1],
+            create_voter(issues, 0, rng),
+            simulate_population(20, 40, rng),
+        )
+
+    assert run(1) == run(1)
+    assert run(1) != run(2)
+
+
+def test_spawned_generators_are_independent():
+    first, second = spawn_generators(7, 2)
+    again = spawn_generators(7, 2)
+
+    assert first.random() == again[0].random()
+    assert first.random() != second.random()
+
+
+def test_parse_seed():
+    assert parse_seed(None) is None
+    assert parse_seed(3) == 3
+    for value in (-1, 'seed', 1.5, True):
+        with pytest.raises(ValueError):
+            parse_seed(value)
@@ -0,0 +1,80 @@
+# tests/test_simul.py
+import numpy as np
+from app.utils import simul
+from app.utils.simul import (
+    compile_influence,
+    init,
+    init_columns,
+    simulate_ranked_choices,
+    simulate_ranked_voters,
+    simulate_score_values,
+    simulate_score_voters,
+    simulate_vote_tally,
+    simulate_voters,
+)
+from tests.test_rng import DEMOGRAPHICS, WEIGHTS
+
+ARGS = (2000, ['A', 'B', 'C'], DEMOGRAPHICS, WEIGHTS, 0.7)
+
+
+def test_columns_are_integer_coded():
+    columns = init_columns(1000, DEMOGRAPHICS, 0.7, 3)
+    assert columns.size == 1000
+    assert columns.categories['age'] == ['18-25', '26-60', '60+']
+    assert columns.codes['age'].dtype.kind == 'i'
+    assert set(np.unique(columns.codes['age'])) <= {0, 1, 2}
+
+    voters = init(1000, DEMOGRAPHICS, 0.7, 3)
+    assert [voter['age'] for voter in voters] == columns.labels('age')
+    assert [voter['turnout'] for voter in voters] == columns.turnout.tolist()
+    assert list(voters[0]) == [
+        'id', 'age', 'gender', 'location', 'education', 'income', 'ideology',
+        'turnout',
+    ]
+
+
+def test_category_frequencies_follow_weights():
+    columns = init_columns(200_000, DEMOGRAPHICS, 0.7, 4)
+    shares = np.bincount(columns.codes['age']) / columns.size
+    assert np.allclose(shares, [0.3, 0.5, 0.2], atol=0.01)
+    assert abs(columns.turnout.mean() - 0.7) < 0.01
+
+
+def test_array_simulators_match_voter_simulators():
+    _, _, tally = simulate_voters(*ARGS, rng=8)
+    assert simulate_vote_tally(*ARGS, rng=8) == dict(tally)
+
+    _, rankings, tally = simulate_ranked_voters(*ARGS, rng=8)
+    choices, choice_tally = simulate_ranked_choices(*ARGS, rng=8)
+    assert [['ABC'[i] for i in row] for row in choices.tolist()] == rankings
+    assert choice_tally == dict(tally)
+
+    _, all_scores, _ = simulate_score_voters(*ARGS, rng=8)
+    values = simulate_score_values(*ARGS, rng=8)
+    assert values.tolist() == [[s[c] for c in 'ABC'] for s in all_scores]
+
+
+def test_influence_compiled_once_per_payload():
+    columns = init_columns(100, DEMOGRAPHICS, 1.0, 1)
+    model = compile_influence(WEIGHTS, columns, ['A', 'B'])
+    same = compile_influence(
+        {'ideology': {'left': {'A': 2.0}, 'right': {'B': 2.0}}}, columns, ['A', 'B']
+    )
+    assert same is model
+    assert model.attributes == ('ideology',)
+    assert model.products.tolist() == [[2.0, 1.0], [1.0, 2.0]]
+    assert compile_influence(WEIGHTS, columns, ['B', 'A']) is not model
+
+
+def test_per_voter_fallback_matches_combinations(monkeypatch):
+    weights = dict(WEIGHTS, age={'18-25': {'A': 1.5, 'C': 0.5}})
+    args = (ARGS[0], ARGS[1], DEMOGRAPHICS, weights, ARGS[4])
+    expected = simulate_score_values(*args, rng=2), simulate_ranked_choices(*args, rng=2)
+
+    monkeypatch.setattr(simul, 'MAX_COMBINATIONS', 0)
+    simul._compile_influence.cache_clear()
+    assert np.array_equal(simulate_score_values(*args, rng=2), expected[0])
+    choices, tally = simulate_ranked_choices(*args, rng=2)
+    assert np.array_equal(choices, expected[1][0])
+    assert tally == expected[1][1]
+    simul._compile_influence.cache_clear()
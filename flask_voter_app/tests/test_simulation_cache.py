@@ -0,0 +1,86 @@
+# tests/test_simulation_cache.py
+from functools import partial
+
+from app.services.simulation_cache_service import LocalCacheStore, payload_hash
+from app.utils.simulation_ranked_utils import (
+    RANKED_METHODS,
+    get_kemeny_young_ranking,
+)
+from tests.test_simulation_jobs import FORM_DATA
+
+
+def test_seeded_requests_are_served_from_cache(client):
+    miss = client.post('/simulations/', json={'formData': FORM_DATA})
+    assert miss.headers['X-Simulation-Cache'] == 'MISS'
+    hit = client.post('/simulations/', json={'formData': FORM_DATA})
+    assert hit.headers['X-Simulation-Cache'] == 'HIT'
+    assert hit.get_json() == miss.get_json()
+
+
+def test_cache_hits_leave_out_timings(client):
+    form_data = dict(FORM_DATA, simulationType=['ranked'], rankedMethods=['irv'])
+    miss = client.post('/simulations/', json={'formData': form_data}).get_json()
+    assert 'ranked_method_timings' in miss
+    hit = client.post('/simulations/', json={'formData': form_data}).get_json()
+    assert 'ranked_method_timings' not in hit
+    del miss['ranked_method_timings']
+    assert hit == miss
+
+
+def test_timed_out_kemeny_results_are_not_cached(client, monkeypatch):
+    form_data = dict(
+        FORM_DATA, simulationType=['ranked'], rankedMethods=['kemeny_young']
+    )
+    # The exact solver gives up at once and falls back to the local search
+    monkeypatch.setitem(
+        RANKED_METHODS,
+        'kemeny_young',
+        partial(get_kemeny_young_ranking, time_budget=-1),
+    )
+    for _ in range(2):
+        response = client.post('/simulations/', json={'formData': form_data})
+        assert response.get_json()['kemeny_young_ranking']['approximate']
+        assert response.headers['X-Simulation-Cache'] == 'MISS'
+
+    monkeypatch.undo()
+    miss = client.post('/simulations/', json={'formData': form_data})
+    assert not miss.get_json()['kemeny_young_ranking']['approximate']
+    hit = client.post('/simulations/', json={'formData': form_data})
+    assert hit.headers['X-Simulation-Cache'] == 'HIT'
+
+
+def test_unseeded_requests_bypass_cache(client):
+    form_data = {k: v for k, v in FORM_DATA.items() if k != 'seed'}
+    response = client.post('/simulations/', json={'formData': form_data})
+    assert response.status_code == 200
+    assert response.headers['X-Simulation-Cache'] == 'BYPASS'
+
+
+def test_payload_hash_is_canonical():
+    reordered = dict(reversed(list(FORM_DATA.items())))
+    reordered['simulationType'] = ['scores', 'votes']
+    assert payload_hash(reordered) == payload_hash(FORM_DATA)
+    assert payload_hash(dict(FORM_DATA, seed=12)) != payload_hash(FORM_DATA)
+    assert payload_hash(FORM_DATA, salt='next') != payload_hash(FORM_DATA)
+
+
+def test_flush_requires_admin(client, init_db, auth_header, admin_auth_header):
+    client.post('/simulations/', json={'formData': FORM_DATA})
+    assert client.delete('/simulations/cache', headers=auth_header).status_code == 403
+
+    response = client.delete('/simulations/cache', headers=admin_auth_header)
+    assert response.status_code == 200
+    assert response.get_json() == {'flushed': 1}
+    again = client.post('/simulations/', json={'formData': FORM_DATA})
+    assert again.headers['X-Simulation-Cache'] == 'MISS'
+
+
+def test_local_store_evicts_least_recently_used():
+    store = LocalCacheStore(max_entries=2)
+    store.set('a', b'1', ttl=60)
+    store.set('b', b'2', ttl=60)
+    store.get('a')
+    store.set('c', b'3', ttl=60)
+    assert store.get('b') is None
+    assert store.get('a') == b'1'
+    assert store.get('c') == b'3'
@@ -0,0 +1,129 @@
+# tests/test_simulation_executor.py
+import numpy as np
+import pytest
+from app.utils.simulation_executor import SimulationExecutor, _merge_tallies
+from app.utils.simulation_ranked_utils import RankedBallots
+
+PARAMS = {
+    'population_size': 500,
+    'candidates': ['A', 'B', 'C'],
+    'demographics': {
+        'age': {'18-25': 0.3, '26-60': 0.5, '60+': 0.2},
+        'gender': {'male': 0.5, 'female': 0.5},
+        'location': {'urban': 0.6, 'rural': 0.4},
+        'education': {'bachelor': 0.5, 'advanced': 0.5},
+        'income': {'low': 0.3, 'high': 0.7},
+        'ideology': {'left': 0.5, 'right': 0.5},
+    },
+    'influence_weights': {'ideology': {'left': {'A': 2.0}, 'right': {'B': 2.0}}},
+    'turnout_rate': 0.8,
+}
+
+
+def test_results_do_not_depend_on_worker_count():
+    branches = ['votes', 'ranked', 'scores']
+    serial = SimulationExecutor(workers=1, chunk_size=150).run(PARAMS, branches, 7)
+    parallel = SimulationExecutor(workers=2, chunk_size=150).run(PARAMS, branches, 7)
+
+    assert serial['votes']['voters'] == parallel['votes']['voters']
+    assert serial['votes']['tally'] == parallel['votes']['tally']
+    assert serial['ranked']['rankings'] == parallel['ranked']['rankings']
+    assert np.array_equal(
+        serial['ranked']['ballots'].pairwise_matrix().matrix,
+        parallel['ranked']['ballots'].pairwise_matrix().matrix,
+    )
+    assert (
+        serial['scores']['accumulator'].results()
+        == parallel['scores']['accumulator'].results()
+    )
+    # Voter ids continue across chunks
+    ids = [voter['id'] for voter in serial['votes']['voters']]
+    assert ids == list(range(500))
+
+
+def test_merged_ballots_match_direct_computation():
+    result = SimulationExecutor(chunk_size=100).run(PARAMS, ['ranked'], 3)
+    merged = result['ranked']['ballots']
+    direct = RankedBallots.from_rankings(
+        result['ranked']['rankings'], candidates=PARAMS['candidates']
+    )
+
+    assert np.array_equal(
+        merged.pairwise_matrix().matrix, direct.pairwise_matrix().matrix
+    )
+    counts = direct.position_counts()
+    assert sorted(merged.position_counts()) == sorted(counts)
+    for length, table in counts.items():
+        assert np.array_equal(merged.position_counts()[length], table)
+    assert sum(result['ranked']['first_choice_tally'].values()) == len(direct)
+
+
+def test_merge_rejects_mismatched_candidates():
+    with pytest.raises(ValueError):
+        RankedBallots.merge([
+            RankedBallots.from_rankings([['A', 'B']], candidates=['A', 'B']),
+            RankedBallots.from_rankings([['B', 'C']], candidates=['B', 'C']),
+        ])
+
+
+def test_merge_tallies():
+    assert _merge_tallies([{'A': 2, 'B': 1}, {'B': 3, 'C': 1}]) == {
+        'A': 2, 'B': 4, 'C': 1
+    }
+
+
+def test_aggregate_only_matches_full_simulation():
+    branches = ['votes', 'ranked', 'scores']
+    executor = SimulationExecutor(chunk_size=150)
+    full = executor.run(PARAMS, branches, 5)
+    aggregate = executor.run(
+        dict(PARAMS, sample_size=0, ballots=False), branches, 5
+    )
+
+    assert aggregate['votes']['voters'] == []
+    assert aggregate['votes']['votes'] is None
+    assert aggregate['votes']['tally'] == full['votes']['tally']
+    assert aggregate['ranked']['first_choice_tally'] == (
+        full['ranked']['first_choice_tally']
+    )
+    assert np.array_equal(
+        aggregate['ranked']['ballots'].choices, full['ranked']['ballots'].choices
+    )
+    assert (
+        aggregate['scores']['accumulator'].results()
+        == full['scores']['accumulator'].results()
+    )
+    assert aggregate['scores']['avg_scores'] == full['scores']['avg_scores']
+
+
+def test_voter_sample_is_drawn_across_chunks():
+    params = dict(PARAMS, sample_size=40)
+    result = SimulationExecutor(chunk_size=100).run(params, ['votes'], 9)
+    full = SimulationExecutor(chunk_size=100).run(PARAMS, ['votes'], 9)
+
+    ids = [voter['id'] for voter in result['votes']['voters']]
+    assert len(ids) == 40
+    assert ids == sorted(ids)
+    assert len({voter_id // 100 for voter_id in ids}) > 1
+    assert all(full['votes']['voters'][i] == voter
+               for i, voter in zip(ids, result['votes']['voters']))
+    assert result['votes']['votes'] == full['votes']['votes']
+
+
+def test_single_chunk_requests_run_inline(monkeypatch):
+    def no_pool(workers):
+        raise AssertionError('process pool used')
+
+    monkeypatch.setattr('app.utils.simulation_executor.get_process_pool', no_pool)
+    executor = SimulationExecutor(workers=4, chunk_size=500)
+    result = executor.run(PARAMS, ['votes', 'ranked', 'scores'], 7)
+    assert sum(result['votes']['tally'].values()) <= 500
+
+
+def test_scores_merge_bounded_accumulators():
+    result = SimulationExecutor(chunk_size=100).run(PARAMS, ['scores'], 4)
+    accumulator = result['scores']['accumulator']
+    assert accumulator.num_ballots == len(result['scores']['all_scores'])
+    means = dict(zip(accumulator.candidates, accumulator.means().tolist()))
+    for candidate, mean in result['scores']['avg_scores'].items():
+        assert means[candidate] == pytest.approx(mean, rel=1e-5)
@@ -0,0 +1,106 @@
+# tests/test_simulation_jobs.py
+import threading
+import time
+
+import pytest
+from app.services.simulation_job_service import (
+    CANCELLED,
+    JobQueueFull,
+    LocalJobStore,
+    SimulationJobService,
+)
+
+FORM_DATA = {
+    'simulationType': ['votes', 'scores'],
+    'populationSize': 200,
+    'candidates': ['A', 'B'],
+    'turnoutRate': 0.8,
+    'demographics': {
+        'age': {'18-25': 0.5, '26-60': 0.5},
+        'gender': {'male': 0.5, 'female': 0.5},
+        'location': {'urban': 0.5, 'rural': 0.5},
+        'education': {'bachelor': 0.5, 'advanced': 0.5},
+        'income': {'low': 0.5, 'high': 0.5},
+        'ideology': {'left': 0.5, 'right': 0.5},
+    },
+    'influenceWeights': {'ideology': {'left': {'A': 2.0}, 'right': {'B': 2.0}}},
+    'seed': 11,
+}
+
+
+def _wait(client, job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f'/simulations/jobs/{job_id}').get_json()
+        if job['status'] in ('finished', 'failed', 'cancelled'):
+            return job
+        time.sleep(0.05)
+    raise AssertionError('job did not finish')
+
+
+def test_job_result_matches_synchronous_route(client):
+    response = client.post('/simulations/jobs', json={'formData': FORM_DATA})
+    assert response.status_code == 202
+    job_id = response.get_json()['id']
+    assert response.headers['Location'] == f'/simulations/jobs/{job_id}'
+
+    job = _wait(client, job_id)
+    assert job['status'] == 'finished'
+    assert job['progress'] == 100.0
+
+    result = client.get(f'/simulations/jobs/{job_id}/result')
+    assert result.status_code == 200
+    direct = client.post('/simulations/', json={'formData': FORM_DATA})
+    assert result.get_json() == direct.get_json()
+
+
+def test_invalid_job_is_refused(client):
+    form_data = dict(FORM_DATA, seed=-1)
+    response = client.post('/simulations/jobs', json={'formData': form_data})
+    assert response.status_code == 400
+    assert 'seed' in response.get_json()['error']
+
+
+def test_failed_job_reports_error(client):
+    form_data = dict(FORM_DATA, populationSize='many')
+    job_id = client.post(
+        '/simulations/jobs', json={'formData': form_data}
+    ).get_json()['id']
+
+    job = _wait(client, job_id)
+    assert job['status'] == 'failed'
+    assert job['error']
+    assert client.get(f'/simulations/jobs/{job_id}/result').status_code == 409
+
+
+def test_unknown_job(client):
+    assert client.get('/simulations/jobs/missing').status_code == 404
+    assert client.get('/simulations/jobs/missing/result').status_code == 404
+    assert client.delete('/simulations/jobs/missing').status_code == 404
+
+
+def test_cancel_queued_job_and_bound_queue():
+    service = SimulationJobService(
+        {'SIMULATION_MAX_JOBS': 1, 'SIMULATION_MAX_QUEUED_JOBS': 1},
+        store=LocalJobStore(),
+    )
+    release = threading.Event()
+    service._pool.submit(release.wait)  # occupy the only worker
+
+    queued = service.submit(FORM_DATA)
+    service.submit(FORM_DATA)
+    with pytest.raises(JobQueueFull):
+        service.submit(FORM_DATA)
+
+    assert service.cancel(queued['id'])['status'] == CANCELLED
+    release.set()
+    assert service.get(queued['id'])['status'] == CANCELLED
+    assert service.result(queued['id']) is None
+
+
+def test_local_store_expires_items():
+    store = LocalJobStore()
+    store.set('key', 'value', ttl=0)
+    assert store.get('key') is None
+    store.set('key', 'value', ttl=60)
+    assert store.get('key') == 'value'
@@ -0,0 +1,272 @@
+# tests/test_simulation_ranked_utils.py
+from itertools import permutations
+
+import numpy as np
+import pytest
+from app.utils.simulation_ranked_utils import (
+    RANKED_METHODS,
+    RankedBallots,
+    build_pairwise_matrix,
+    get_borda_winner,
+    get_condorcet_winner,
+    get_coombs_rounds,
+    get_coombs_winner,
+    get_copeland_winner,
+    get_irv_rounds,
+    get_irv_winner,
+    get_kemeny_young_ranking,
+    get_kemeny_young_winner,
+    get_minimax_winner,
+    get_plurality_winner,
+    get_schulze_ranking,
+    get_schulze_winner,
+    get_two_round_winner,
+    run_all_ranked_methods,
+)
+
+# 5 A>B>C, 4 B>C>A, 2 C>A>B: A beats B 7-4, B beats C 9-2, C beats A 6-5
+CYCLE = [['A', 'B', 'C']] * 5 + [['B', 'C', 'A']] * 4 + [['C', 'A', 'B']] * 2
+
+# B is the Condorcet winner
+CONDORCET = [['A', 'B', 'C']] * 4 + [['B', 'C', 'A']] * 3 + [['C', 'B', 'A']] * 2
+
+
+def test_build_pairwise_matrix():
+    candidates, matrix = build_pairwise_matrix(CYCLE)
+
+    assert candidates == ['A', 'B', 'C']
+    assert matrix.tolist() == [[0, 7, 5], [4, 0, 9], [6, 2, 0]]
+
+
+def test_build_pairwise_matrix_dict_format():
+    votes = [
+        {'voter_id': i, 'ranking': ranking} for i, ranking in enumerate(CYCLE)
+    ]
+
+    assert (
+        build_pairwise_matrix(votes).matrix.tolist()
+        == build_pairwise_matrix(CYCLE).matrix.tolist()
+    )
+
+
+def test_partial_rankings_rank_listed_candidates_first():
+    _, matrix = build_pairwise_matrix([['A'], ['B', 'A', 'C']])
+
+    assert matrix.tolist() == [[0, 1, 2], [1, 0, 1], [0, 0, 0]]
+
+
+def test_condorcet_winner():
+    assert get_condorcet_winner(CONDORCET) == 'B'
+    assert get_condorcet_winner(CYCLE) is None
+
+
+def test_methods_share_precomputed_matrix():
+    pairwise = build_pairwise_matrix(CONDORCET)
+
+    assert get_condorcet_winner(CONDORCET, pairwise=pairwise) == 'B'
+    assert get_minimax_winner(CONDORCET, pairwise=pairwise) == 'B'
+    assert get_schulze_winner(CONDORCET, pairwise=pairwise) == 'B'
+    assert get_copeland_winner(CONDORCET, pairwise=pairwise) == 'B'
+    assert get_kemeny_young_winner(CONDORCET, pairwise=pairwise) == 'B'
+
+
+def test_cycle_resolution():
+    # Weakest defeat is C over A (6-5), so A wins Minimax, Schulze and Kemeny
+    assert get_minimax_winner(CYCLE) == 'A'
+    assert get_schulze_winner(CYCLE) == 'A'
+    assert get_kemeny_young_winner(CYCLE) == 'A'
+
+
+def test_ranked_ballots_round_trip():
+    votes = [
+        {'voter_id': 7, 'ranking': ['B', 'A', 'C']},
+        {'voter_id': 8, 'ranking': ['C']},
+        {'voter_id': 9, 'ranking': []},
+    ]
+    ballots = RankedBallots.from_rankings(votes)
+
+    assert ballots.candidates == ['B', 'A', 'C']
+    assert ballots.choices.dtype == np.int8
+    assert ballots.choices.tolist() == [[0, 1, 2], [2, -1, -1], [-1, -1, -1]]
+    assert ballots.to_rankings() == [['B', 'A', 'C'], ['C'], []]
+    assert ballots.to_dicts() == votes
+
+
+def test_methods_accept_ranked_ballots():
+    ballots = RankedBallots.from_rankings(CYCLE)
+
+    for method in (
+        get_borda_winner,
+        get_plurality_winner,
+        get_irv_winner,
+        get_coombs_winner,
+        get_schulze_winner,
+    ):
+        assert method(ballots) == method(CYCLE)
+
+
+def test_compressed_profile_matches_full_ballots():
+    ballots = RankedBallots.from_rankings(CYCLE)
+    profile = ballots.compress()
+
+    assert len(profile) == 3
+    assert profile.num_voters == len(CYCLE)
+    assert sorted(profile.weights.tolist()) == [2, 4, 5]
+    assert (
+        profile.pairwise_matrix().matrix.tolist()
+        == ballots.pairwise_matrix().matrix.tolist()
+    )
+    for method in (get_borda_winner, get_irv_winner, get_coombs_winner):
+        assert method(profile) == method(ballots)
+
+
+def test_from_profile():
+    ballots = RankedBallots.from_profile(
+        [{'ranking': ['A', 'B'], 'count': 3}, {'ranking': ['B', 'A'], 'count': 2}]
+    )
+
+    assert ballots.num_voters == 5
+    assert get_plurality_winner(ballots) == 'A'
+    assert ballots.to_profile()[1] == {'ranking': ['B', 'A'], 'count': 2}
+
+
+def test_kemeny_young_ranking_is_exact():
+    result = get_kemeny_young_ranking(CYCLE)
+
+    assert result == {
+        'winner': 'A',
+        'ranking': ['A', 'B', 'C'],
+        'score': 21,
+        'approximate': False,
+    }
+
+
+def test_kemeny_young_matches_brute_force():
+    rng = np.random.default_rng(0)
+    candidates = [f'C{i}' for i in range(8)]
+    votes = [list(rng.permutation(candidates)) for _ in range(40)]
+    _, matrix = build_pairwise_matrix(votes)
+    upper = np.triu_indices(len(candidates), k=1)
+
+    best = max(
+        matrix[np.ix_(order, order)][upper].sum()
+        for order in map(list, permutations(range(len(candidates))))
+    )
+    result = get_kemeny_young_ranking(votes)
+
+    assert result['approximate'] is False
+    assert sorted(result['ranking']) == sorted(candidates)
+    assert result['score'] == best
+
+
+def test_kemeny_young_falls_back_to_heuristic():
+    result = get_kemeny_young_ranking(CONDORCET, time_budget=0)
+
+    assert result['approximate'] is True
+    assert result['ranking'][0] == 'B'
+
+
+def test_schulze_ranking():
+    assert get_schulze_ranking(CYCLE) == ['A', 'B', 'C']
+    assert get_schulze_ranking(CONDORCET)[0] == 'B'
+
+
+def test_schulze_ranking_uses_widest_paths():
+    # Wikipedia's 45-voter example: E wins via E>D>C>B>A strongest paths
+    votes = (
+        [['A', 'C', 'B', 'E', 'D']] * 5
+        + [['A', 'D', 'E', 'C', 'B']] * 5
+        + [['B', 'E', 'D', 'A', 'C']] * 8
+        + [['C', 'A', 'B', 'E', 'D']] * 3
+        + [['C', 'A', 'E', 'B', 'D']] * 7
+        + [['C', 'B', 'A', 'D', 'E']] * 2
+        + [['D', 'C', 'E', 'B', 'A']] * 7
+        + [['E', 'B', 'A', 'D', 'C']] * 8
+    )
+
+    assert get_schulze_ranking(votes) == ['E', 'A', 'C', 'B', 'D']
+
+
+def test_irv_rounds_transfer_table():
+    votes = (
+        [['A', 'B', 'C', 'D']] * 4
+        + [['B', 'C', 'A', 'D']] * 3
+        + [['C', 'B', 'A', 'D']] * 2
+        + [['D']] * 1
+    )
+    result = get_irv_rounds(RankedBallots.from_rankings(votes).compress())
+
+    assert result['winner'] == 'B'
+    assert result['rounds'] == [
+        {
+            'round': 1,
+            'tally': {'A': 4, 'B': 3, 'C': 2, 'D': 1},
+            'eliminated': ['D'],
+            'transfers': {'D': {'exhausted': 1}},
+        },
+        {
+            'round': 2,
+            'tally': {'A': 4, 'B': 3, 'C': 2},
+            'eliminated': ['C'],
+            'transfers': {'C': {'B': 2}},
+        },
+        {
+            'round': 3,
+            'tally': {'A': 4, 'B': 5},
+            'eliminated': [],
+            'transfers': {},
+        },
+    ]
+
+
+def test_coombs_rounds_transfer_table():
+    votes = (
+        [['A', 'B', 'C']] * 4
+        + [['B', 'C', 'A']] * 3
+        + [['C', 'B']] * 2
+        + [['C']] * 1
+    )
+    result = get_coombs_rounds(votes)
+
+    assert result['winner'] == 'A'
+    assert [r['eliminated'] for r in result['rounds']] == [['C'], ['B']]
+    assert result['rounds'][0]['transfers'] == {'C': {'B': 4, 'exhausted': 1}}
+    assert result['rounds'][1]['tally'] == {'A': 3, 'B': 6}
+
+
+def test_two_round_winner():
+    # No majority in the first round: A and B go through, A wins 7-4
+    assert get_two_round_winner(CYCLE) == 'A'
+    # A leads the first round but loses the runoff to B 5-4
+    votes = [['A', 'B', 'C']] * 4 + [['B', 'A', 'C']] * 3 + [['C', 'B', 'A']] * 2
+    assert get_two_round_winner(votes) == 'B'
+
+
+def test_two_round_winner_with_fewer_than_two_candidates():
+    assert get_two_round_winner([['A'], [], []]) == 'A'
+    assert get_two_round_winner([[], []]) is None
+    assert get_two_round_winner([]) is None
+    ballots = RankedBallots.from_rankings([[]], candidates=['A'])
+    assert get_two_round_winner(ballots) is None
+
+
+def test_run_all_ranked_methods():
+    ballots = RankedBallots.from_rankings(CONDORCET).compress()
+    result = run_all_ranked_methods(ballots)
+
+    assert set(result['winners']) == set(RANKED_METHODS)
+    assert result['winners']['condorcet'] == 'B'
+    assert result['winners']['plurality'] == get_plurality_winner(CONDORCET)
+    assert result['winners']['irv'] == get_irv_winner(CONDORCET)
+    assert result['results']['schulze'] == get_schulze_ranking(CONDORCET)
+    assert {'position_counts', 'pairwise_matrix', 'borda'} <= set(result['timings'])
+
+
+def test_run_all_ranked_methods_subset():
+    result = run_all_ranked_methods(CYCLE, methods=['borda', 'plurality'])
+
+    assert result['winners'] == {'borda': 'B', 'plurality': 'A'}
+    assert 'pairwise_matrix' not in result['timings']
+
+    with pytest.raises(ValueError):
+        run_all_ranked_methods(CYCLE, methods=['dictator'])
@@ -0,0 +1,96 @@
+# tests/test_simulation_regret_utils.py
+import numpy as np
+import pytest
+from app.utils.simulation_regret_utils import (
+    election_regrets,
+    run_bayesian_regret_benchmark,
+)
+
+ELECTION = {
+    'population_size': 200,
+    'candidates': ['A', 'B', 'C'],
+    'demographics': {'ideology': {'left': 0.4, 'center': 0.2, 'right': 0.4}},
+    'influence_weights': {
+        'ideology': {
+            'left': {'A': 2.0},
+            'center': {'C': 2.0},
+            'right': {'B': 2.0, 'C': 1.5},
+        }
+    },
+    'turnout_rate': 0.8,
+}
+
+
+def test_election_regrets():
+    scores = np.array([[5, 0, 4], [5, 0, 4], [0, 5, 4]], dtype=np.float64)
+    regrets = election_regrets(
+        scores, ['A', 'B', 'C'], ['simple_score', 'plurality', 'condorcet']
+    )
+
+    # C has the highest average utility (0.8); plurality elects A (2/3)
+    assert regrets['simple_score'] == 0
+    assert regrets['plurality'] == pytest.approx(0.8 - 2 / 3)
+    assert regrets['condorcet'] == pytest.approx(0.8 - 2 / 3)
+
+
+def test_condorcet_cycle_has_no_regret():
+    # Rock-paper-scissors preferences: A > B > C, B > C > A, C > A > B
+    scores = np.array([[5, 3, 0], [0, 5, 3], [3, 0, 5]], dtype=np.float64)
+    regrets = election_regrets(scores, ['A', 'B', 'C'], ['condorcet', 'borda'])
+    assert np.isnan(regrets['condorcet'])
+    assert regrets['borda'] == 0
+
+
+def test_benchmark_reports_no_winner_elections_separately(monkeypatch):
+    def regrets(scores, candidates, methods):
+        # condorcet decides one election in two
+        regrets.calls += 1
+        no_winner = regrets.calls % 2 == 0
+        return {'plurality': 0.1, 'condorcet': np.nan if no_winner else 0.2}
+
+    regrets.calls = 0
+    monkeypatch.setattr(
+        'app.utils.simulation_regret_utils.election_regrets', regrets
+    )
+    result = run_bayesian_regret_benchmark(
+        ELECTION, num_elections=10, methods=['plurality', 'condorcet'], workers=1
+    )
+    assert result['results']['condorcet']['no_winner'] == 5
+    assert result['results']['condorcet']['mean_regret'] == pytest.approx(0.2)
+    assert result['results']['plurality']['no_winner'] == 0
+    assert result['results']['plurality']['mean_regret'] == pytest.approx(0.1)
+
+
+def test_method_that_never_elects_anyone_ranks_last(monkeypatch):
+    monkeypatch.setattr(
+        'app.utils.simulation_regret_utils.election_regrets',
+        lambda scores, candidates, methods: {'condorcet': np.nan, 'irv': 0.3},
+    )
+    result = run_bayesian_regret_benchmark(
+        ELECTION, num_elections=4, methods=['condorcet', 'irv'], workers=1
+    )
+    assert result['results']['condorcet']['mean_regret'] is None
+    assert result['results']['condorcet']['no_winner'] == 4
+    assert result['ranking'] == ['irv', 'condorcet']
+
+
+def test_benchmark_is_reproducible_across_workers():
+    kwargs = {'num_elections': 12, 'seed': 3, 'batch_size': 5}
+    methods = ['simple_score', 'plurality', 'irv']
+    serial = run_bayesian_regret_benchmark(
+        ELECTION, methods=methods, workers=1, **kwargs
+    )
+    pooled = run_bayesian_regret_benchmark(
+        ELECTION, methods=methods, workers=2, **kwargs
+    )
+
+    assert serial == pooled
+    assert serial['num_elections'] == 12
+    for result in serial['results'].values():
+        assert result['ci_low'] <= result['mean_regret'] <= result['ci_high']
+    assert serial['results']['simple_score']['mean_regret'] == 0
+
+
+def test_benchmark_rejects_unknown_methods():
+    with pytest.raises(ValueError):
+        run_bayesian_regret_benchmark(ELECTION, methods=['dictator'])
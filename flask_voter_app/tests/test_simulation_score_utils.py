@@ -0,0 +1,164 @@
+# tests/test_simulation_score_utils.py
+import numpy as np
+import pytest
+from app.utils.simulation_score_utils import (
+    ScoreAccumulator,
+    build_score_matrix,
+    calculate_bayesian_regret,
+    get_median_voting_winner,
+    get_score_distribution_analysis,
+    get_simple_score_winner,
+    get_star_voting_winner,
+    get_variance_based_winner,
+    run_all_score_voting_methods,
+)
+
+ALL_SCORES = [
+    {'voter_id': 1, 'scores': {'A': 5, 'B': 4, 'C': 0}},
+    {'voter_id': 2, 'scores': {'A': 5, 'B': 4, 'C': 1}},
+    {'voter_id': 3, 'scores': {'A': 0, 'B': 4, 'C': 5}},
+    {'voter_id': 4, 'scores': {'A': 1, 'B': 3.5, 'C': 4.5}},
+]
+
+
+def test_build_score_matrix_accepts_both_formats():
+    wrapped = build_score_matrix(ALL_SCORES)
+    plain = build_score_matrix([vote['scores'] for vote in ALL_SCORES])
+
+    assert wrapped.candidates == ['A', 'B', 'C']
+    assert wrapped.values.dtype == np.float32
+    assert np.array_equal(wrapped.values, plain.values)
+
+
+def test_build_score_matrix_marks_missing_scores():
+    _, values = build_score_matrix([{'A': 1, 'B': 2}, {'B': 3}])
+
+    assert np.isnan(values[1, 0])
+    assert get_simple_score_winner([{'A': 1, 'B': 2}, {'B': 3}])['details'] == {
+        'B': 2.5,
+        'A': 1.0,
+    }
+
+
+def test_simple_and_median_winners():
+    assert get_simple_score_winner(ALL_SCORES)['winner'] == 'B'
+    assert get_simple_score_winner(ALL_SCORES)['details']['A'] == 2.75
+
+    median = get_median_voting_winner(ALL_SCORES)
+    assert median['details'] == {'B': 4.0, 'A': 3.0, 'C': 2.75}
+
+
+def test_star_runoff():
+    result = get_star_voting_winner(ALL_SCORES)
+    runoff = result['details']['runoff']
+
+    assert (runoff['candidate1'], runoff['candidate2']) == ('B', 'A')
+    assert (runoff['votes1'], runoff['votes2'], runoff['tied']) == (2, 2, 0)
+    # A runoff tie goes to the second candidate
+    assert result['winner'] == 'A'
+
+
+def test_variance_and_distribution():
+    variance = get_variance_based_winner(ALL_SCORES)
+    assert variance['winner'] == 'B'
+    assert variance['details'][0]['variance'] == 0.046875
+
+    distribution = get_score_distribution_analysis(ALL_SCORES)['details']
+    by_candidate = {row['candidate']: row for row in distribution}
+    # Scores of exactly 5 fall outside the last 4.5-5 bin
+    assert by_candidate['A']['total'] == 2
+    assert by_candidate['B']['distribution'][8] == 3
+    assert by_candidate['B']['mode_range'] == '4.0-4.5'
+
+
+def test_bayesian_regret():
+    result = calculate_bayesian_regret(ALL_SCORES)
+    regrets = {row['candidate']: row['avg_regret'] for row in result['details']}
+
+    assert result['winner'] == 'B'
+    assert np.isclose(regrets['B'], (1 + 1 + 1 + 1) / 4 / 5)
+
+
+def test_run_all_score_voting_methods():
+    results = run_all_score_voting_methods(ALL_SCORES)
+
+    assert set(results) == {
+        'simple_score',
+        'star_voting',
+        'median_voting',
+        'mean_median_hybrid',
+        'variance_based',
+        'score_distribution',
+        'bayesian_regret',
+    }
+    assert results['simple_score'] == get_simple_score_winner(ALL_SCORES)
+
+
+def test_score_accumulator_matches_batch_results():
+    accumulator = ScoreAccumulator()
+    for vote in ALL_SCORES:
+        accumulator.ingest([vote])
+
+    results = accumulator.results()
+    expected = run_all_score_voting_methods(ALL_SCORES)
+
+    assert accumulator.median_exact
+    for method in expected:
+        if method != 'bayesian_regret':
+            assert results[method] == expected[method]
+    regrets = [row['avg_regret'] for row in results['bayesian_regret']['details']]
+    assert regrets == pytest.approx([0.2, 0.425, 0.45])
+
+
+def test_score_accumulator_merge_aligns_candidates():
+    late = [{'scores': {'D': 5, 'A': 2}}, {'scores': {'B': 1, 'D': 3}}]
+    ballots = ALL_SCORES + late
+
+    first = ScoreAccumulator().ingest(ALL_SCORES)
+    second = ScoreAccumulator().ingest(late)
+    merged = first.merge(second).results()
+    expected = run_all_score_voting_methods(ballots)
+
+    assert merged['star_voting']['details']['runoff'] == (
+        expected['star_voting']['details']['runoff']
+    )
+    assert merged['median_voting'] == expected['median_voting']
+    assert merged['variance_based'] == expected['variance_based']
+    assert merged['bayesian_regret']['winner'] == 'B'
+
+
+def test_score_accumulator_approximate_medians():
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 5, size=(999, 3)).astype(np.float32)
+    accumulator = ScoreAccumulator(['A', 'B', 'C'])
+    for start in range(0, len(values), 100):
+        chunk = values[start:start + 100]
+        accumulator.ingest([dict(zip('ABC', map(float, row))) for row in chunk])
+
+    assert not accumulator.median_exact
+    assert np.allclose(accumulator.medians(), np.median(values, axis=0), atol=0.01)
+
+
+def test_score_accumulator_exact_medians_on_fine_grid():
+    # On the 0.01 grid but not the 0.5 one; float32 puts 2.37 just below it
+    accumulator = ScoreAccumulator().ingest([
+        {'A': 2.37, 'B': 1}, {'A': 2.37, 'B': 3}, {'A': 4.11, 'B': 2},
+    ])
+    assert accumulator.median_exact
+    assert np.allclose(accumulator.medians(), [2.37, 2.0])
+
+
+def test_score_accumulator_exact_medians_of_continuous_scores():
+    rng = np.random.default_rng(1)
+    # Few distinct off-grid scores, as the simul.py model produces
+    levels = rng.uniform(0, 5, size=7)
+    values = levels[rng.integers(0, 7, size=(1001, 3))].astype(np.float32)
+    first = ScoreAccumulator(['A', 'B', 'C'], exact_medians=True)
+    second = ScoreAccumulator(['A', 'B', 'C'], exact_medians=True)
+    first.ingest([dict(zip('ABC', map(float, row))) for row in values[:400]])
+    second.ingest([dict(zip('ABC', map(float, row))) for row in values[400:]])
+    first.merge(second)
+
+    expected = np.partition(values, 500, axis=0)[500].astype(np.float64)
+    assert first.medians().tolist() == expected.tolist()
+    assert not first.median_exact
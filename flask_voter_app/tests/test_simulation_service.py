@@ -0,0 +1,113 @@
+# tests/test_simulation_service.py
+import json
+
+from tests.test_simulation_jobs import FORM_DATA
+
+FORM_DATA_RANKED = dict(
+    FORM_DATA, simulationType=['votes', 'ranked', 'scores'], rankedMethods=['irv']
+)
+
+
+def _records(response):
+    return [json.loads(line) for line in response.data.decode().splitlines()]
+
+
+def test_ndjson_stream_matches_full_response(client):
+    full = client.post('/simulations/', json={'formData': FORM_DATA_RANKED})
+    full = full.get_json()
+    response = client.post(
+        '/simulations/?stream=ndjson', json={'formData': FORM_DATA_RANKED}
+    )
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+
+    records = _records(response)
+    assert records[0]['type'] == 'metadata'
+    assert records[0]['metadata'] == full['metadata']
+    voters = [record for record in records if record['type'] == 'voter']
+    assert len(voters) == 3 * FORM_DATA['populationSize']
+    assert [
+        record['voter'] for record in voters if record['branch'] == 'scores'
+    ] == full['voters_sample']
+
+    summary = records[-1]
+    assert summary['type'] == 'summary'
+    for key in ('tally', 'first_choice_tally', 'irv_winner', 'simple_score_winner'):
+        assert summary[key] == full[key]
+    assert summary['avg_scores'] == full['avg_scores']
+
+
+def test_ndjson_stream_chosen_by_accept_header(client):
+    response = client.post(
+        '/simulations/',
+        json={'formData': FORM_DATA},
+        headers={'Accept': 'application/x-ndjson'},
+    )
+    assert response.mimetype == 'application/x-ndjson'
+    assert _records(response)[-1]['type'] == 'summary'
+
+
+def test_ndjson_stream_rejects_bad_seed(client):
+    response = client.post(
+        '/simulations/?stream=ndjson', json={'formData': dict(FORM_DATA, seed=-1)}
+    )
+    assert response.status_code == 400
+
+
+def test_ndjson_stream_rejects_unknown_ranked_method(client):
+    form_data = dict(FORM_DATA_RANKED, rankedMethods=['dictator'])
+    response = client.post(
+        '/simulations/?stream=ndjson', json={'formData': form_data}
+    )
+    assert response.status_code == 400
+    assert response.mimetype == 'application/json'
+    assert 'dictator' in response.get_json()['error']
+
+
+def test_aggregate_only_response(client):
+    full = client.post('/simulations/', json={'formData': FORM_DATA_RANKED})
+    form_data = dict(FORM_DATA_RANKED, sampleSize=0, includeBallots=False)
+    response = client.post('/simulations/', json={'formData': form_data})
+    assert response.status_code == 200
+
+    data, full = response.get_json(), full.get_json()
+    for key in ('votes', 'rankings', 'all_scores', 'voters_sample'):
+        assert key not in data
+    for key in ('tally', 'first_choice_tally', 'avg_scores', 'irv_winner'):
+        assert data[key] == full[key]
+
+
+def test_sample_size_caps_voters_sample(client):
+    form_data = dict(FORM_DATA, sampleSize=15)
+    data = client.post('/simulations/', json={'formData': form_data}).get_json()
+    assert len(data['voters_sample']) == 15
+    assert len(data['votes']) > 15
+
+
+def test_invalid_sample_options(client):
+    for options in ({'sampleSize': -1}, {'sampleSize': 'all'},
+                    {'includeBallots': 'no'}):
+        form_data = dict(FORM_DATA, **options)
+        response = client.post('/simulations/', json={'formData': form_data})
+        assert response.status_code == 400
+
+
+def test_unknown_ranked_method_is_rejected_before_simulating(client, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('simulation ran')
+
+    monkeypatch.setattr(
+        'app.services.simulation_service.executor_from_config', fail
+    )
+    form_data = dict(FORM_DATA_RANKED, rankedMethods=['irv', 'dictator'])
+    response = client.post('/simulations/', json={'formData': form_data})
+    assert response.status_code == 400
+    assert 'dictator' in response.get_json()['error']
+
+    response = client.post('/simulations/jobs', json={'formData': form_data})
+    assert response.status_code == 400
+
+    response = client.post(
+        '/simulations/', json={'formData': dict(FORM_DATA, rankedMethods='irv')}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,107 @@
+# tests/test_simulation_voting_utils.py
+import numpy as np
+from app.utils.simulation_voting_utils import (
+    VOTER_CATEGORIES,
+    CandidateSet,
+    calculate_utility,
+    calculate_utility_matrix,
+    create_candidate,
+    create_voter,
+    generate_voters,
+    issue_alignment,
+    issues,
+    priority_matrix,
+)
+
+
+def test_generate_voters_matches_create_voter_schema():
+    voters = generate_voters(50, np.random.default_rng(0), start_id=10).to_dicts()
+    reference = create_voter(issues, 0)
+
+    assert [voter['id'] for voter in voters] == list(range(10, 60))
+    for voter in voters:
+        assert voter.keys() == reference.keys()
+        assert 18 <= voter['age'] <= 85
+        assert voter['likelihood_to_vote'] <= 0.95
+        assert abs(sum(voter['issue_priorities'].values()) - 1) < 1e-9
+        for name, categories in VOTER_CATEGORIES.items():
+            assert voter[name] in categories
+
+
+def test_generate_voters_is_reproducible():
+    first = generate_voters(100, np.random.default_rng(7))
+    second = generate_voters(100, np.random.default_rng(7))
+
+    assert first.to_dicts() == second.to_dicts()
+
+
+def test_generate_voters_conditional_tables():
+    population = generate_voters(20000, np.random.default_rng(1))
+    education = population.labels('education')
+    young = population.age < 22
+
+    # Voters under 22 only have a high school diploma or a bachelor
+    assert set(education[young]) <= {'high_school', 'bachelor'}
+    # "jobs" is only prioritised by middle-aged or unemployed voters
+    jobs = ~np.isnan(population.issue_priorities[:, issues.index('jobs')])
+    middle_aged = (population.age >= 30) & (population.age <= 60)
+    unemployed = population.labels('employment_status') == 'unemployed'
+    assert np.array_equal(jobs, middle_aged | unemployed)
+
+
+def test_issue_alignment_matches_pairwise_sums():
+    population = generate_voters(40, np.random.default_rng(2))
+    voters = population.to_dicts()
+    candidates = [
+        create_candidate(issues, i, f'Candidate {i}', party)
+        for i, party in enumerate(['Green', 'Conservative', 'Liberal'])
+    ]
+    issue_list = ['economy', 'jobs', 'not_an_issue']
+
+    expected = [
+        [
+            sum(
+                voter['issue_priorities'].get(issue, 0)
+                * candidate['policies'].get(issue, 0)
+                for issue in issue_list
+            )
+            for candidate in candidates
+        ]
+        for voter in voters
+    ]
+    assert np.allclose(
+        priority_matrix(population, issue_list), priority_matrix(voters, issue_list)
+    )
+    assert np.allclose(
+        issue_alignment(population, CandidateSet(candidates), issue_list), expected
+    )
+    assert np.allclose(issue_alignment(voters, candidates, issue_list), expected)
+
+
+def test_calculate_utility_matrix_matches_calculate_utility():
+    voters = generate_voters(30, np.random.default_rng(3)).to_dicts()
+    candidates = [
+        create_candidate(issues, i, f'Candidate {i}', party)
+        for i, party in enumerate(['Green', 'Conservative', 'Liberal'])
+    ]
+    candidates[0]['charisma'] = 0.4
+    candidates[1]['scandals'] = 2
+    del candidates[2]['policies']['gender_equality']
+
+    utilities = calculate_utility_matrix(
+        voters, candidates, issues, np.random.default_rng(0)
+    )
+    expected = [calculate_utility(v, c, issues) for v in voters for c in candidates]
+
+    assert utilities.utility.shape == (30, 3)
+    for result, reference in zip(utilities.results(), expected):
+        assert result['voter_id'] == reference['voter_id']
+        assert result['candidate_id'] == reference['candidate_id']
+        assert abs(result['utility'] - reference['utility']) <= 1e-4
+        for name, value in reference['breakdown'].items():
+            assert abs(result['breakdown'][name] - value) <= 1e-4
+
+    repeat = calculate_utility_matrix(
+        voters, candidates, issues, np.random.default_rng(0)
+    )
+    assert np.array_equal(utilities.will_vote, repeat.will_vote)